@@ -1,7 +1,17 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.trinomial import lattice_levels, node_prices
+
+# Carpeta de figuras de la tesis, independiente del directorio de trabajo
+FIGURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'code',
+                       '03_metodos_valoracion', 'figures')
+
 # Configuración
 plt.figure(figsize=(14, 10))
 ax = plt.gca()
@@ -42,45 +52,28 @@ def draw_edge(x1, y1, x2, y2, color, prob, label_offset=0.1):
             fontsize=14, color=color, fontweight='bold',
             bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor=color, alpha=0.8))
 
-# Construir el árbol completo
-nodes = {}  # (step, index) -> (x, y, price)
+# Construir el árbol completo con la geometría del motor trinomial:
+# la capa `step` tiene los niveles -step..step y precio S0 * u^nivel
+nodes = {}  # (step, level) -> (x, y, price)
 edges = []  # Lista de aristas para dibujar después
 
 # Paso 0 - centrado en y=3
 center_y = 3
-nodes[(0, 0)] = (0, center_y, S0)
+h = np.log(u)
+
+for step in range(steps + 1):
+    levels = lattice_levels(step)
+    for level, price in zip(levels, node_prices(S0, h, levels)):
+        nodes[(step, level)] = (step, center_y + level, price)
 
-# Generar todos los nodos primero
+# Cada nodo se conecta con los niveles level+1 (u), level (m) y level-1 (d)
 for step in range(steps):
-    # Obtener todos los nodos del paso actual
-    current_step_nodes = [(idx, data) for (s, idx), data in nodes.items() if s == step]
-    
-    for idx, (x_curr, y_curr, price_curr) in current_step_nodes:
+    for level in lattice_levels(step):
+        x_curr, y_curr, _ = nodes[(step, level)]
         x_next = step + 1
-        
-        # Nodo superior (up)
-        idx_up = idx + 1
-        y_up = y_curr + 1
-        price_up = price_curr * u
-        if (step + 1, idx_up) not in nodes:
-            nodes[(step + 1, idx_up)] = (x_next, y_up, price_up)
-        edges.append((x_curr, y_curr, x_next, y_up, color_up, p_u, 0.15))
-        
-        # Nodo medio (middle)
-        idx_mid = idx
-        y_mid = y_curr
-        price_mid = price_curr * m
-        if (step + 1, idx_mid) not in nodes:
-            nodes[(step + 1, idx_mid)] = (x_next, y_mid, price_mid)
-        edges.append((x_curr, y_curr, x_next, y_mid, color_mid, p_m, -0.15))
-        
-        # Nodo inferior (down) - SIN restricción de idx >= 0
-        idx_down = idx - 1
-        y_down = y_curr - 1
-        price_down = price_curr * d
-        if (step + 1, idx_down) not in nodes:
-            nodes[(step + 1, idx_down)] = (x_next, y_down, price_down)
-        edges.append((x_curr, y_curr, x_next, y_down, color_down, p_d, 0.15))
+        edges.append((x_curr, y_curr, x_next, y_curr + 1, color_up, p_u, 0.15))
+        edges.append((x_curr, y_curr, x_next, y_curr, color_mid, p_m, -0.15))
+        edges.append((x_curr, y_curr, x_next, y_curr - 1, color_down, p_d, 0.15))
 
 # Dibujar todas las aristas primero
 for x1, y1, x2, y2, color, prob, offset in edges:
@@ -111,7 +104,7 @@ ax.text(3.2, 6, f'd = {d:.3f}', fontsize=16, bbox=dict(boxstyle='round', facecol
 ax.text(3.2, 5.5, f'm = {m:.3f}', fontsize=16, bbox=dict(boxstyle='round', facecolor='wheat'))
 
 plt.tight_layout()
-plt.savefig('../../../code/03_metodos_valoracion/figures/trinomial_tree_structure.png', 
+plt.savefig(os.path.join(FIGURES, 'trinomial_tree_structure.png'),
             dpi=300, bbox_inches='tight', facecolor='white')
 print("Figura 1 guardada: trinomial_tree_structure.png")
 plt.close()
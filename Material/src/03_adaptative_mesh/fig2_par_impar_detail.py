@@ -1,6 +1,20 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.stats import norm
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import black_scholes
+from pricing.store import ResultStore
+
+# Carpeta de figuras de la tesis, independiente del directorio de trabajo
+FIGURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'code',
+                       '03_metodos_valoracion', 'figures')
+
+# Precios ya calculados en corridas anteriores (ver pricing.store)
+STORE = ResultStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks',
+                                 'results', 'store'))
 
 # Parámetros de la opción (mismo caso que fig2a)
 S0 = 100.0
@@ -11,40 +25,14 @@ sigma = 0.2
 option_type = 'put'
 
 # Valor teórico Black-Scholes
-def black_scholes_put(S, K, T, r, sigma):
-    d1 = (np.log(S/K) + (r + 0.5*sigma**2)*T) / (sigma*np.sqrt(T))
-    d2 = d1 - sigma*np.sqrt(T)
-    return K*np.exp(-r*T)*norm.cdf(-d2) - S*norm.cdf(-d1)
-
-BS_value = black_scholes_put(S0, K, T, r, sigma)
-
-# Modelo Binomial
-def binomial_tree(S0, K, T, r, sigma, N, option_type='put'):
-    dt = T / N
-    u = np.exp(sigma * np.sqrt(dt))
-    d = 1 / u
-    p = (np.exp(r * dt) - d) / (u - d)
-    
-    ST = np.array([S0 * (u**j) * (d**(N-j)) for j in range(N+1)])
-    
-    if option_type == 'put':
-        V = np.maximum(K - ST, 0)
-    else:
-        V = np.maximum(ST - K, 0)
-    
-    for i in range(N-1, -1, -1):
-        V = np.exp(-r * dt) * (p * V[1:] + (1-p) * V[:-1])
-    
-    return V[0]
+BS_value = black_scholes(S0, K, T, r, sigma, option_type)
 
 # Calcular errores para rango más detallado
 N_values = np.arange(10, 101, 1)  # Paso de 1 para ver bien el efecto
-errors_binomial = []
 
 print("Calculando efecto par-impar...")
-for N in N_values:
-    val_bin = binomial_tree(S0, K, T, r, sigma, N, option_type)
-    errors_binomial.append(abs(val_bin - BS_value))
+errors_binomial = np.abs(STORE.price(S0, K, T, r, sigma, N_values, option_type,
+                                      engine='binomial') - BS_value)
 
 # Separar pares e impares
 N_par = N_values[N_values % 2 == 0]
@@ -113,7 +101,7 @@ ax.text(0.02, 0.98, textstr, transform=ax.transAxes, fontsize=10,
         verticalalignment='top', bbox=props, fontweight='bold')
 
 plt.tight_layout()
-plt.savefig('../../../code/03_metodos_valoracion/figures/par_impar_detail.png', 
+plt.savefig(os.path.join(FIGURES, 'par_impar_detail.png'),
             dpi=300, bbox_inches='tight', facecolor='white')
 print("Figura 2b guardada: par_impar_detail.png")
 plt.close()
@@ -1,7 +1,18 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import band_nodes
+from pricing.trinomial import lattice_levels, node_prices
+
+# Carpeta de figuras de la tesis, independiente del directorio de trabajo
+FIGURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'code',
+                       '03_metodos_valoracion', 'figures')
+
 fig, ax = plt.subplots(figsize=(14, 10))
 
 # Parámetros del árbol
@@ -20,43 +31,23 @@ critical_time_end = 6
 def price_to_y(price_level):
     return price_level * h_price
 
-# Construir árbol trinomial
+# Construir árbol trinomial con la geometría del motor trinomial:
+# la capa `step` tiene los niveles -step..step y precio S0 * u^nivel
 nodes = {}  # (step, price_level) -> (x, y, price)
 edges = []
 
-# Nodo inicial
-nodes[(0, 0)] = (0, price_to_y(0), S0)
+for step in range(steps + 1):
+    levels = lattice_levels(step)
+    for level, price in zip(levels, node_prices(S0, np.log(u), levels)):
+        nodes[(step, level)] = (step, price_to_y(level), price)
 
-# Generar árbol trinomial
+# Cada nodo se conecta con los niveles level+1 (u), level (m) y level-1 (d)
 for step in range(steps):
-    current_nodes = [(level, data) for (s, level), data in nodes.items() if s == step]
-    
-    for level, (x_curr, y_curr, price_curr) in current_nodes:
-        x_next = step + 1
-        
-        # Movimiento arriba (up)
-        level_up = level + 1
-        y_up = price_to_y(level_up)
-        price_up = price_curr * u
-        if (step + 1, level_up) not in nodes:
-            nodes[(step + 1, level_up)] = (x_next, y_up, price_up)
-        edges.append((x_curr, y_curr, x_next, y_up, '#2ecc71', 0.8))
-        
-        # Movimiento medio (middle)
-        level_mid = level
-        y_mid = price_to_y(level_mid)
-        price_mid = price_curr
-        if (step + 1, level_mid) not in nodes:
-            nodes[(step + 1, level_mid)] = (x_next, y_mid, price_mid)
-        edges.append((x_curr, y_curr, x_next, y_mid, '#3498db', 0.8))
-        
-        # Movimiento abajo (down)
-        level_down = level - 1
-        y_down = price_to_y(level_down)
-        price_down = price_curr * d
-        if (step + 1, level_down) not in nodes:
-            nodes[(step + 1, level_down)] = (x_next, y_down, price_down)
-        edges.append((x_curr, y_curr, x_next, y_down, '#e74c3c', 0.8))
+    for level in lattice_levels(step):
+        x_curr, y_curr, _ = nodes[(step, level)]
+        edges.append((x_curr, y_curr, step + 1, price_to_y(level + 1), '#2ecc71', 0.8))
+        edges.append((x_curr, y_curr, step + 1, price_to_y(level), '#3498db', 0.8))
+        edges.append((x_curr, y_curr, step + 1, price_to_y(level - 1), '#e74c3c', 0.8))
 
 # Dibujar aristas del árbol (malla gruesa)
 for x1, y1, x2, y2, color, alpha in edges:
@@ -85,14 +76,10 @@ for (step, level), (x, y, price) in nodes.items():
               edgecolors=edgecolor, linewidths=linewidth)
 
 # Dibujar malla fina en región crítica
-fine_mesh_nodes = []
-for t in np.arange(critical_time_start, critical_time_end + 0.25, 0.25):
-    for p in np.arange(critical_price_center - 2, critical_price_center + 2 + 0.25, 0.5):
-        x = t
-        y = price_to_y(p)
-        fine_mesh_nodes.append((x, y))
-        ax.scatter(x, y, s=20, color='#2ecc71', alpha=0.9, zorder=4, 
-                  marker='s', edgecolors='darkgreen', linewidths=0.5)
+fine_t, fine_level = band_nodes(critical_time_start, critical_time_end,
+                                critical_price_center - 2, critical_price_center + 2)
+ax.scatter(fine_t, price_to_y(fine_level), s=20, color='#2ecc71', alpha=0.9, zorder=4,
+           marker='s', edgecolors='darkgreen', linewidths=0.5)
 
 # Destacar región crítica con rectángulo
 rect_x = critical_time_start - 0.3
@@ -174,7 +161,7 @@ ax.text(0.98, 0.98, textstr, transform=ax.transAxes, fontsize=10,
         verticalalignment='top', horizontalalignment='right', bbox=props)
 
 plt.tight_layout()
-plt.savefig('../../../code/03_metodos_valoracion/figures/amm_concept.png', 
+plt.savefig(os.path.join(FIGURES, 'amm_concept.png'),
             dpi=300, bbox_inches='tight', facecolor='white')
 print("Figura 3 guardada: amm_concept.png")
 plt.close()
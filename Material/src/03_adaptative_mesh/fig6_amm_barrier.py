@@ -1,6 +1,16 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import band_nodes
+from pricing.trinomial import lattice_levels
+
+# Carpeta de figuras de la tesis, independiente del directorio de trabajo
+FIGURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'code',
+                       '03_metodos_valoracion', 'figures')
 
 fig, ax = plt.subplots(figsize=(14, 10))
 
@@ -11,41 +21,23 @@ S0 = 10.5  # Precio inicial cerca de la barrera
 h = 1.0  # Paso de precio
 k = 1.0  # Paso de tiempo
 
-# Construir árbol trinomial
+# Nodo inicial en nivel de precio cercano a la barrera
+initial_level = S0
+
+# Construir árbol trinomial con la geometría del motor trinomial
 nodes = {}  # (step, price_level) -> (x, y)
 edges = []
 
-# Nodo inicial en nivel de precio cercano a la barrera
-initial_level = S0
-nodes[(0, initial_level)] = (0, initial_level * h)
+for step in range(time_steps + 1):
+    for level in lattice_levels(step, center=initial_level):
+        nodes[(step, level)] = (step, level * h)
 
-# Generar árbol trinomial
+# Cada nodo se conecta con los niveles level+1, level y level-1 del paso siguiente
 for step in range(time_steps):
-    current_nodes = [(level, data) for (s, level), data in nodes.items() if s == step]
-    
-    for level, (x_curr, y_curr) in current_nodes:
-        x_next = step + 1
-        
-        # Movimiento arriba (up)
-        level_up = level + 1
-        y_up = level_up * h
-        if (step + 1, level_up) not in nodes:
-            nodes[(step + 1, level_up)] = (x_next, y_up)
-        edges.append((x_curr, y_curr, x_next, y_up))
-        
-        # Movimiento medio (middle)
-        level_mid = level
-        y_mid = level_mid * h
-        if (step + 1, level_mid) not in nodes:
-            nodes[(step + 1, level_mid)] = (x_next, y_mid)
-        edges.append((x_curr, y_curr, x_next, y_mid))
-        
-        # Movimiento abajo (down)
-        level_down = level - 1
-        y_down = level_down * h
-        if (step + 1, level_down) not in nodes:
-            nodes[(step + 1, level_down)] = (x_next, y_down)
-        edges.append((x_curr, y_curr, x_next, y_down))
+    for level in lattice_levels(step, center=initial_level):
+        x_curr, y_curr = nodes[(step, level)]
+        for level_next in (level + 1, level, level - 1):
+            edges.append((x_curr, y_curr, step + 1, level_next * h))
 
 # Dibujar aristas del árbol trinomial (malla gruesa)
 for x1, y1, x2, y2 in edges:
@@ -73,12 +65,9 @@ for (step, level), (x, y) in nodes.items():
               edgecolors=edgecolor, linewidths=linewidth)
 
 # Dibujar malla fina en región crítica (banda alrededor de H [H-2h, H+2h], todo el tiempo)
-for t in np.arange(0, time_steps + 0.25, 0.25):
-    for p in np.arange(H - 2.0, H + 2.0 + 0.25, 0.5):
-        x = t
-        y = p
-        ax.scatter(x, y, s=25, color='#2ecc71', alpha=0.9, zorder=4, 
-                  marker='s', edgecolors='darkgreen', linewidths=0.5)
+fine_t, fine_level = band_nodes(0, time_steps, (H - 2.0) / h, (H + 2.0) / h)
+ax.scatter(fine_t * k, fine_level * h, s=25, color='#2ecc71', alpha=0.9, zorder=4,
+           marker='s', edgecolors='darkgreen', linewidths=0.5)
 
 # Línea de la barrera H
 ax.axhline(y=H, color='#3498db', linewidth=4, linestyle='-', 
@@ -160,7 +149,7 @@ ax.text(0.75, 0.1, textstr, transform=ax.transAxes, fontsize=10,
         verticalalignment='top', bbox=props)
 
 plt.tight_layout()
-plt.savefig('../../code/03_metodos_valoracion/figures/amm_barrier.png', 
+plt.savefig(os.path.join(FIGURES, 'amm_barrier.png'),
             dpi=300, bbox_inches='tight', facecolor='white')
 print("Figura 6 guardada: amm_barrier.png")
 plt.close()
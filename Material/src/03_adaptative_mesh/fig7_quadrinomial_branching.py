@@ -1,7 +1,17 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.trinomial import lattice_levels
+
+# Carpeta de figuras de la tesis, independiente del directorio de trabajo
+FIGURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'code',
+                       '03_metodos_valoracion', 'figures')
+
 fig, ax = plt.subplots(figsize=(14, 10))
 
 # Parámetros del árbol trinomial
@@ -9,41 +19,23 @@ time_steps = 2
 h = 1.0  # Paso de precio
 k = 1.0  # Paso de tiempo
 
-# Construir árbol trinomial de 2 pasos
+# Nodo inicial en nivel de precio 0
+initial_level = 0
+
+# Construir árbol trinomial de 2 pasos con la geometría del motor trinomial
 nodes = {}  # (step, price_level) -> (x, y)
 edges = []
 
-# Nodo inicial en nivel de precio 0
-initial_level = 0
-nodes[(0, initial_level)] = (0, initial_level * h)
+for step in range(time_steps + 1):
+    for level in lattice_levels(step, center=initial_level):
+        nodes[(step, level)] = (step, level * h)
 
-# Generar árbol trinomial
+# Cada nodo se conecta con los niveles level+1, level y level-1 del paso siguiente
 for step in range(time_steps):
-    current_nodes = [(level, data) for (s, level), data in nodes.items() if s == step]
-    
-    for level, (x_curr, y_curr) in current_nodes:
-        x_next = step + 1
-        
-        # Movimiento arriba (up)
-        level_up = level + 1
-        y_up = level_up * h
-        if (step + 1, level_up) not in nodes:
-            nodes[(step + 1, level_up)] = (x_next, y_up)
-        edges.append((x_curr, y_curr, x_next, y_up))
-        
-        # Movimiento medio (middle)
-        level_mid = level
-        y_mid = level_mid * h
-        if (step + 1, level_mid) not in nodes:
-            nodes[(step + 1, level_mid)] = (x_next, y_mid)
-        edges.append((x_curr, y_curr, x_next, y_mid))
-        
-        # Movimiento abajo (down)
-        level_down = level - 1
-        y_down = level_down * h
-        if (step + 1, level_down) not in nodes:
-            nodes[(step + 1, level_down)] = (x_next, y_down)
-        edges.append((x_curr, y_curr, x_next, y_down))
+    for level in lattice_levels(step, center=initial_level):
+        x_curr, y_curr = nodes[(step, level)]
+        for level_next in (level + 1, level, level - 1):
+            edges.append((x_curr, y_curr, step + 1, level_next * h))
 
 # Dibujar aristas del árbol trinomial
 for x1, y1, x2, y2 in edges:
@@ -268,7 +260,7 @@ ax.legend(handles=legend_elements, loc='upper left', fontsize=10, framealpha=0.9
          bbox_to_anchor=(0.75, 0.99), edgecolor='black', fancybox=True)
 
 plt.tight_layout()
-plt.savefig('../../code/03_metodos_valoracion/figures/quadrinomial_branching.png', 
+plt.savefig(os.path.join(FIGURES, 'quadrinomial_branching.png'),
             dpi=300, bbox_inches='tight', facecolor='white')
 print("Figura 7 guardada: quadrinomial_branching.png")
 plt.close()
@@ -1,34 +1,218 @@
+"""Construcción de las figuras y resultados en paralelo, saltando lo que no cambió
+
+Uso (desde cualquier directorio):
+
+    python 03_adaptative_mesh/index.py [objetivos ...] [--force] [--jobs J] [--benchmarks]
+
+Los objetivos son los scripts fig*.py de este directorio y los benchmarks que
+escriben en benchmarks/results (con --benchmarks, todos los bench_*.py). Las
+salidas y entradas de cada script se leen de su código, y un objetivo que lee
+la salida de otro corre después de él. Los scripts arman sus rutas desde
+__file__: guardan las figuras con savefig(os.path.join(FIGURES, nombre)), con
+FIGURES la carpeta de figuras de la tesis, escriben sus tablas en
+benchmarks/results y las leen con open(os.path.join(RESULTS, nombre)).
+
+Cada objetivo se ejecuta con runpy en un proceso de un pool cuyos workers ya
+importaron matplotlib, numpy, scipy y pricing, con src como directorio de
+trabajo. Un objetivo se salta si existen sus salidas y no cambió el hash de su
+código, de los módulos de pricing que importa (transitivamente) ni de sus
+entradas; los hashes de la última corrida exitosa se guardan en STATE.
+"""
+import argparse
+import contextlib
+import fnmatch
+import glob
+import hashlib
+import io
+import json
 import os
+import re
+import runpy
 import sys
-import subprocess
-
-figures_dir = '../../code/03_metodos_valoracion/figures'
-os.makedirs(figures_dir, exist_ok=True)
-
-scripts = [
-    'fig1_trinomial_tree.py',
-    'fig2_par_impar_convergence.py',
-    'fig3_amm_concept.py',
-    'fig4_amm_vanilla.py',
-    'fig5_jagged_convergence.py',
-    'fig6_amm_barrier.py',
-    'fig7_quadrinomial_branching.py',
-    'fig8_rmse_vs_time.py'
-]
-
-for i, script in enumerate(scripts, 1):
-    print(f"[{i}/{len(scripts)}] Ejecutando {script}...")
-    try:
-        result = subprocess.run([sys.executable, f"03_adaptative_mesh/{script}"], 
-                              capture_output=True, text=True, check=True)
-        print(result.stdout)
-        if result.stderr:
-            print(f"  Warns: {result.stderr}")
-    except subprocess.CalledProcessError as e:
-        print(f"  ERROR executing {script}:")
-        print(f"  {e.stderr}")
-        continue
-    except FileNotFoundError:
-        print(f"  ERROR: file {script} not found")
-        continue
-    print()
+import time
+import traceback
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE = os.path.join(SRC, '.build_state.json')
+
+# Carpeta FIGURES de los scripts, relativa a src
+FIGURES = os.path.join('..', '..', 'code', '03_metodos_valoracion', 'figures')
+
+_FIGURE = re.compile(r"savefig\(\s*os\.path\.join\(FIGURES,\s*'([^']+)'")
+_RESULT = re.compile(r"'results',\s*'([^']+)'")
+_READ = re.compile(r"open\(\s*os\.path\.join\(RESULTS,\s*'([^']+)'")
+_IMPORT = re.compile(r"^\s*(?:from|import)\s+pricing(?:\.(\w+))?(?:\s+import\s+([\w, ]+))?",
+                     re.MULTILINE)
+
+
+def find_targets(benchmarks=False):
+    """{script: (salidas, entradas)} con rutas relativas a src"""
+    targets = {}
+    scripts = sorted(glob.glob(os.path.join(SRC, '03_adaptative_mesh', 'fig*.py')))
+    scripts += sorted(glob.glob(os.path.join(SRC, 'benchmarks', 'bench_*.py')))
+    for path in scripts:
+        with open(path) as f:
+            code = f.read()
+        outputs = [os.path.join(FIGURES, p) for p in _FIGURE.findall(code)]
+        outputs += [os.path.join('benchmarks', 'results', p) for p in _RESULT.findall(code)]
+        if os.path.basename(path).startswith('bench_') and not (benchmarks or outputs):
+            continue
+        inputs = [os.path.join('benchmarks', 'results', p) for p in _READ.findall(code)]
+        targets[os.path.relpath(path, SRC)] = (outputs, inputs)
+    return targets
+
+
+def pricing_modules(path, seen=None):
+    """Módulos de pricing que importa el archivo path, transitivamente"""
+    seen = set() if seen is None else seen
+    with open(path) as f:
+        code = f.read()
+    for module, names in _IMPORT.findall(code):
+        # `from pricing import a, b` importa el paquete y, por __init__, sus módulos
+        for name in [module] if module else ['__init__'] + [n.strip() for n in names.split(',')]:
+            source = os.path.join(SRC, 'pricing', f'{name}.py')
+            if name and source not in seen and os.path.exists(source):
+                seen.add(source)
+                pricing_modules(source, seen)
+    return seen
+
+
+def target_hash(script, inputs):
+    """Hash del script, de los módulos de pricing que usa y de sus entradas"""
+    digest = hashlib.sha256()
+    path = os.path.join(SRC, script)
+    for dependency in [path, *sorted(pricing_modules(path)),
+                       *(os.path.join(SRC, p) for p in inputs)]:
+        digest.update(os.path.relpath(dependency, SRC).encode())
+        if os.path.exists(dependency):
+            with open(dependency, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _prepare_worker():
+    """Inicializador del pool: importa lo pesado una vez por worker"""
+    os.chdir(SRC)
+    sys.path.insert(0, SRC)
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+    import numpy  # noqa: F401
+    import scipy.interpolate  # noqa: F401
+    import scipy.special  # noqa: F401
+    import pricing  # noqa: F401
+
+
+def run_target(script):
+    """Ejecuta un objetivo en el worker: (ok, stdout, avisos y errores, segundos)"""
+    import matplotlib.pyplot as plt
+    out, err = io.StringIO(), io.StringIO()
+    start = time.perf_counter()
+    ok = True
+    argv = sys.argv
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err), \
+            warnings.catch_warnings():
+        warnings.simplefilter('default')
+        sys.argv = [script]
+        try:
+            runpy.run_path(script, run_name='__main__')
+        except BaseException:  # SystemExit incluido: el worker debe seguir vivo
+            ok = False
+            traceback.print_exc()
+        finally:
+            sys.argv = argv
+            plt.close('all')
+    return ok, out.getvalue(), err.getvalue(), time.perf_counter() - start
+
+
+def _ready(pending, running):
+    """Objetivos pendientes sin dependencias pendientes ni en ejecución"""
+    busy = set(pending) | {script for script, _ in running.values()}
+    return [script for script, deps in pending.items() if not deps & busy]
+
+
+def build(names=(), force=False, jobs=None, benchmarks=False):
+    """Construye los objetivos (todos, o los que coinciden con names) y devuelve los fallidos"""
+    targets = find_targets(benchmarks)
+    if names:
+        targets = {script: io_ for script, io_ in targets.items()
+                   if any(fnmatch.fnmatch(os.path.basename(script), pattern)
+                          or fnmatch.fnmatch(script, pattern) for pattern in names)}
+    producers = {output: script for script, (outputs, _) in targets.items()
+                 for output in outputs}
+    needs = {script: {producers[p] for p in inputs if p in producers}
+             for script, (_, inputs) in targets.items()}
+
+    state = {}
+    if os.path.exists(STATE):
+        with open(STATE) as f:
+            state = json.load(f)
+    for script, (outputs, _) in targets.items():
+        for output in outputs:
+            os.makedirs(os.path.join(SRC, os.path.dirname(output)), exist_ok=True)
+
+    pending, running, failed = dict(needs), {}, []
+    done = 0
+    with ProcessPoolExecutor(jobs, initializer=_prepare_worker) as pool:
+        while pending or running:
+            ready = _ready(pending, running)
+            while ready:
+                script = ready.pop(0)
+                del pending[script]
+                if needs[script] & set(failed):
+                    failed.append(script)
+                    done += 1
+                    print(f"[{done}/{len(targets)}] {script}: omitido, falló una dependencia")
+                else:
+                    outputs, inputs = targets[script]
+                    key = target_hash(script, inputs)
+                    built = all(os.path.exists(os.path.join(SRC, p)) for p in outputs)
+                    if force or not built or state.get(script) != key:
+                        running[pool.submit(run_target, script)] = script, key
+                        continue
+                    done += 1
+                    print(f"[{done}/{len(targets)}] {script}: sin cambios")
+                if not ready:
+                    # Lo omitido o sin cambios puede liberar a quienes dependían de ello
+                    ready = _ready(pending, running)
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Dependencias circulares entre {sorted(pending)}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                script, key = running.pop(future)
+                ok, out, err, elapsed = future.result()
+                done += 1
+                print(f"[{done}/{len(targets)}] {script}: "
+                      f"{'listo' if ok else 'ERROR'} ({elapsed:.1f} s)")
+                if out.strip():
+                    print('  ' + out.strip().replace('\n', '\n  '))
+                if err.strip():
+                    print(f"  {'Avisos' if ok else 'Error'}:")
+                    print('  ' + err.strip().replace('\n', '\n  '))
+                if ok:
+                    state[script] = key
+                else:
+                    failed.append(script)
+                    state.pop(script, None)
+                with open(STATE, 'w') as f:
+                    json.dump(state, f, indent=1, sort_keys=True)
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('targets', nargs='*', help="scripts a construir (admite comodines)")
+    parser.add_argument('--force', action='store_true', help="reconstruir aunque no haya cambios")
+    parser.add_argument('--jobs', type=int, default=None, help="procesos (por defecto, núcleos)")
+    parser.add_argument('--benchmarks', action='store_true',
+                        help="incluir todos los benchmarks, no sólo los que escriben resultados")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    failed = build(args.targets, args.force, args.jobs, args.benchmarks)
+    print(f"\nTiempo total: {time.perf_counter() - start:.1f} s"
+          + (f", {len(failed)} con errores" if failed else ""))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.closed_form import reiner_rubinstein
+from pricing.trinomial import trinomial_tree
+
+# Precisión contra tiempo con S0 muy cerca de la barrera (problema del límite):
+# down-and-out call contra Reiner-Rubinstein. El trinomial sólo puede ubicar
+# la barrera con σ√Δt <= |ln(S0/H)|, así que necesita N grande; el AMM pone la
+# barrera y S0 sobre nodos de la banda fina con el árbol grueso de N pasos
+S0, K, T, r, sigma = 100.0, 100.0, 1.0, 0.05, 0.25
+BARRIERS = [99.5, 99.0, 97.0]
+STEPS = [25, 50, 100, 250, 1000, 2500]
+ENGINES = {
+    'Trinomial': lambda N, **c: trinomial_tree(S0, K, T, r, sigma, N, **c),
+    'AMM (2,0)': lambda N, **c: amm_price(S0, K, T, r, sigma, N, levels=(2, 0), **c),
+    'AMM (3,0)': lambda N, **c: amm_price(S0, K, T, r, sigma, N, levels=(3, 0), **c),
+    'AMM (4,0)': lambda N, **c: amm_price(S0, K, T, r, sigma, N, levels=(4, 0), **c),
+}
+TOLERANCE = 1e-4
+
+
+def timed(pricer, *args, repeat=5, **kwargs):
+    """Precio y mejor tiempo de `repeat` ejecuciones"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        price = pricer(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return price, best
+
+
+# Primera llamada fuera de la medición (compila los núcleos de pricing.kernels)
+for engine in ENGINES.values():
+    engine(1000, option_type='call', H=90.0, barrier_type='down-and-out')
+
+for H in BARRIERS:
+    contract = dict(option_type='call', H=H, barrier_type='down-and-out')
+    reference = reiner_rubinstein(S0, K, T, r, sigma, H, 'down-and-out', 'call')
+    print(f"H = {H} (Reiner-Rubinstein: {reference:.6f})")
+    print(f"  {'Modelo':<12} {'N':>6} {'Error':>10} {'Tiempo (ms)':>12}")
+    fastest = {}
+    for name, engine in ENGINES.items():
+        within = []
+        for N in STEPS:
+            try:
+                price, elapsed = timed(engine, N, **contract)
+            except ValueError:
+                print(f"  {name:<12} {N:>6} {'no ubica H':>10} {'-':>12}")
+                within = []
+                continue
+            error = price - reference
+            print(f"  {name:<12} {N:>6} {error:>10.2e} {1000 * elapsed:>12.2f}")
+            # Menor N desde el cual el error ya no sale de la tolerancia
+            within = within + [(N, elapsed)] if abs(error) <= TOLERANCE else []
+        if within:
+            fastest[name] = within[0]
+    print(f"  Tiempo hasta |error| <= {TOLERANCE:.0e} en adelante: " + ", ".join(
+        f"{name} {1000 * elapsed:.1f} ms (N={N})" for name, (N, elapsed) in fastest.items()))
+    print()
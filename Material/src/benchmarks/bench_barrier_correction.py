@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.closed_form import reiner_rubinstein
+from pricing.monte_carlo import Z_95, monte_carlo_price
+from pricing.trinomial import trinomial_tree
+
+S0, K, T, r, sigma, H = 100.0, 100.0, 1.0, 0.05, 0.2, 95.0
+contract = dict(option_type='call', H=H, barrier_type='down-and-out')
+N_PATHS = 200_000
+
+# 1) Barrera continua por Monte Carlo: monitoreo en los N puntos vs puente browniano
+reference = reiner_rubinstein(S0, K, T, r, sigma, H, 'down-and-out', 'call')
+print(f"Barrera continua, referencia Reiner-Rubinstein: {reference:.5f}")
+print(f"{'N':>6} {'Sesgo discreto':>15} {'Sesgo puente':>13} {'IC 95%':>8} "
+      f"{'Tiempo discreto (s)':>20} {'Tiempo puente (s)':>18}")
+for N in [5, 10, 25, 50, 250, 1000]:
+    start = time.perf_counter()
+    plain = monte_carlo_price(S0, K, T, r, sigma, N, n_paths=N_PATHS, seed=0, **contract)
+    plain_time = time.perf_counter() - start
+    start = time.perf_counter()
+    bridge = monte_carlo_price(S0, K, T, r, sigma, N, bridge=True, n_paths=N_PATHS, seed=0,
+                               **contract)
+    bridge_time = time.perf_counter() - start
+    print(f"{N:>6} {plain.price - reference:>15.4f} {bridge.price - reference:>13.4f} "
+          f"{Z_95 * bridge.std_error:>8.4f} {plain_time:>20.2f} {bridge_time:>18.2f}")
+
+# 2) Monitoreo diario (250 fechas) con retículos gruesos y corrección BGK
+MONITORING = 250
+dt_monitoring = T / MONITORING
+discrete = monte_carlo_price(S0, K, T, r, sigma, MONITORING, n_paths=2_000_000, seed=1, **contract)
+print(f"\nMonitoreo diario, referencia Monte Carlo con {MONITORING} pasos: "
+      f"{discrete.price:.5f} ± {Z_95 * discrete.std_error:.5f}")
+print(f"{'Modelo':<22} {'N':>5} {'Sin BGK':>10} {'Con BGK':>10} {'Tiempo (ms)':>12}")
+bgk = reiner_rubinstein(S0, K, T, r, sigma, H, 'down-and-out', 'call', monitoring_dt=dt_monitoring)
+print(f"{'Reiner-Rubinstein':<22} {'-':>5} {reference - discrete.price:>10.4f} "
+      f"{bgk - discrete.price:>10.4f} {'-':>12}")
+for name, pricer in [('Trinomial', trinomial_tree),
+                     ('AMM (2,2)', lambda *a, **k: amm_price(*a, levels=(2, 2), **k))]:
+    for N in [25, 50, 100]:
+        plain = pricer(S0, K, T, r, sigma, N, **contract)
+        start = time.perf_counter()
+        shifted = pricer(S0, K, T, r, sigma, N, monitoring_dt=dt_monitoring, **contract)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22} {N:>5} {plain - discrete.price:>10.4f} {shifted - discrete.price:>10.4f} "
+              f"{1000 * elapsed:>12.2f}")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_schedule_price
+from pricing.closed_form import kunitomo_ikeda
+from pricing.trinomial import trinomial_schedule
+
+S0, T, r, sigma = 100.0, 1.0, 0.05, 0.2
+K = np.array([90.0, 100.0, 110.0])
+
+engines = {
+    'Trinomial': lambda N, **c: trinomial_schedule(S0, K, T, r, sigma, N, **c),
+    **{f'AMM nivel {level}': (lambda N, level=level, **c:
+                              amm_schedule_price(S0, K, T, r, sigma, N, level=level, **c))
+       for level in range(4)},
+}
+
+# Doble knock-out constante contra la serie de Kunitomo-Ikeda (error máximo sobre los strikes).
+# L y U quedan sobre nodos gruesos (schedule_spacing), así que el error es el
+# O(k) del paso grueso y no baja con el nivel de las bandas
+L, U = 80.0, 125.0
+for option_type in ['call', 'put']:
+    reference = kunitomo_ikeda(S0, K, T, r, sigma, L, U, 'knock-out', option_type)
+    print(f"Doble knock-out {option_type} L={L:g} U={U:g}")
+    print(f"  {'Modelo':<14} {'N':>5} {'Error máx.':>11} {'Tiempo (ms)':>12}")
+    for name, engine in engines.items():
+        for N in [100, 200, 400, 800]:
+            start = time.perf_counter()
+            price = engine(N, option_type=option_type, lower=L, upper=U)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<14} {N:>5} {np.max(np.abs(price - reference)):>11.2e} "
+                  f"{1000 * elapsed:>12.2f}")
+    print()
+
+# Barreras escalonadas: sin fórmula cerrada, se muestra la convergencia en N.
+# Sólo 92 y 118 quedan sobre nodos; 85, 125 y 130 se redondean al nodo tocado
+# y el trinomial oscila con N (error O(h)); las bandas los ubican y el AMM
+# (nivel >= 1) no oscila así
+lower = ((0.5,), (85.0, 92.0))
+upper = ((0.25, 0.75), (125.0, 118.0, 130.0))
+for option_type in ['call', 'put']:
+    print(f"Doble knock-out escalonado {option_type}, K = {', '.join(f'{k:g}' for k in K)}")
+    print(f"  {'Modelo':<14} {'N':>5} {'Precios':>30} {'Tiempo (ms)':>12}")
+    for name, engine in engines.items():
+        for N in [100, 200, 400, 800, 1600]:
+            start = time.perf_counter()
+            price = engine(N, option_type=option_type, lower=lower, upper=upper)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<14} {N:>5} {' '.join(f'{p:9.5f}' for p in price):>30} "
+                  f"{1000 * elapsed:>12.2f}")
+    print()
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.binomial import binomial_batch
+
+
+# Implementación anterior (un árbol por llamada), como referencia de throughput
+def binomial_tree_loop(S0, K, T, r, sigma, N, option_type='put'):
+    dt = T / N
+    u = np.exp(sigma * np.sqrt(dt))
+    d = 1 / u
+    p = (np.exp(r * dt) - d) / (u - d)
+
+    ST = np.array([S0 * (u**j) * (d**(N-j)) for j in range(N+1)])
+
+    if option_type == 'put':
+        V = np.maximum(K - ST, 0)
+    else:
+        V = np.maximum(ST - K, 0)
+
+    for i in range(N-1, -1, -1):
+        V = np.exp(-r * dt) * (p * V[1:] + (1-p) * V[:-1])
+
+    return V[0]
+
+
+# Barrido de convergencia: contratos aleatorios x N en [10, 100] (como fig2)
+rng = np.random.default_rng(2024)
+n_contracts = 40
+N_values = np.arange(10, 101)
+
+S0 = np.repeat(rng.uniform(80, 120, n_contracts), len(N_values))
+K = np.repeat(rng.uniform(80, 120, n_contracts), len(N_values))
+T = np.repeat(rng.uniform(0.25, 2.0, n_contracts), len(N_values))
+r = np.repeat(rng.uniform(0.0, 0.08, n_contracts), len(N_values))
+sigma = np.repeat(rng.uniform(0.1, 0.5, n_contracts), len(N_values))
+N = np.tile(N_values, n_contracts)
+option_type = np.repeat(np.where(rng.random(n_contracts) < 0.5, 'call', 'put'), len(N_values))
+n_total = len(N)
+
+start = time.perf_counter()
+loop_values = np.array([binomial_tree_loop(*args) for args in
+                        zip(S0, K, T, r, sigma, N, option_type)])
+time_loop = time.perf_counter() - start
+
+start = time.perf_counter()
+batch_values = binomial_batch(S0, K, T, r, sigma, N, option_type)
+time_batch = time.perf_counter() - start
+
+max_diff = np.max(np.abs(batch_values - loop_values))
+
+print(f"Contratos valorados: {n_total} (N entre {N_values[0]} y {N_values[-1]})")
+print(f"Bucle binomial_tree: {time_loop:.3f} s  ({n_total / time_loop:,.0f} contratos/s)")
+print(f"binomial_batch:      {time_batch:.3f} s  ({n_total / time_batch:,.0f} contratos/s)")
+print(f"Aceleración: {time_loop / time_batch:.1f}x   Diferencia máxima: {max_diff:.2e}")
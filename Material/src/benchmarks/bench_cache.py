@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.binomial import binomial_batch
+from pricing.cache import cache_clear, cache_info
+from pricing.trinomial import trinomial_tree
+
+# Repricing intradía: la misma geometría (σ, r, T, N, H) se vuelve a valorar con
+# otros strikes y rebates; sin caché cada llamada reconstruye todo
+S0, T, r, sigma, H = 100.0, 1.0, 0.05, 0.2, 90.0
+ROUNDS = 20
+rng = np.random.default_rng(5)
+book_K = rng.uniform(85, 115, 200)
+book_N = rng.integers(200, 600, 200)
+
+cases = {
+    'Binomial lote (200)': lambda K: binomial_batch(S0, K, T, r, sigma, book_N, 'call', H,
+                                                    'down-and-out'),
+    'Trinomial N=500': lambda K: trinomial_tree(S0, K[0], T, r, sigma, 500, 'call', H,
+                                                'down-and-out'),
+    'AMM (3,0) N=100': lambda K: amm_price(S0, K[0], T, r, sigma, 100, 'call', H,
+                                           'down-and-out', levels=(3, 0)),
+}
+
+print(f"{ROUNDS} repreciaciones por caso (strikes nuevos en cada una)\n")
+print(f"{'Caso':<22} {'Sin caché (ms)':>15} {'Con caché (ms)':>15} {'Aceleración':>12}  "
+      f"Aciertos/fallos con caché")
+for name, price in cases.items():
+    shifts = np.linspace(-1, 1, ROUNDS)
+    start = time.perf_counter()
+    for shift in shifts:
+        cache_clear()
+        cold = price(book_K + shift)
+    cold_time = (time.perf_counter() - start) / ROUNDS
+    cache_clear()
+    start = time.perf_counter()
+    for shift in shifts:
+        warm = price(book_K + shift)
+    warm_time = (time.perf_counter() - start) / ROUNDS
+    assert np.array_equal(cold, warm)
+    counters = ', '.join(f"{cache} {info.hits}/{info.misses}"
+                         for cache, info in cache_info().items() if info.hits + info.misses)
+    print(f"{name:<22} {1000 * cold_time:>15.2f} {1000 * warm_time:>15.2f} "
+          f"{cold_time / warm_time:>11.1f}x  {counters}")
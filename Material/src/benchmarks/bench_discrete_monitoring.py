@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.binomial import binomial_tree
+from pricing.closed_form import reiner_rubinstein
+from pricing.contracts import monitoring_grid
+from pricing.monte_carlo import Z_95, monte_carlo_price
+from pricing.trinomial import trinomial_tree
+
+# Down-and-out call con calendarios de monitoreo diario, semanal y mensual
+S0, K, T, r, sigma, H = 100.0, 100.0, 1.0, 0.05, 0.2, 95.0
+contract = dict(option_type='call', H=H, barrier_type='down-and-out')
+SCHEDULES = {'Diario': 252, 'Semanal': 52, 'Mensual': 12}
+N_PATHS = 2_000_000
+
+engines = {
+    'Binomial suavizado': lambda N, **c: binomial_tree(S0, K, T, r, sigma, N, smooth=True, **c),
+    'Trinomial': lambda N, **c: trinomial_tree(S0, K, T, r, sigma, N, **c),
+    'AMM (1,1)': lambda N, **c: amm_price(S0, K, T, r, sigma, N, levels=(1, 1), **c),
+}
+
+for schedule, m in SCHEDULES.items():
+    dates = T * np.arange(1, m + 1) / m
+    # Referencia: Monte Carlo exacto en las fechas, con controles vanilla y barrera continua
+    start = time.perf_counter()
+    reference = monte_carlo_price(S0, K, T, r, sigma, m, **contract, monitoring_dates=dates,
+                                  controls=('vanilla', 'barrier'), n_paths=N_PATHS, seed=0)
+    mc_time = time.perf_counter() - start
+    continuous = reiner_rubinstein(S0, K, T, r, sigma, H, 'down-and-out', 'call')
+    bgk = reiner_rubinstein(S0, K, T, r, sigma, H, 'down-and-out', 'call', monitoring_dates=dates)
+    print(f"{schedule} ({m} fechas): Monte Carlo {reference.price:.5f} "
+          f"± {Z_95 * reference.std_error:.5f} ({mc_time:.2f} s)")
+    print(f"  Reiner-Rubinstein continua: error {continuous - reference.price:+.4f}, "
+          f"con BGK: error {bgk - reference.price:+.4f}")
+    print(f"  {'Modelo':<20} {'N':>5} {'N alineado':>11} {'Error fechas':>13} "
+          f"{'Error continua':>15} {'Tiempo (ms)':>12}")
+    for name, engine in engines.items():
+        for N in [100, 250, 500, 1000]:
+            aligned, _ = monitoring_grid(dates, T, N)
+            start = time.perf_counter()
+            price = engine(N, monitoring_dates=dates, **contract)
+            elapsed = time.perf_counter() - start
+            every_step = engine(N, **contract)
+            print(f"  {name:<20} {N:>5} {aligned:>11} {price - reference.price:>+13.4f} "
+                  f"{every_step - reference.price:>+15.4f} {1000 * elapsed:>12.2f}")
+    print()
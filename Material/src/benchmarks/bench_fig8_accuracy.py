@@ -0,0 +1,124 @@
+import csv
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing import kernels
+from pricing.amm import amm_price
+from pricing.binomial import binomial_batch
+from pricing.closed_form import reiner_rubinstein
+from pricing.contracts import BARRIER_TYPES
+from pricing.finite_difference import finite_difference_price
+from pricing.trinomial import trinomial_tree
+
+# Tabla de precisión vs tiempo de la figura 8 medida en este equipo: RMSE de
+# precio, delta y gamma contra Reiner-Rubinstein sobre una grilla fija de
+# contratos. Cada motor da precio, delta y gamma en una sola inducción (greeks=True)
+# o, con diferencias finitas, en una sola resolución. Las barreras quedan a
+# 12-30% de S0, donde el trinomial ya la ubica con N chico y el AMM no es más
+# preciso a igual tiempo; la comparación cerca de la barrera está en bench_amm.py
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'fig8_accuracy.csv')
+STEPS = [25, 100, 250, 1000]
+BUMP = 1e-4  # Δ y Γ de referencia por diferencias centrales con S0 ± BUMP·S0
+N_CONTRACTS = 27
+
+rng = np.random.default_rng(1999)
+S0 = 100.0
+contracts = [
+    dict(K=rng.uniform(85, 115), T=rng.uniform(0.25, 1.0), r=rng.uniform(0.0, 0.08),
+         sigma=rng.uniform(0.15, 0.35), distance=rng.uniform(0.12, 0.30),
+         barrier_type=BARRIER_TYPES[i % 4], option_type=('call', 'put')[(i // 4) % 2])
+    for i in range(N_CONTRACTS)
+]
+for c in contracts:
+    c['H'] = S0 * np.exp(-c['distance'] if c['barrier_type'].startswith('down') else c['distance'])
+
+ENGINES = {
+    'Binomial': None,  # valorado en lote: todos los contratos juntos
+    'Trinomial (0,0)': trinomial_tree,
+    'AMM (1,0)': partial(amm_price, levels=(1, 0)),
+    'AMM (2,0)': partial(amm_price, levels=(2, 0)),
+    'AMM (1,1)': partial(amm_price, levels=(1, 1)),
+    'AMM (2,2)': partial(amm_price, levels=(2, 2)),
+    'AMM (3,3)': partial(amm_price, levels=(3, 3)),
+    'Crank-Nicolson': finite_difference_price,  # N pasos en el tiempo, 2N celdas en S
+}
+SPOTS = S0 * np.array([1 - BUMP, 1.0, 1 + BUMP])
+
+
+def greeks(values):
+    """(precio, delta, gamma) a partir de los precios en S0 - ε, S0, S0 + ε"""
+    down, mid, up = values
+    eps = BUMP * S0
+    return mid, (up - down) / (2 * eps), (up - 2 * mid + down) / eps**2
+
+
+def greeks_grid(name, N):
+    """(precio, delta, gamma) de un motor para todos los contratos (contratos x 3)"""
+    if ENGINES[name] is None:
+        columns = {key: np.array([c[key] for c in contracts])
+                   for key in ('K', 'T', 'r', 'sigma', 'H', 'barrier_type', 'option_type')}
+        return np.column_stack(binomial_batch(S0, columns['K'], columns['T'], columns['r'],
+                                              columns['sigma'], N, columns['option_type'],
+                                              columns['H'], columns['barrier_type'],
+                                              greeks=True))
+    return np.array([ENGINES[name](S0, c['K'], c['T'], c['r'], c['sigma'], N, c['option_type'],
+                                   H=c['H'], barrier_type=c['barrier_type'], greeks=True)
+                     for c in contracts])
+
+
+def peak_kib(name, N):
+    """Pico de memoria asignada (KiB) al valorar el contrato más exigente
+
+    Se mide con el backend NumPy, la implementación de referencia:
+    tracemalloc no ve lo que asignan los núcleos de Numba.
+    """
+    peak = 0
+    for c in contracts:
+        args = (S0, c['K'], c['T'], c['r'], c['sigma'], N, c['option_type'])
+        with kernels.use_backend('numpy'):
+            tracemalloc.start()
+            if ENGINES[name] is None:
+                binomial_batch(*args, H=c['H'], barrier_type=c['barrier_type'], greeks=True)
+            else:
+                ENGINES[name](*args, H=c['H'], barrier_type=c['barrier_type'], greeks=True)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return peak / 1024
+
+
+reference = np.array([greeks([reiner_rubinstein(S, c['K'], c['T'], c['r'], c['sigma'], c['H'],
+                                                c['barrier_type'], c['option_type'])
+                              for S in SPOTS]) for c in contracts])
+
+# Una valoración de cada motor fuera de la medición (compila los núcleos de pricing.kernels)
+for name in ENGINES:
+    greeks_grid(name, STEPS[0])
+
+rows = []
+print(f"{'Modelo':<18} {'N':>5} {'RMSE precio':>12} {'RMSE delta':>11} {'RMSE gamma':>11} "
+      f"{'ms/contrato':>12} {'Pico KiB':>9}")
+for N in STEPS:
+    for name in ENGINES:
+        start = time.perf_counter()
+        estimates = greeks_grid(name, N)
+        elapsed = (time.perf_counter() - start) / len(contracts)
+        rmse = np.sqrt(np.mean((estimates - reference)**2, axis=0))
+        rows.append(dict(engine=name, N=N, price_rmse=rmse[0], delta_rmse=rmse[1],
+                         gamma_rmse=rmse[2], time_s=elapsed, peak_kib=peak_kib(name, N)))
+        print(f"{name:<18} {N:>5} {rmse[0]:>12.2e} {rmse[1]:>11.2e} {rmse[2]:>11.2e} "
+              f"{1000 * elapsed:>12.3f} {rows[-1]['peak_kib']:>9.0f}")
+
+os.makedirs(os.path.dirname(OUTPUT), exist_ok=True)
+with open(OUTPUT, 'w', newline='') as f:
+    writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({key: f"{value:.6g}" if isinstance(value, float) else value
+                         for key, value in row.items()})
+print(f"\nResultados guardados en {os.path.relpath(OUTPUT)}")
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.finite_difference import finite_difference_price
+from pricing.trinomial import trinomial_tree
+
+# Down-and-out call con la barrera cerca de S0: error de precio y de gamma contra
+# Reiner-Rubinstein según el esquema θ, y con Crank-Nicolson sin los semipasos
+# de Rannacher (las oscilaciones del payoff aparecen en gamma)
+S0, K, T, r, sigma, H = 100.0, 100.0, 0.5, 0.05, 0.25, 92.0
+BUMP = 1e-4
+spots = S0 * np.array([1 - BUMP, 1.0, 1 + BUMP])
+values = reiner_rubinstein(spots, K, T, r, sigma, H, 'down-and-out', 'call')
+reference = (values[1], (values[2] - 2 * values[1] + values[0]) / (BUMP * S0)**2)
+
+schemes = {
+    'Implícito': dict(scheme='implicit'),
+    'Crank-Nicolson': dict(scheme='crank-nicolson'),
+    'CN sin Rannacher': dict(scheme='crank-nicolson', rannacher=0),
+    'Explícito (M=2√N)': dict(scheme='explicit'),
+}
+# Primera llamada fuera de la medición (compila los núcleos de pricing.kernels)
+finite_difference_price(S0, K, T, r, sigma, 10, 'call', H, 'down-and-out')
+print(f"{'Esquema':<20} {'N':>5} {'M':>5} {'Error precio':>13} {'Error gamma':>12} {'ms':>8}")
+for name, options in schemes.items():
+    for N in [50, 200, 800]:
+        # El explícito sólo es estable con Δτ·σ² del orden de la menor celda al cuadrado
+        M = int(2 * np.sqrt(N)) if options['scheme'] == 'explicit' else 2 * N
+        start = time.perf_counter()
+        price, _, gamma = finite_difference_price(S0, K, T, r, sigma, N, 'call', H,
+                                                  'down-and-out', greeks=True, space_steps=M,
+                                                  **options)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<20} {N:>5} {M:>5} {abs(price - reference[0]):>13.2e} "
+              f"{abs(gamma - reference[1]):>12.2e} {1000 * elapsed:>8.2f}")
+
+# Lote de 50 strikes in/out como columnas del mismo sistema, contra uno por uno
+# y contra el árbol trinomial con error similar
+strikes = np.linspace(80, 120, 50)
+barrier_type = np.array(['down-and-out', 'down-and-in'] * 25)
+exact = reiner_rubinstein(S0, strikes, T, r, sigma, H, barrier_type, 'call', rebate=1.0)
+print(f"\n{'Lote de 50 contratos':<28} {'Tiempo (s)':>11} {'Error máx.':>11}")
+runs = {
+    'CN N=100, una columna c/u': lambda: np.array([
+        finite_difference_price(S0, k, T, r, sigma, 100, 'call', H, b, rebate=1.0)
+        for k, b in zip(strikes, barrier_type)]),
+    'CN N=100, en lote': lambda: finite_difference_price(S0, strikes, T, r, sigma, 100, 'call',
+                                                         H, barrier_type, rebate=1.0),
+    'Trinomial N=2000, en lote': lambda: trinomial_tree(S0, strikes, T, r, sigma, 2000, 'call',
+                                                        H, barrier_type, rebate=1.0),
+}
+for name, run in runs.items():
+    start = time.perf_counter()
+    prices = run()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:>11.3f} {np.max(np.abs(prices - exact)):>11.2e}")
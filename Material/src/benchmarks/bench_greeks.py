@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.binomial import binomial_tree
+from pricing.closed_form import reiner_rubinstein
+from pricing.monte_carlo import monte_carlo_price
+from pricing.trinomial import trinomial_tree
+
+# Down-and-out call: griegas en una sola inducción vs diferencias centrales (3 valoraciones)
+S0, K, T, r, sigma, H = 100.0, 100.0, 1.0, 0.05, 0.2, 90.0
+contract = dict(option_type='call', H=H, barrier_type='down-and-out')
+N = 500
+BUMP = 0.01  # S0 ± BUMP·S0 en el bump-and-reprice
+
+
+def central(values, eps):
+    down, mid, up = values
+    return mid, (up - down) / (2 * eps), (up - 2 * mid + down) / eps**2
+
+
+eps = BUMP * S0
+ref = central([reiner_rubinstein(S, K, T, r, sigma, H, 'down-and-out', 'call')
+               for S in (S0 - 1e-4, S0, S0 + 1e-4)], 1e-4)
+print(f"Reiner-Rubinstein: precio {ref[0]:.5f}  delta {ref[1]:.5f}  gamma {ref[2]:.6f}\n")
+
+engines = {
+    'Binomial': binomial_tree,
+    'Trinomial': trinomial_tree,
+    'AMM (2,2)': partial(amm_price, levels=(2, 2)),
+}
+print(f"{'Modelo':<12} {'Método':<16} {'Delta':>9} {'Gamma':>10} {'Error Δ':>9} {'Error Γ':>9} "
+      f"{'ms':>8}")
+for name, engine in engines.items():
+    start = time.perf_counter()
+    bumped = central([engine(S, K, T, r, sigma, N, **contract)
+                      for S in (S0 - eps, S0, S0 + eps)], eps)
+    bump_time = time.perf_counter() - start
+    start = time.perf_counter()
+    one_pass = engine(S0, K, T, r, sigma, N, **contract, greeks=True)
+    pass_time = time.perf_counter() - start
+    for method, (_, delta, gamma), elapsed in [('3 valoraciones', bumped, bump_time),
+                                               ('una inducción', one_pass, pass_time)]:
+        print(f"{name:<12} {method:<16} {delta:>9.5f} {gamma:>10.6f} {abs(delta - ref[1]):>9.1e} "
+              f"{abs(gamma - ref[2]):>9.1e} {1000 * elapsed:>8.2f}")
+
+# Monte Carlo: razón de verosimilitud sobre las mismas trayectorias del precio
+N_MC = 50
+ref_mc = central([reiner_rubinstein(S, K, T, r, sigma, H, 'down-and-out', 'call',
+                                    monitoring_dt=T / N_MC)
+                  for S in (S0 - 1e-4, S0, S0 + 1e-4)], 1e-4)
+start = time.perf_counter()
+result = monte_carlo_price(S0, K, T, r, sigma, N_MC, **contract, greeks=True, n_paths=500_000,
+                           seed=0)
+elapsed = time.perf_counter() - start
+print(f"\nMonte Carlo (N={N_MC}, monitoreo discreto, referencia RR con BGK), {elapsed:.2f} s")
+print(f"{'':<6} {'Estimado':>10} {'Error est.':>11} {'Referencia':>11}")
+for label, value, error, reference in [('Precio', result.price, result.std_error, ref_mc[0]),
+                                       ('Delta', result.delta, result.delta_error, ref_mc[1]),
+                                       ('Gamma', result.gamma, result.gamma_error, ref_mc[2])]:
+    print(f"{label:<6} {value:>10.5f} {error:>11.2e} {reference:>11.5f}")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import black_scholes, reiner_rubinstein
+from pricing.contracts import BARRIER_TYPES
+from pricing.implied import implied_barrier, implied_volatility
+
+# Libro aleatorio: se valora con σ y H conocidas y se invierte el precio
+rng = np.random.default_rng(11)
+n = 100_000
+S0 = 100.0
+K = rng.uniform(80, 120, n)
+T = rng.uniform(0.1, 2.0, n)
+r = rng.uniform(0.0, 0.08, n)
+sigma = rng.uniform(0.1, 0.5, n)
+rebate = rng.uniform(0.0, 3.0, n)
+option_type = np.where(rng.random(n) < 0.5, 'call', 'put')
+barrier_type = np.array(BARRIER_TYPES)[rng.integers(0, 4, n)]
+distance = rng.uniform(0.05, 0.40, n)
+H = S0 * np.exp(np.where(np.char.startswith(barrier_type, 'down'), -distance, distance))
+
+vanilla = black_scholes(S0, K, T, r, sigma, option_type)
+barrier = reiner_rubinstein(S0, K, T, r, sigma, H, barrier_type, option_type, rebate)
+cases = {
+    'σ vanilla': (lambda: implied_volatility(vanilla, S0, K, T, r, option_type),
+                  lambda x: black_scholes(S0, K, T, r, x, option_type) - vanilla, sigma),
+    'σ barrera': (lambda: implied_volatility(barrier, S0, K, T, r, option_type, H, barrier_type,
+                                             rebate),
+                  lambda x: reiner_rubinstein(S0, K, T, r, x, H, barrier_type, option_type,
+                                              rebate) - barrier, sigma),
+    'H barrera': (lambda: implied_barrier(barrier, S0, K, T, r, sigma, barrier_type, option_type,
+                                          rebate),
+                  lambda x: reiner_rubinstein(S0, K, T, r, sigma, x, barrier_type, option_type,
+                                              rebate) - barrier, H),
+}
+
+print(f"{n:,} cotizaciones por caso\n")
+print(f"{'Caso':<10} {'Inversiones/s':>14} {'Residuo máx.':>13} {'Sin raíz':>9} "
+      f"{'Recupera original':>18}")
+for name, (solve, residual, original) in cases.items():
+    start = time.perf_counter()
+    implied = solve()
+    elapsed = time.perf_counter() - start
+    solved = ~np.isnan(implied)
+    recovered = np.mean(np.abs(implied[solved] - original[solved]) <= 1e-6 * original[solved])
+    error = np.abs(residual(implied))[solved]
+    print(f"{name:<10} {n / elapsed:>14,.0f} {np.max(error):>13.2e} "
+          f"{np.count_nonzero(~solved):>9} {recovered:>18.1%}")
+print("\nLas barreras no son monótonas en σ ni en H (con rebate): se devuelve la menor raíz, que"
+      "\npuede no ser la original. Casi todas las H sin raíz están más allá de 6σ√T, donde el precio\n"
+      "ya no depende de H.")
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing import kernels
+from pricing.binomial import binomial_batch
+from pricing.trinomial import trinomial_tree
+
+if kernels.numba is None:
+    sys.exit("Numba no está instalado: sólo está disponible el backend 'numpy'")
+
+# Los mismos casos con ambos backends: tiempos y diferencia máxima con NumPy (referencia)
+S0, T, r, sigma = 100.0, 1.0, 0.05, 0.2
+strikes = np.linspace(80, 120, 25)
+batch_N = np.repeat([250, 500, 1000, 2000], 250)
+batch_K = np.resize(strikes, len(batch_N))
+barrier_type = np.array(['down-and-out', 'down-and-in'] * 12 + ['down-and-out'])
+cases = {
+    'Binomial lote vanilla': lambda: binomial_batch(S0, batch_K, T, r, sigma, batch_N, 'put'),
+    'Binomial lote barrera': lambda: binomial_batch(S0, batch_K, T, r, sigma, batch_N, 'call',
+                                                    H=90.0, barrier_type='down-and-out',
+                                                    rebate=1.0),
+    'Binomial lote discreto': lambda: binomial_batch(S0, batch_K, T, r, sigma, batch_N, 'put',
+                                                     H=90.0, barrier_type='down-and-out',
+                                                     monitoring_dates=np.linspace(0.1, 1, 10)),
+    'Trinomial europea': lambda: trinomial_tree(S0, strikes, T, r, sigma, 4000, 'put'),
+    'Trinomial americana': lambda: trinomial_tree(S0, strikes, T, r, sigma, 4000, 'put',
+                                                  american=True),
+    'Trinomial barrera in/out': lambda: trinomial_tree(S0, strikes, T, r, sigma, 4000, 'put',
+                                                       H=90.0, barrier_type=barrier_type,
+                                                       rebate=1.0, american=True),
+    'Trinomial barrera griegas': lambda: np.array(trinomial_tree(
+        S0, strikes, T, r, sigma, 4000, 'call', H=120.0, barrier_type='up-and-out',
+        greeks=True)),
+}
+
+# Primera llamada: compila los núcleos (o los lee de la caché de Numba)
+start = time.perf_counter()
+with kernels.use_backend('numba'):
+    for price in cases.values():
+        price()
+print(f"Compilación / carga de los núcleos: {time.perf_counter() - start:.2f} s\n")
+
+print(f"{'Caso':<26} {'NumPy (s)':>10} {'Numba (s)':>10} {'Aceleración':>12} {'Dif. máx.':>10}")
+for name, price in cases.items():
+    values, times = [], []
+    for backend in ('numpy', 'numba'):
+        with kernels.use_backend(backend):
+            start = time.perf_counter()
+            values.append(np.asarray(price()))
+            times.append(time.perf_counter() - start)
+    print(f"{name:<26} {times[0]:>10.3f} {times[1]:>10.3f} {times[0] / times[1]:>11.1f}x "
+          f"{np.max(np.abs(values[1] - values[0])):>10.1e}")
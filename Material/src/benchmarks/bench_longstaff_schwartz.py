@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.longstaff_schwartz import longstaff_schwartz_price
+from pricing.monte_carlo import Z_95
+
+# Put americano up-and-out (caso de Longstaff y Schwartz con barrera)
+S0, K, T, r, sigma, H = 36.0, 40.0, 1.0, 0.06, 0.2, 44.0
+contract = dict(option_type='put', H=H, barrier_type='up-and-out', rebate=1.0)
+N_PATHS = 100_000
+
+print(f"{N_PATHS:,} trayectorias; la memoria no crece con el número de fechas N\n")
+print(f"{'N':>6} {'Americana':>10} {'IC 95%':>8} {'Europea (BGK)':>14} {'Prima':>8} "
+      f"{'Tiempo (s)':>11} {'Pico MiB':>9}")
+for N in [50, 250, 1000]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = longstaff_schwartz_price(S0, K, T, r, sigma, N, n_paths=N_PATHS, seed=0, **contract)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    european = reiner_rubinstein(S0, K, T, r, sigma, H, 'up-and-out', 'put', rebate=1.0,
+                                 monitoring_dt=T / N)
+    print(f"{N:>6} {result.price:>10.4f} {Z_95 * result.std_error:>8.4f} {european:>14.4f} "
+          f"{result.price - european:>8.4f} {elapsed:>11.2f} {peak:>9.1f}")
+
+# Bases de regresión
+print(f"\n{'Base':<10} {'Grado':>5} {'Americana':>10} {'IC 95%':>8}")
+for basis in ['laguerre', 'monomial']:
+    for degree in [2, 3, 5]:
+        result = longstaff_schwartz_price(S0, K, T, r, sigma, 50, n_paths=N_PATHS, seed=0,
+                                          degree=degree, basis=basis, **contract)
+        print(f"{basis:<10} {degree:>5} {result.price:>10.4f} {Z_95 * result.std_error:>8.4f}")
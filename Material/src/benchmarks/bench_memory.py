@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.binomial import binomial_tree
+from pricing.trinomial import (lattice_levels, node_prices, trinomial_probabilities,
+                               trinomial_tree)
+
+# Down-and-out call: pico de RSS de cada motor medido en un proceso hijo
+S0, K, T, r, sigma, H = 100.0, 100.0, 1.0, 0.05, 0.2, 90.0
+PAGE_KIB = os.sysconf('SC_PAGE_SIZE') / 1024
+
+
+def full_tree(N):
+    """Inducción que guarda todas las capas, como los diagramas de las figuras"""
+    dt = T / N
+    h = sigma * np.sqrt(3 * dt)
+    pu, pm, pd = (np.exp(-r * dt) * p for p in trinomial_probabilities(r, sigma, dt, h))
+    layers = [np.maximum(node_prices(S0, h, lattice_levels(N)) - K, 0)]
+    for step in range(N - 1, -1, -1):
+        V = layers[-1]
+        layers.append(pu * V[2:] + pm * V[1:-1] + pd * V[:-2])
+    return float(layers[-1][0])
+
+
+def measure(price, queue):
+    with open('/proc/self/statm') as statm:
+        base = int(statm.read().split()[1]) * PAGE_KIB
+    start = time.perf_counter()
+    value = price()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss en KiB (Linux); el hijo arranca con el RSS del padre
+    queue.put((value, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base))
+
+
+def peak_rss(price):
+    """(valor, segundos, pico de RSS en KiB sobre el del proceso al empezar)"""
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    child = context.Process(target=measure, args=(price, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    return result
+
+
+barrier = dict(option_type='call', H=H, barrier_type='down-and-out')
+cases = [
+    ('Árbol completo (vanilla)', N, partial(full_tree, N)) for N in (1_000, 4_000)
+] + [
+    ('Trinomial (vanilla)', N, partial(trinomial_tree, S0, K, T, r, sigma, N, 'call'))
+    for N in (1_000, 4_000)
+] + [
+    ('Trinomial', N, partial(trinomial_tree, S0, K, T, r, sigma, N, **barrier))
+    for N in (1_000, 10_000, 100_000)
+] + [
+    ('Binomial', N, partial(binomial_tree, S0, K, T, r, sigma, N, **barrier))
+    for N in (1_000, 10_000, 100_000)
+] + [
+    ('AMM (2,2)', N, partial(amm_price, S0, K, T, r, sigma, N, **barrier, levels=(2, 2)))
+    for N in (1_000, 10_000)
+]
+
+print(f"{'Motor':<26} {'N':>8} {'Precio':>10} {'Tiempo (s)':>11} {'Pico RSS (MiB)':>15}")
+for name, N, price in cases:
+    value, elapsed, peak = peak_rss(price)
+    print(f"{name:<26} {N:>8} {value:>10.5f} {elapsed:>11.2f} {peak / 1024:>15.1f}")
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.monte_carlo import Z_95, monte_carlo_price
+
+# Down-and-out call monitoreado en N fechas
+S0, K, T, r, sigma, H, N = 100.0, 100.0, 1.0, 0.05, 0.2, 90.0, 250
+contract = dict(option_type='call', H=H, barrier_type='down-and-out')
+
+# Referencia: Reiner-Rubinstein con la corrección de Broadie-Glasserman-Kou
+# para monitoreo discreto
+reference = reiner_rubinstein(S0, K, T, r, sigma, H, 'down-and-out', 'call',
+                              monitoring_dt=T / N)
+print(f"Referencia (RR con corrección BGK): {reference:.6f}\n")
+
+# Memoria constante: el pico no depende del número de trayectorias
+print(f"{'Trayectorias':>12} {'Precio':>10} {'IC 95%':>9} {'Tiempo (s)':>11} "
+      f"{'Tray./s':>11} {'Pico MiB':>9}")
+for n_paths in [10**5, 10**6, 4 * 10**6]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = monte_carlo_price(S0, K, T, r, sigma, N, n_paths=n_paths, seed=0, **contract)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    print(f"{n_paths:>12,} {result.price:>10.5f} {Z_95 * result.std_error:>9.5f} "
+          f"{elapsed:>11.2f} {n_paths / elapsed:>11,.0f} {peak:>9.1f}")
+
+# Parada temprana: se simulan sólo las trayectorias necesarias para la tolerancia
+print(f"\n{'Tolerancia':>10} {'Trayectorias':>13} {'Precio':>10} {'Error':>9} {'Tiempo (s)':>11}")
+for tol in [0.05, 0.02]:
+    start = time.perf_counter()
+    result = monte_carlo_price(S0, K, T, r, sigma, N, n_paths=10**8, tol=tol, seed=1, **contract)
+    elapsed = time.perf_counter() - start
+    print(f"{tol:>10} {result.n_paths:>13,} {result.price:>10.5f} "
+          f"{result.price - reference:>9.5f} {elapsed:>11.2f}")
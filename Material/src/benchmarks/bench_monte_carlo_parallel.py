@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.monte_carlo import monte_carlo_price
+
+# Down-and-out call monitoreado en N fechas, misma semilla para todos los pools
+S0, K, T, r, sigma, H, N = 100.0, 100.0, 1.0, 0.05, 0.2, 90.0, 250
+contract = dict(option_type='call', H=H, barrier_type='down-and-out')
+N_PATHS = 2_000_000
+SEED = 2024
+
+if __name__ == '__main__':
+    cores = os.cpu_count() or 1
+    # 2 y 4 procesos siempre, para verificar la reproducibilidad aun con pocos núcleos
+    pools = sorted({1, 2, 4, cores} | {p for p in (8, 16, 32) if p <= cores})
+    print(f"{N_PATHS:,} trayectorias, N={N}, {cores} núcleos disponibles\n")
+    print(f"{'Procesos':>8} {'Precio':>18} {'Error est.':>11} {'Tiempo (s)':>11} "
+          f"{'Aceleración':>12} {'Idéntico':>9}")
+    baseline = None
+    for workers in pools:
+        start = time.perf_counter()
+        result = monte_carlo_price(S0, K, T, r, sigma, N, n_paths=N_PATHS, seed=SEED,
+                                   workers=workers, **contract)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = (result, elapsed)
+        print(f"{workers:>8} {result.price:>18.15f} {result.std_error:>11.2e} {elapsed:>11.2f} "
+              f"{baseline[1] / elapsed:>11.1f}x {str(result == baseline[0]):>9}")
@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.monte_carlo import Z_95, monte_carlo_price
+
+# Semiamplitud del IC al 95% de MC pseudoaleatorio y de QMC (Sobol con puente
+# browniano, 16 réplicas) con las mismas trayectorias. Como la del MC cae como
+# n^-1/2, (IC MC / IC QMC)² es cuántas veces más trayectorias necesita el MC
+# para el mismo intervalo
+S0, T, r, sigma, N = 100.0, 1.0, 0.05, 0.2, 64
+PATHS = [2**14, 2**16, 2**18]
+
+cases = {
+    'Down-and-out call H=90, continua': dict(K=100.0, option_type='call', H=90.0,
+                                             barrier_type='down-and-out', bridge=True),
+    'Up-and-out put H=115, rebate 2': dict(K=100.0, option_type='put', H=115.0,
+                                           barrier_type='up-and-out', rebate=2.0, bridge=True),
+    'Down-and-out call H=90, discreta': dict(K=100.0, option_type='call', H=90.0,
+                                             barrier_type='down-and-out'),
+}
+
+for case, contract in cases.items():
+    reference = reiner_rubinstein(S0, contract['K'], T, r, sigma, contract['H'],
+                                  contract['barrier_type'], contract['option_type'],
+                                  contract.get('rebate', 0.0),
+                                  monitoring_dt=None if contract.get('bridge') else T / N)
+    print(f"{case} (N={N}, referencia RR{'' if contract.get('bridge') else ' con BGK'}: "
+          f"{reference:.5f})")
+    print(f"{'Trayectorias':>12} {'Precio MC':>10} {'IC MC':>9} {'Precio QMC':>11} {'IC QMC':>9} "
+          f"{'Tray. ahorradas':>16} {'Tiempo QMC/MC':>14}")
+    for n_paths in PATHS:
+        runs = []
+        for qmc in (False, True):
+            start = time.perf_counter()
+            result = monte_carlo_price(S0, T=T, r=r, sigma=sigma, N=N, n_paths=n_paths, seed=0,
+                                       qmc=qmc, **contract)
+            runs.append((result, time.perf_counter() - start))
+        (plain, plain_time), (quasi, quasi_time) = runs
+        print(f"{n_paths:>12,} {plain.price:>10.4f} {Z_95 * plain.std_error:>9.1e} "
+              f"{quasi.price:>11.4f} {Z_95 * quasi.std_error:>9.1e} "
+              f"{(plain.std_error / quasi.std_error)**2:>15.0f}x "
+              f"{quasi_time / plain_time:>13.1f}x")
+    print()
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.contracts import BARRIER_TYPES
+
+# Libro de contratos europeos con los ocho tipos de barrera mezclados y rebates
+N_CONTRACTS = 2_000_000
+N_LOOP = 2_000
+
+rng = np.random.default_rng(42)
+barrier_type = np.array(BARRIER_TYPES)[rng.integers(0, 4, N_CONTRACTS)]
+option_type = np.array(['call', 'put'])[rng.integers(0, 2, N_CONTRACTS)]
+is_down = np.char.startswith(barrier_type, 'down')
+S = np.full(N_CONTRACTS, 100.0)
+K = rng.uniform(70, 130, N_CONTRACTS)
+T = rng.uniform(0.1, 2.0, N_CONTRACTS)
+r = rng.uniform(0.0, 0.08, N_CONTRACTS)
+sigma = rng.uniform(0.1, 0.5, N_CONTRACTS)
+H = np.where(is_down, rng.uniform(60, 99, N_CONTRACTS), rng.uniform(101, 140, N_CONTRACTS))
+R = rng.uniform(0.0, 5.0, N_CONTRACTS)
+at_hit = rng.random(N_CONTRACTS) < 0.5
+book = (S, K, T, r, sigma, H, barrier_type, option_type, R, at_hit)
+
+# Contrato por contrato (llamadas escalares) sobre un subconjunto
+start = time.perf_counter()
+loop = np.array([reiner_rubinstein(*(a[i] for a in book)) for i in range(N_LOOP)])
+loop_time = time.perf_counter() - start
+
+best = np.inf
+for _ in range(3):
+    start = time.perf_counter()
+    prices = reiner_rubinstein(*book)
+    best = min(best, time.perf_counter() - start)
+
+print(f"Llamadas escalares: {loop_time:.3f} s  ({N_LOOP / loop_time:,.0f} contratos/s)")
+print(f"Lote vectorizado:   {best:.3f} s  ({N_CONTRACTS / best:,.0f} contratos/s)")
+print(f"Aceleración: {(N_CONTRACTS / best) / (N_LOOP / loop_time):.0f}x   "
+      f"Diferencia máxima: {np.max(np.abs(prices[:N_LOOP] - loop)):.2e}")
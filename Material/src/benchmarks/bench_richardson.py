@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.binomial import binomial_batch, binomial_richardson
+from pricing.closed_form import black_scholes, reiner_rubinstein
+from pricing.contracts import BARRIER_TYPES
+
+# Contratos aleatorios: vanillas contra Black-Scholes y barreras contra Reiner-Rubinstein
+rng = np.random.default_rng(7)
+n = 200
+S0 = 100.0
+K = rng.uniform(85, 115, n)
+T = rng.uniform(0.25, 1.5, n)
+r = rng.uniform(0.0, 0.08, n)
+sigma = rng.uniform(0.15, 0.35, n)
+option_type = np.where(rng.random(n) < 0.5, 'call', 'put')
+barrier_type = np.array(BARRIER_TYPES)[rng.integers(0, 4, n)]
+distance = rng.uniform(0.08, 0.30, n)
+H = S0 * np.exp(np.where(np.char.startswith(barrier_type, 'down'), -distance, distance))
+
+cases = {
+    'Vanilla': (dict(), black_scholes(S0, K, T, r, sigma, option_type)),
+    'Barrera': (dict(H=H, barrier_type=barrier_type),
+                reiner_rubinstein(S0, K, T, r, sigma, H, barrier_type, option_type)),
+}
+methods = {
+    'CRR N=1000': lambda **c: binomial_batch(S0, K, T, r, sigma, 1000, option_type, **c),
+    'CRR N=100': lambda **c: binomial_batch(S0, K, T, r, sigma, 100, option_type, **c),
+    'CRR suavizado N=100': lambda **c: binomial_batch(S0, K, T, r, sigma, 100, option_type,
+                                                      smooth=True, **c),
+    'Richardson 2 niveles, N=100': lambda **c: binomial_richardson(S0, K, T, r, sigma, 100,
+                                                                   option_type, levels=2, **c),
+    'Richardson 3 niveles, N=50': lambda **c: binomial_richardson(S0, K, T, r, sigma, 50,
+                                                                  option_type, levels=3, **c),
+}
+
+for case, (contract, reference) in cases.items():
+    print(f"{case}: {n} contratos")
+    print(f"{'Método':<30} {'RMSE':>10} {'Error máx.':>11} {'ms/contrato':>12}")
+    for name, method in methods.items():
+        start = time.perf_counter()
+        prices = method(**contract)
+        elapsed = (time.perf_counter() - start) / n
+        error = prices - reference
+        print(f"{name:<30} {np.sqrt(np.mean(error**2)):>10.2e} {np.max(np.abs(error)):>11.2e} "
+              f"{1000 * elapsed:>12.3f}")
+    print()
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.static_replication import barrier_matrix, dek_price
+
+# Libro matinal: 600 barreras que comparten 6 estructuras (H, T, σ, r)
+S0, N_DATES = 100.0, 200
+structures = [(90.0, 1.0, 0.20, 0.05, 'down-and-out', 'call'),
+              (85.0, 0.5, 0.25, 0.05, 'down-and-in', 'put'),
+              (115.0, 1.0, 0.20, 0.05, 'up-and-out', 'put'),
+              (120.0, 2.0, 0.30, 0.04, 'up-and-in', 'call'),
+              (95.0, 0.25, 0.15, 0.05, 'down-and-out', 'put'),
+              (110.0, 0.75, 0.22, 0.03, 'up-and-out', 'call')]
+strikes = np.linspace(80, 120, 100)
+
+# Contrato por contrato, reconstruyendo la matriz de la barrera cada vez
+start = time.perf_counter()
+single = []
+for H, T, sigma, r, barrier_type, option_type in structures:
+    for K in strikes:
+        barrier_matrix.cache_clear()
+        single.append(dek_price(S0, K, T, r, sigma, H, barrier_type, option_type, n_dates=N_DATES))
+single_time = time.perf_counter() - start
+
+# Por estructura: matriz en caché y todos los strikes en una sustitución
+barrier_matrix.cache_clear()
+start = time.perf_counter()
+grouped = np.concatenate([dek_price(S0, strikes, T, r, sigma, H, barrier_type, option_type,
+                                    n_dates=N_DATES)
+                          for H, T, sigma, r, barrier_type, option_type in structures])
+grouped_time = time.perf_counter() - start
+
+reference = np.concatenate([reiner_rubinstein(S0, strikes, T, r, sigma, H, barrier_type, option_type)
+                            for H, T, sigma, r, barrier_type, option_type in structures])
+n = len(reference)
+print(f"{n} barreras, {len(structures)} estructuras (H, T, σ, r), {N_DATES} fechas de cobertura\n")
+print(f"Contrato por contrato: {single_time:.3f} s  ({n / single_time:,.0f} contratos/s)")
+print(f"Agrupado con caché:    {grouped_time:.3f} s  ({n / grouped_time:,.0f} contratos/s)")
+print(f"Aceleración: {single_time / grouped_time:.0f}x   "
+      f"Diferencia máxima entre ambos: {np.max(np.abs(grouped - np.array(single))):.2e}")
+print(f"Error máximo vs Reiner-Rubinstein: {np.max(np.abs(grouped - reference)):.2e}")
+print(barrier_matrix.cache_info())
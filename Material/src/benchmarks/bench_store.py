@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.binomial import binomial_batch
+from pricing.store import ResultStore
+
+# Grilla de un millón de puts vanilla (K x T x σ x r) valorados con el binomial
+S0, N = 100.0, 20
+K, T, sigma, r = np.meshgrid(np.linspace(80, 120, 100), np.linspace(0.25, 2.0, 40),
+                             np.linspace(0.1, 0.5, 50), np.linspace(0.0, 0.08, 5), indexing='ij')
+print(f"{K.size:,} contratos, binomial N={N}\n")
+
+start = time.perf_counter()
+direct = binomial_batch(S0, K, T, r, sigma, N, 'put')
+print(f"{'Sin almacén':<28} {time.perf_counter() - start:>8.2f} s")
+
+with tempfile.TemporaryDirectory() as path:
+    store = ResultStore(path)
+    for label in ['Almacén vacío (valora)', 'Almacén lleno (lee)']:
+        start = time.perf_counter()
+        prices = store.price(S0, K, T, r, sigma, N, 'put', engine='binomial')
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {elapsed:>8.2f} s  {1e6 * elapsed / K.size:>6.2f} µs/contrato  "
+              f"idéntico: {np.array_equal(prices, direct)}")
+
+    # Un almacén recién abierto sólo lee las claves y las filas consultadas
+    start = time.perf_counter()
+    reopened = ResultStore(path)
+    rows = reopened.find(reopened.column('key_hi')[:1000], reopened.column('key_lo')[:1000])
+    print(f"{'Abrir y buscar 1.000 filas':<28} {time.perf_counter() - start:>8.2f} s")
+    start = time.perf_counter()
+    cheap = reopened.column('price')[reopened.column('K')[:] < 85]
+    print(f"{'Consulta columnar (K < 85)':<28} {time.perf_counter() - start:>8.2f} s  "
+          f"{len(cheap):,} filas")
+    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    print(f"\nTamaño en disco: {size / 2**20:.1f} MiB ({size / len(reopened):.0f} bytes/fila)")
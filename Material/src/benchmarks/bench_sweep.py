@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.amm import amm_price
+from pricing.sweep import price_sweep
+from pricing.trinomial import trinomial_tree
+
+# Barrido de casos de prueba: 3 geometrías (H, σ) x 2 tipos in/out x 2 call/put x 50 strikes
+S0, T, r = 100.0, 1.0, 0.05
+strikes = np.linspace(80, 120, 50)
+geometries = [(90.0, 0.20, 'down'), (85.0, 0.30, 'down'), (115.0, 0.25, 'up')]
+book = [(H, sigma, f'{side}-and-{kind}', option_type, K)
+        for H, sigma, side in geometries for kind in ('out', 'in')
+        for option_type in ('call', 'put') for K in strikes]
+H, sigma, barrier_type, option_type, K = (np.array(column) for column in zip(*book))
+rebate = 1.0
+
+engines = {
+    'Trinomial N=500': (trinomial_tree, 'trinomial', 500, {}),
+    'AMM (2,2) N=100': (partial(amm_price, levels=(2, 2)), 'amm', 100, dict(levels=(2, 2))),
+}
+print(f"{len(book)} contratos, {len(geometries)} geometrías de malla\n")
+print(f"{'Motor':<16} {'Por contrato (s)':>17} {'Barrido (s)':>12} {'Una inducción (s)':>18} "
+      f"{'Aceleración':>12} {'Dif. máx.':>10}")
+for name, (engine, key, N, options) in engines.items():
+    start = time.perf_counter()
+    single = np.array([engine(S0, K[i], T, r, sigma[i], N, option_type[i], H[i], barrier_type[i],
+                              rebate) for i in range(len(book))])
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    swept = price_sweep(S0, K, T, r, sigma, N, option_type, H, barrier_type, rebate, engine=key,
+                        **options)
+    sweep_time = time.perf_counter() - start
+    start = time.perf_counter()
+    engine(S0, K[0], T, r, sigma[0], N, option_type[0], H[0], barrier_type[0], rebate)
+    one_time = time.perf_counter() - start
+    print(f"{name:<16} {single_time:>17.3f} {sweep_time:>12.3f} {one_time:>18.4f} "
+          f"{single_time / sweep_time:>11.0f}x {np.max(np.abs(swept - single)):>10.1e}")
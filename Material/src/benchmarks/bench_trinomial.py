@@ -0,0 +1,16 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.trinomial import trinomial_tree
+
+# Down-and-out call con la barrera sobre una capa de nodos
+S0, K, T, r, sigma, H = 100.0, 100.0, 1.0, 0.05, 0.25, 90.0
+
+print(f"{'N':>6} {'Precio':>12} {'Tiempo (ms)':>12}")
+for N in [100, 250, 1000, 2500]:
+    start = time.perf_counter()
+    price = trinomial_tree(S0, K, T, r, sigma, N, 'call', H, 'down-and-out')
+    elapsed = time.perf_counter() - start
+    print(f"{N:>6} {price:>12.6f} {1000 * elapsed:>12.2f}")
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import reiner_rubinstein
+from pricing.monte_carlo import monte_carlo_price
+
+# Aceleración efectiva = (varianza x tiempo por trayectoria) de MC simple
+# dividido por la del método: cuántas veces menos cómputo para el mismo error
+S0, T, r, sigma, N = 100.0, 1.0, 0.05, 0.2, 50
+N_PATHS = 200_000
+nu = r - 0.5 * sigma**2
+
+cases = {
+    'Down-and-out call, H=90': dict(K=100.0, option_type='call', H=90.0,
+                                    barrier_type='down-and-out'),
+    'Up-and-in call lejana, H=150': dict(K=100.0, option_type='call', H=150.0,
+                                         barrier_type='up-and-in'),
+}
+
+
+def methods(H, barrier_type):
+    """Configuraciones de reducción de varianza; en knock-in el drift lleva las trayectorias a H"""
+    options = {
+        'MC simple': {},
+        'Antitéticas': dict(antithetic=True),
+        'Control vanilla': dict(controls=('vanilla',)),
+        'Control barrera': dict(controls=('barrier',)),
+        'Antit. + ambos controles': dict(antithetic=True, controls=('vanilla', 'barrier')),
+    }
+    if barrier_type.endswith('in'):
+        shift = np.log(H / S0) / T - nu
+        options['Muestreo de importancia'] = dict(drift_shift=shift)
+        options['Importancia + control barrera'] = dict(drift_shift=shift, controls=('barrier',))
+    return options
+
+
+for case, contract in cases.items():
+    reference = reiner_rubinstein(S0, contract['K'], T, r, sigma, contract['H'],
+                                  contract['barrier_type'], contract['option_type'],
+                                  monitoring_dt=T / N)
+    print(f"{case} (N={N}, referencia aproximada RR con BGK: {reference:.5f})")
+    print(f"{'Método':<30} {'Precio':>9} {'Error est.':>11} {'µs/tray.':>9} "
+          f"{'Var x tiempo':>13} {'Aceleración':>12}")
+    baseline = None
+    for name, options in methods(contract['H'], contract['barrier_type']).items():
+        start = time.perf_counter()
+        result = monte_carlo_price(S0, contract['K'], T, r, sigma, N, contract['option_type'],
+                                   contract['H'], contract['barrier_type'], n_paths=N_PATHS,
+                                   seed=0, **options)
+        per_path = (time.perf_counter() - start) / result.n_paths
+        cost = result.std_error**2 * result.n_paths * per_path
+        if baseline is None:
+            baseline = cost
+        print(f"{name:<30} {result.price:>9.4f} {result.std_error:>11.2e} {1e6 * per_path:>9.2f} "
+              f"{cost:>13.2e} {baseline / cost:>11.1f}x")
+    print()
@@ -0,0 +1,14 @@
+"""Motores de valoración de opciones barrera usados por las figuras y benchmarks"""
+from pricing.binomial import binomial_batch, binomial_richardson, binomial_tree
+from pricing.trinomial import trinomial_schedule, trinomial_tree
+from pricing.amm import amm_price, amm_schedule_price
+from pricing.finite_difference import finite_difference_price
+from pricing.closed_form import black_scholes, kunitomo_ikeda, reiner_rubinstein
+from pricing.monte_carlo import monte_carlo_price
+from pricing.longstaff_schwartz import longstaff_schwartz_price
+from pricing.static_replication import dek_price, dek_weights
+from pricing.implied import implied_barrier, implied_volatility
+from pricing.sweep import price_sweep
+from pricing.cache import cache_clear, cache_info
+from pricing.store import ResultStore
+from pricing.kernels import get_backend, set_backend, use_backend
@@ -0,0 +1,789 @@
+"""Modelo de Malla Adaptativa (AMM) de Figlewski y Gao sobre el árbol trinomial
+
+La malla gruesa es un árbol trinomial en log-precio (paso h, tiempo k) con la
+barrera sobre una capa de nodos. Los niveles de refinamiento se configuran
+como (t0, t1), igual que en las tablas de la figura 8:
+
+- t0: niveles de malla fina (h/2^l, k/4^l) en la región crítica, es decir,
+  la banda [H, H + 2h] junto a la barrera durante toda la vida de la opción
+  y la región [K - 2h, K + 2h] en el último paso grueso.
+- t1: niveles de malla fina alrededor de S0 en el primer paso grueso.
+
+Cada banda fina tiene 5 nodos (barrera, h/2, h, 3h/2, 2h del nivel padre).
+Como un paso grueso de las bandas es lineal y no depende del tiempo, se
+compila una sola vez en una matriz pequeña: por paso grueso el AMM agrega un
+producto matriz-vector de tamaño O(banda) sobre el costo del árbol grueso.
+Con el backend compilado (pricing.kernels) ese producto va en el mismo
+recorrido que la capa gruesa y un AMM (t0, 0) cuesta casi lo mismo que el
+árbol trinomial del mismo N; con NumPy, del orden del doble. La ventaja está
+cerca de la barrera, donde el trinomial necesita N mucho mayor para ubicarla
+(benchmarks/bench_amm.py); con barreras lejanas no es más preciso que el
+trinomial a igual tiempo (benchmarks/bench_fig8_accuracy.py).
+"""
+from collections import namedtuple
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from pricing import kernels
+from pricing.cache import byte_lru_cache
+from pricing.contracts import (Greeks, barrier_flags, barrier_schedule, bgk_barrier,
+                               knock_flags, monitoring_grid, schedule_steps,
+                               three_point_greeks, vanilla_payoff)
+from pricing.trinomial import (barrier_spacing, discrete_barrier_spacing, interpolate_at,
+                               schedule_levels, schedule_spacing, trinomial_probabilities)
+
+BAND_NODES = 5
+
+# Banda fina de una barrera en la posición `position` (en nodos gruesos) hacia
+# el lado vivo `side`: valores (subpasos + 1) × nodos × columnas, una fila por
+# capa fina del paso grueso en curso, y su geometría respecto de la malla
+# gruesa (ver fine_band)
+FineBand = namedtuple('FineBand', ['position', 'side', 'values', 'stencil', 'seed', 'inject'])
+
+
+def _discounted_probabilities(r, sigma, dt, h, direction=1):
+    """(pu, pm, pd) descontadas; con direction=-1 'arriba' es hacia abajo en precio"""
+    disc = np.exp(-r * dt)
+    pu, pm, pd = trinomial_probabilities(r, sigma, dt, h)
+    if direction < 0:
+        pu, pd = pd, pu
+    return disc * pu, disc * pm, disc * pd
+
+
+def amm_spacing(S0, H, sigma, k, t0):
+    """Paso grueso h y nivel l0 de la malla sobre cuyo nodo cae S0
+
+    Si S0 está dentro de la banda fina de algún nivel l <= t0, h se ajusta para
+    que S0 quede exactamente sobre un nodo de paso h/2^l; si no, S0 queda sobre
+    un nodo grueso como en el árbol trinomial.
+    """
+    h_star = sigma * np.sqrt(3 * k)
+    distance = abs(np.log(S0 / H))
+    for level in range(t0, 0, -1):
+        h_level = h_star / 2**level
+        if distance <= (BAND_NODES - 1) * h_level:
+            n = max(int(distance / h_level), 1)
+            h = distance / n * 2**level
+            if h < sigma * np.sqrt(k):
+                raise ValueError("S0 demasiado cerca de la barrera: aumentar N o los niveles AMM")
+            return h, level
+    h, _ = barrier_spacing(S0, H, sigma, k)
+    return h, 0
+
+
+@byte_lru_cache(8 * 2**20)
+def band_operator(r, sigma, k, h, depth, direction, decay):
+    """Matriz de un paso grueso de las bandas finas junto a la barrera (en caché)
+
+    Estado de entrada (filas): bandas de niveles 1..depth en t + k (5 nodos
+    cada una), nodos gruesos a distancia 1, 2 y 3 de la barrera en t + k y el
+    valor de borde b en t + k. Salida: bandas en t, nodo grueso a distancia 1
+    refinado y borde en t. El borde decae como exp(-decay * tau).
+
+    Dentro de cada subpaso fino los nodos interiores usan ramas (h/2^l, k/4^l);
+    el nodo exterior de la banda (2 pasos del padre) usa una rama del padre
+    con el tiempo que falta hasta su siguiente capa, que sigue teniendo
+    probabilidades positivas porque su varianza es menor que la del padre.
+    """
+    n_state = BAND_NODES * depth + 4
+    eye = np.eye(n_state)
+    bands = [eye[BAND_NODES * l:BAND_NODES * (l + 1)].copy() for l in range(depth)]
+    coarse = eye[BAND_NODES * depth:BAND_NODES * depth + 3]
+    boundary = eye[BAND_NODES * depth + 3]
+
+    # Probabilidades por nivel: ramas finas y saltos del padre con m subpasos
+    fine = {}
+    jumps = {}
+    for level in range(1, depth + 1):
+        dt = k / 4**level
+        fine[level] = _discounted_probabilities(r, sigma, dt, h / 2**level, direction)
+        jumps[level] = [_discounted_probabilities(r, sigma, m * dt, h / 2**(level - 1), direction)
+                        for m in range(1, 5)]
+
+    def refine(level, parent_next, b_next):
+        dt = k / 4**level
+        pu, pm, pd = fine[level]
+        cur = bands[level - 1]
+        for m in range(1, 5):
+            ju, jm, jd = jumps[level][m - 1]
+            new = np.empty_like(cur)
+            new[0] = b_next * np.exp(-decay * m * dt)
+            new[1:4] = pu * cur[2:5] + pm * cur[1:4] + pd * cur[0:3]
+            new[4] = ju * parent_next[3] + jm * parent_next[2] + jd * parent_next[1]
+            if level < depth:
+                child = refine(level + 1, cur, b_next * np.exp(-decay * (m - 1) * dt))
+                new[1], new[2] = child[2], child[4]
+            cur = new
+        bands[level - 1] = cur
+        return cur
+
+    top = refine(1, np.vstack([boundary, coarse]), boundary)
+    return np.vstack(bands + [top[2], boundary * np.exp(-decay * k)])
+
+
+def _fine_cone(values, fine_levels, pu, pm, pd, steps, knock, boundary):
+    """Inducción hacia atrás de `steps` subpasos finos sobre una ventana que se achica
+
+    Con knock=None la barrera no se monitorea en los subpasos.
+    """
+    for m in range(1, steps + 1):
+        values = pu * values[2:] + pm * values[1:-1] + pd * values[:-2]
+        fine_levels = fine_levels[1:-1]
+        if knock is None:
+            continue
+        dead = knock(fine_levels)
+        if np.any(dead):
+            values[dead] = boundary(m)
+    return values, fine_levels
+
+
+def band_nodes(t_start, t_end, low, high, level=1):
+    """Nodos (tiempo, nivel) de una malla fina de nivel `level` en unidades gruesas
+
+    Devuelve dos arrays (capas finas × nodos) con paso 1/4^level en tiempo
+    entre t_start y t_end y 1/2^level en nivel entre low y high, la franja
+    que las figuras dibujan con un solo scatter.
+    """
+    times = t_start + np.arange(round((t_end - t_start) * 4**level) + 1) / 4**level
+    positions = low + np.arange(round((high - low) * 2**level) + 1) / 2**level
+    return np.meshgrid(times, positions, indexing='ij')
+
+
+def amm_price(S0, K, T, r, sigma, N, option_type='put', H=None, barrier_type=None,
+              rebate=0.0, rebate_at_hit=True, levels=(1, 0), monitoring_dt=None,
+              greeks=False, monitoring_dates=None):
+    """Valora una opción europea vanilla o barrera con el AMM de niveles (t0, t1)
+
+    Con levels=(0, 0) coincide con trinomial_tree. Las knock-in se obtienen
+    por paridad: V_KI = V_vanilla - V_KO + R * (valor de cobrar 1 si nunca se
+    toca la barrera). Con monitoring_dt la barrera se desplaza como en
+    trinomial_tree para valorar monitoreo discreto.
+
+    Con monitoring_dates (fechas en (0, T]) el monitoreo discreto es exacto,
+    como en trinomial_tree: N pasa al N' de monitoring_grid, la barrera queda
+    a mitad de camino entre dos niveles gruesos y sólo se aplica en las capas
+    de las fechas. Las bandas finas de t0 (que resuelven la barrera continua)
+    no se usan; el refinamiento del strike y el de S0 sí.
+
+    Con greeks=True devuelve Greeks(price, delta, gamma) de la misma
+    inducción: con t1 > 0 sale de la rama fina en S0 ± h/2^t1 en t = 0 (la
+    ramificación cuadrinomial de la figura 7); si no, de los nodos conocidos
+    vecinos a S0 en t = 0 (malla gruesa y bandas finas junto a la barrera).
+
+    Como en trinomial_tree, K, option_type, rebate y barrier_type pueden ser
+    arrays (barreras del mismo lado) que se valoran como columnas de una
+    única inducción sobre la misma malla.
+    """
+    t0, t1 = levels
+    K, option_type, rebate = np.broadcast_arrays(np.asarray(K, dtype=float),
+                                                 np.asarray(option_type),
+                                                 np.asarray(rebate, dtype=float))
+    if barrier_type is not None:
+        K, option_type, rebate, barrier_type = np.broadcast_arrays(K, option_type, rebate,
+                                                                   np.asarray(barrier_type))
+    shape = K.shape
+    K, option_type, rebate = K.ravel(), option_type.ravel(), rebate.ravel()
+    no_unit = np.zeros(len(K), dtype=bool)
+    if H is None:
+        return _amm_result(_amm_knockout(S0, K, T, r, sigma, N, option_type, None, 1,
+                                         np.zeros(len(K)), no_unit, False, t0, t1, greeks),
+                           greeks, shape)
+
+    is_down, is_out = barrier_flags(barrier_type.ravel())
+    if len(set(is_down)) > 1:
+        raise ValueError("Todas las barreras de una misma malla deben ser del mismo lado")
+    is_down = bool(is_down[0])
+    monitored = None
+    if monitoring_dates is not None:
+        if monitoring_dt is not None:
+            raise ValueError("monitoring_dt y monitoring_dates son excluyentes")
+        N, steps = monitoring_grid(monitoring_dates, T, N)
+        monitored = np.zeros(N + 1, dtype=bool)
+        monitored[steps] = True
+    elif (S0 <= H) if is_down else (S0 >= H):
+        vanilla = amm_price(S0, K, T, r, sigma, N, option_type, levels=levels, greeks=greeks)
+        if not greeks:
+            return np.where(is_out, rebate, vanilla).reshape(shape)[()]
+        return Greeks(*(np.where(is_out, knocked, value).reshape(shape)[()]
+                        for knocked, value in zip((rebate, 0.0, 0.0), vanilla)))
+    if monitoring_dt is not None:
+        H = bgk_barrier(H, sigma, monitoring_dt, is_down)
+    direction = 1 if is_down else -1
+
+    # Columnas: cada contrato como knock-out (rebate 0 en las knock-in) y, por
+    # cada knock-in, el valor de cobrar 1 si no se toca la barrera
+    ki = np.flatnonzero(~is_out)
+    n = len(K)
+    values = _amm_knockout(S0, np.concatenate([K, K[ki]]), T, r, sigma, N,
+                           np.concatenate([option_type, option_type[ki]]), H, direction,
+                           np.concatenate([np.where(is_out, rebate, 0.0), np.zeros(len(ki))]),
+                           np.concatenate([no_unit, np.ones(len(ki), dtype=bool)]),
+                           rebate_at_hit, t0, t1, greeks, monitored)
+    prices = values[..., :n]
+    if len(ki):
+        vanilla = _amm_knockout(S0, K[ki], T, r, sigma, N, option_type[ki], None, 1,
+                                np.zeros(len(ki)), no_unit[ki], False, t0, t1, greeks)
+        prices[..., ki] = vanilla - prices[..., ki] + rebate[ki] * values[..., n:]
+    return _amm_result(prices, greeks, shape)
+
+
+def _amm_result(values, greeks, shape):
+    """Precio, o Greeks si values trae las filas (precio, delta, gamma), con la forma común"""
+    if greeks:
+        if shape:
+            return Greeks(*(value.reshape(shape) for value in values))
+        return Greeks(*(float(value[0]) for value in values))
+    return values.reshape(shape)[()]
+
+
+def _amm_knockout(S0, K, T, r, sigma, N, option_type, H, direction, rebate, unit,
+                  rebate_at_hit, t0, t1, greeks=False, monitored=None):
+    """Inducción AMM de un lote de knock-out (o vanillas si H es None) sobre una malla
+
+    Cada contrato (K, option_type, rebate, unit, arrays 1-D) es una columna;
+    con unit=True el payoff es 1 si la barrera nunca se tocó. Devuelve el
+    valor en S0 de cada columna o, con greeks, las filas (valor, delta, gamma).
+    monitored (bool por capa 0..N) restringe la barrera a las capas marcadas.
+    """
+    k = T / N
+    barrier = 0.0
+    if H is None:
+        h, level0 = sigma * np.sqrt(3 * k), 0
+        ref = S0
+    elif monitored is None:
+        h, level0 = amm_spacing(S0, H, sigma, k, t0)
+        ref = H
+    else:
+        # Monitoreo discreto: malla sobre S0 y barrera entre dos niveles
+        h, barrier = discrete_barrier_spacing(S0, H, sigma, k)
+        level0 = 0
+        ref = S0
+    # Posición de S0 y de K en unidades del paso grueso (nivel 0 = referencia)
+    pos0 = np.log(S0 / ref) / h
+    center = int(round(pos0))
+    t1_eff = max(t1, level0) if t1 > 0 else 0
+    pad = 3 + (2**t1_eff if t1_eff else 0)
+
+    def payoff(S):
+        return np.where(unit, 1.0, vanilla_payoff(S[:, None], K, option_type))
+
+    n_cols = len(K)
+    decay = 0.0 if rebate_at_hit else r
+    b_T = rebate
+
+    def boundary_at(t):
+        return b_T * np.exp(-decay * (T - t))
+
+    # Valor de borde en cada capa gruesa 0..N (se usa en todos los pasos)
+    layer_boundary = b_T * np.exp(-decay * (T - k * np.arange(N + 1)))[:, None]
+
+    def knock(positions):
+        # Posiciones en unidades del paso grueso, en o más allá de la barrera
+        if H is None:
+            return np.zeros(np.shape(positions), dtype=bool)
+        return direction * (np.asarray(positions) - barrier) <= 0
+
+    def knock_at(step):
+        # La barrera de la capa `step`, o None si esa capa no se monitorea
+        return knock if monitored is None or monitored[step] else None
+
+    # Último nivel grueso tocado
+    jb = int(np.floor(barrier) if direction > 0 else np.ceil(barrier))
+
+    pu, pm, pd = _discounted_probabilities(r, sigma, k, h)
+    lo = center - N - pad
+    coarse_levels = np.arange(lo, center + N + pad + 1)
+    V = payoff(ref * np.exp(h * coarse_levels))
+    if knock_at(N) is not None:
+        V[knock(coarse_levels)] = b_T
+
+    # Bandas finas junto a la barrera: estado en t = T
+    use_band = H is not None and t0 > 0 and monitored is None
+    if use_band:
+        operator = band_operator(r, sigma, k, h, t0, direction, decay)
+        band_state = []
+        for level in range(1, t0 + 1):
+            fine = direction * np.arange(BAND_NODES) / 2**level
+            values = payoff(ref * np.exp(h * fine))
+            values[0] = b_T
+            band_state.append(values)
+        band_state = np.vstack(band_state)
+        band_coarse = direction * np.arange(1, 4)
+        band_low, band_high = band_coarse.min(), band_coarse.max()
+
+    n_band = BAND_NODES * t0
+    if kernels.compiled():
+        # Los mismos pasos con kernels.amm_induction, in-place sobre V, que se
+        # detiene donde el bucle de NumPy intercala los refinamientos
+        if not use_band:
+            band_state, operator = np.empty((0, n_cols)), np.empty((0, 0))
+        watch = np.zeros(N + 1, dtype=bool)
+        if H is not None:
+            watch[:] = True if monitored is None else monitored
+        buffer, length = V, len(V)
+
+        def induct(start, stop):
+            nonlocal lo, length, use_band
+            lo, length, use_band = kernels.amm_induction(
+                buffer, lo, length, start, stop, pu, pm, pd, watch, jb, direction,
+                layer_boundary, band_state, operator, use_band)
+            return buffer[:length]
+
+        if N == 1 and t1_eff > 0:
+            profile = _known_profile(V.copy(), lo, h, None, t0, direction, knock_at(1))
+        V = induct(N - 1, N - 1)
+        if t0 > 0:
+            V = _strike_refinement(V, lo, K, T, r, sigma, k, h, ref, t0, payoff,
+                                   knock, boundary_at, monitored)
+        if N > 1 and t1_eff > 0:
+            V = induct(N - 2, 1)
+            profile = _known_profile(V.copy(), lo, h, band_state if use_band else None,
+                                     t0, direction, knock_at(1))
+            V = induct(0, 0)
+        elif N > 1:
+            V = induct(N - 2, 0)
+    else:
+        if use_band:
+            state = np.empty((n_band + 4, n_cols))
+            out = np.empty((n_band + 2, n_cols))
+        # Dos capas gruesas en buffers preasignados que se alternan (más uno auxiliar)
+        buffers = V, np.empty_like(V)
+        scratch = np.empty_like(V)
+        if N == 1 and t1_eff > 0:
+            profile = _known_profile(V.copy(), lo, h, None, t0, direction, knock_at(1))
+        for n in range(N - 1, -1, -1):
+            V_next, lo_next = V, lo
+            V = buffers[(N - n) % 2][:len(V_next) - 2]
+            tmp = scratch[:len(V)]
+            np.multiply(V_next[2:], pu, out=V)
+            V += np.multiply(V_next[1:-1], pm, out=tmp)
+            V += np.multiply(V_next[:-2], pd, out=tmp)
+            lo = lo_next + 1
+            if H is not None and knock_at(n) is not None:
+                # Nodos en o más allá de la barrera (nivel jb), por aritmética de índices
+                dead = (slice(0, max(jb + 1 - lo, 0)) if direction > 0
+                        else slice(max(jb - lo, 0), len(V)))
+                V[dead] = layer_boundary[n]
+
+            if use_band:
+                idx_now = direction - lo
+                if band_low >= lo_next and band_high < lo_next + len(V_next):
+                    state[:n_band] = band_state
+                    state[n_band:n_band + 3] = V_next[band_coarse - lo_next]
+                    state[n_band + 3] = layer_boundary[n + 1]
+                    np.matmul(operator, state, out=out)
+                    band_state = out[:n_band]
+                    if 0 <= idx_now < len(V):
+                        V[idx_now] = out[n_band]
+                else:
+                    use_band = False
+
+            if n == N - 1 and t0 > 0:
+                # Malla fina alrededor del strike en el último paso grueso
+                V = _strike_refinement(V, lo, K, T, r, sigma, k, h, ref, t0, payoff,
+                                       knock, boundary_at, monitored)
+
+            if n == 1 and t1_eff > 0:
+                profile = _known_profile(V, lo, h, band_state if use_band else None,
+                                         t0, direction, knock_at(1))
+
+    if t1_eff > 0:
+        fine = _initial_refinement(profile, pos0, r, sigma, k, h, t1_eff, knock, boundary_at,
+                                   monitored)
+        if not greeks:
+            return fine[2]
+        # Rama cuadrinomial: S0 y sus vecinos a h/2^t1 en t = 0
+        spots = S0 * np.exp(h * np.arange(-1, 2) / 2**t1_eff)
+        return np.vstack([fine[2], *three_point_greeks(spots[:, None], fine[1:4])])
+    if greeks:
+        positions, values = _known_profile(V, lo, h, band_state if use_band else None,
+                                           t0, direction, knock_at(0))
+        i = int(np.argmin(np.abs(positions - pos0)))
+        spots = ref * np.exp(h * positions[i - 1:i + 2])
+        return np.vstack([values[i], *three_point_greeks(spots[:, None], values[i - 1:i + 2])])
+    if level0 > 0:
+        node = int(round(direction * pos0 * 2**level0))
+        return band_state[BAND_NODES * (level0 - 1) + node]
+    return V[center - lo]
+
+
+def _strike_refinement(V, lo, K, T, r, sigma, k, h, ref, t0, payoff, knock, boundary_at,
+                       monitored=None):
+    """Reemplaza los nodos gruesos en [K - 2h, K + 2h] en t = T - k por la malla fina
+
+    Con varios strikes el cono fino cubre la unión de las ventanas. Con
+    monitored (monitoreo discreto) la barrera sólo se aplica en T y en T - k
+    si esas capas se monitorean, nunca en los subpasos intermedios.
+    """
+    scale = 2**t0
+    steps = 4**t0
+    strike = np.round(np.log(K / ref) / h).astype(int)
+    first = max(strike.min() - 2, lo)
+    last = min(strike.max() + 2, lo + len(V) - 1)
+    if first > last:
+        return V
+    fine_levels = np.arange(first * scale - steps, last * scale + steps + 1)
+    values = payoff(ref * np.exp(h * fine_levels / scale))
+    if monitored is None or monitored[-1]:
+        values[knock(fine_levels / scale)] = boundary_at(T)
+    pu, pm, pd = _discounted_probabilities(r, sigma, k / steps, h / scale)
+    values, fine_levels = _fine_cone(values, fine_levels, pu, pm, pd, steps,
+                                     None if monitored is not None
+                                     else lambda levels: knock(levels / scale),
+                                     lambda m: boundary_at(T - m * k / steps))
+    if monitored is not None and monitored[-2]:
+        values[knock(fine_levels / scale)] = boundary_at(T - k)
+    # Cada columna sólo toma la malla fina en la ventana de su propio strike
+    coarse = np.arange(first, last + 1)[:, None]
+    np.copyto(V[first - lo:last - lo + 1], values[::scale], where=np.abs(coarse - strike) <= 2)
+    return V
+
+
+def _known_profile(V, lo, h, band_state, t0, direction, knock):
+    """Nodos (posición, valor) conocidos en t = k, del lado vivo de la barrera
+
+    Con knock=None (capa no monitoreada) se usan todos los nodos.
+    """
+    positions = np.arange(lo, lo + len(V), dtype=float)
+    if knock is None:
+        return positions, V
+    alive = ~knock(positions) | (positions == 0)
+    profile = dict(zip(positions[alive], V[alive]))
+    if band_state is not None:
+        for level in range(1, t0 + 1):
+            fine = direction * np.arange(BAND_NODES) / 2**level
+            values = band_state[BAND_NODES * (level - 1):BAND_NODES * level]
+            profile.update(zip(fine, values))
+    positions = np.array(sorted(profile))
+    return positions, np.array([profile[p] for p in positions])
+
+
+def _initial_refinement(profile, pos0, r, sigma, k, h, t1, knock, boundary_at,
+                        monitored=None):
+    """Malla fina (h/2^t1, k/4^t1) alrededor de S0 en el primer paso grueso
+
+    Los valores en t = k sobre la malla fina se interpolan con splines cúbicos
+    a partir de los nodos conocidos del lado vivo. Devuelve los valores en
+    t = 0 en S0 + i·h/2^t1 para i = -2..2. Con monitored (monitoreo discreto)
+    la barrera sólo se aplica en t = k, si esa capa se monitorea.
+    """
+    scale = 2**t1
+    steps = 4**t1
+    positions, values = profile
+    spline = CubicSpline(positions, values, axis=0)
+    node0 = int(round(pos0 * scale))
+    fine_levels = np.arange(node0 - steps - 2, node0 + steps + 3)
+    fine_values = spline(fine_levels / scale)
+    if monitored is None or monitored[1]:
+        fine_values[knock(fine_levels / scale)] = boundary_at(k)
+    pu, pm, pd = _discounted_probabilities(r, sigma, k / steps, h / scale)
+    fine_values, _ = _fine_cone(fine_values, fine_levels, pu, pm, pd, steps,
+                                None if monitored is not None
+                                else lambda levels: knock(levels / scale),
+                                lambda m: boundary_at(k - m * k / steps))
+    return fine_values
+
+
+def amm_schedule_price(S0, K, T, r, sigma, N, option_type='put', lower=None, upper=None,
+                       barrier_type='knock-out', rebate=0.0, rebate_at_hit=True, level=1):
+    """Valora barreras dobles o escalonadas con la malla de trinomial_schedule y bandas finas
+
+    Los argumentos son los de trinomial_schedule. Durante cada tramo en que
+    rige una barrera se sigue una banda fina (h/2^level, k/4^level) de
+    [H, H ± 2h] con la barrera exactamente sobre su primer nodo, aunque H no
+    caiga sobre un nodo grueso: en cada paso grueso la banda arranca de sus
+    propios valores y, más allá de 2h, de un spline de los nodos gruesos, y
+    al final reemplaza los nodos gruesos que cubre. El costo agregado es
+    O(bandas · 8^level) por paso grueso, sin refinar el resto de la malla.
+    Con level=0 coincide con trinomial_schedule. Las knock-in se obtienen
+    por paridad con vanillas valoradas en la misma malla.
+
+    Las bandas sólo corrigen la ubicación de la barrera. Con uno o dos
+    niveles (una doble knock-out constante) schedule_spacing ya los pone
+    sobre nodos gruesos, el error que queda es el O(k) del paso grueso en
+    toda la malla y level >= 1 no lo reduce: sólo agrega tiempo. Las bandas
+    convienen con barreras escalonadas cuyos niveles trinomial_schedule
+    redondea al nodo tocado.
+    """
+    schedule = barrier_schedule(T, lower, upper)
+    K, option_type, rebate, barrier_type = np.broadcast_arrays(
+        np.asarray(K, dtype=float), np.asarray(option_type), np.asarray(rebate, dtype=float),
+        np.asarray(barrier_type))
+    shape = K.shape
+    K, option_type, rebate = K.ravel(), option_type.ravel(), rebate.ravel()
+    is_out = np.atleast_1d(knock_flags(barrier_type.ravel()))
+
+    N, _ = monitoring_grid(schedule.times[1:], T, N)
+    low, up = schedule_steps(schedule, N)
+    if S0 <= low[0] or S0 >= up[0]:
+        # Barrera ya tocada en t=0: las knock-out valen el rebate, las knock-in la vanilla
+        vanilla = amm_price(S0, K, T, r, sigma, N, option_type, levels=(level, 0))
+        return np.where(is_out, rebate, vanilla).reshape(shape)[()]
+
+    # Columnas: cada contrato como knock-out (rebate 0 en las knock-in) y, por
+    # cada knock-in, el valor de cobrar 1 si no se toca ninguna barrera y la vanilla
+    ki = np.flatnonzero(~is_out)
+    n = len(K)
+    columns = np.concatenate([np.arange(n), ki, ki])
+    unit = np.zeros(len(columns), dtype=bool)
+    unit[n:n + len(ki)] = True
+    values = _schedule_knockout(S0, K[columns], T, r, sigma, N, option_type[columns],
+                                schedule, low, up,
+                                np.concatenate([np.where(is_out, rebate, 0.0),
+                                                np.zeros(2 * len(ki))]),
+                                unit, n + len(ki), rebate_at_hit, level)
+    prices = values[:n]
+    if len(ki):
+        prices[ki] = values[n + len(ki):] - prices[ki] + rebate[ki] * values[n:n + len(ki)]
+    return prices.reshape(shape)[()]
+
+
+def _schedule_knockout(S0, K, T, r, sigma, N, option_type, schedule, low, up, rebate, unit,
+                       n_barred, rebate_at_hit, level):
+    """Inducción de trinomial_schedule con bandas finas junto a cada barrera vigente
+
+    Las primeras n_barred columnas son knock-out (con unit, payoff 1); las
+    restantes son vanillas que no ven la barrera. low y up son las barreras
+    de cada paso 0..N (schedule_steps). Devuelve el valor en S0 por columna.
+    """
+    k = T / N
+    levels = np.concatenate([schedule.lower, schedule.upper])
+    h, ref = schedule_spacing(S0, levels[~np.isnan(levels)], sigma, k)
+    pu, pm, pd = _discounted_probabilities(r, sigma, k, h)
+    jl = schedule_levels(low, ref, h, True)
+    ju = schedule_levels(up, ref, h, False)
+    with np.errstate(divide='ignore'):
+        lower_at, upper_at = np.log(np.maximum(low, 0.0) / ref) / h, np.log(up / ref) / h
+    # Barreras de cada intervalo [t_n, t_{n+1}] (las del tramo que lo contiene)
+    segment = np.searchsorted(schedule.times, (np.arange(N) + 0.5) * k) - 1
+    with np.errstate(invalid='ignore'):
+        bands = [(1, np.log(schedule.lower[segment] / ref) / h),
+                 (-1, np.log(schedule.upper[segment] / ref) / h)]
+
+    u0 = np.log(S0 / ref) / h
+    lo = int(np.floor(u0)) - 1 - N
+    hi = int(np.ceil(u0)) + 1 + N
+    walled_lo = n_barred == len(K) and np.isfinite(jl).all() and jl.min() > lo
+    walled_hi = n_barred == len(K) and np.isfinite(ju).all() and ju.max() < hi
+    if walled_lo:
+        lo = int(jl.min())
+    if walled_hi:
+        hi = int(ju.max())
+    base = lo
+
+    decay = 0.0 if rebate_at_hit else r
+    b_T = rebate[:n_barred]
+
+    def boundary_at(t):
+        return b_T * np.exp(-decay * (T - t))
+
+    S = ref * np.exp(h * np.arange(lo, hi + 1))
+    V = np.where(unit, 1.0, vanilla_payoff(S[:, None], K, option_type))
+    W = np.empty_like(V)
+    scratch = np.empty_like(V)
+    scale, substeps = 2**level, 4**level
+    fine = [_discounted_probabilities(r, sigma, k / substeps, h / scale, side)
+            for side in (1, -1)]
+    # FineBand de cada lado, o None si no rige barrera
+    state = [None, None]
+
+    for step in range(N, -1, -1):
+        cur = V[lo - base:hi - base + 1]
+        hit = boundary_at(step * k)
+        if jl[step] >= lo:
+            cur[:int(min(jl[step], hi)) - lo + 1, :n_barred] = hit
+        if ju[step] <= hi:
+            cur[int(max(ju[step], lo)) - lo:, :n_barred] = hit
+
+        if level > 0 and step < N:
+            for band, (side, position) in enumerate(bands):
+                b = position[step]
+                if np.isnan(b):
+                    state[band] = None
+                    continue
+                # La banda sigue de un paso al otro mientras la barrera no cambie
+                if state[band] is None or state[band].position != b:
+                    state[band] = fine_band(b, side, scale, substeps, n_barred)
+                if not _band_step(state[band], V_next, lo_next, lower_at[step + 1],
+                                  upper_at[step + 1], bands[1 - band][1][step], fine[band],
+                                  k, (step + 1) * k, boundary_at):
+                    state[band] = None
+                    continue
+                _inject(state[band], cur, lo, hi, n_barred)
+
+        if step == 0:
+            break
+        V_next, lo_next = cur, lo
+        new_lo = lo if walled_lo else lo + 1
+        new_hi = hi if walled_hi else hi - 1
+        rows = slice(lo + 1 - base, hi - base)
+        new, tmp = W[rows], scratch[rows]
+        np.multiply(V[lo + 2 - base:hi + 1 - base], pu, out=new)
+        new += np.multiply(V[rows], pm, out=tmp)
+        new += np.multiply(V[lo - base:hi - 1 - base], pd, out=tmp)
+        lo, hi = new_lo, new_hi
+        V, W = W, V
+
+    # S0 dentro de una banda vigente en t = 0: se interpola en la banda fina
+    for band, (side, position) in enumerate(bands):
+        if state[band] is None:
+            continue
+        offset = side * (u0 - position[0]) * scale
+        if 0 < offset <= 2 * scale:
+            values = interpolate_at(state[band].values[-1], 0, offset, 0, 2 * scale)
+            vanilla = interpolate_at(V[lo - base:hi - base + 1, n_barred:], lo, u0, lo, hi)
+            return np.concatenate([values, vanilla])
+    low_edge = int(jl[0]) if np.isfinite(jl[0]) else lo
+    high_edge = int(ju[0]) if np.isfinite(ju[0]) else hi
+    values = interpolate_at(V[lo - base:hi - base + 1], lo, u0, max(low_edge, lo),
+                            min(high_edge, hi))
+    if n_barred < len(K):
+        values[n_barred:] = interpolate_at(V[lo - base:hi - base + 1, n_barred:], lo, u0, lo, hi)
+    return values
+
+
+def fine_band(b, side, scale, substeps, n_cols):
+    """FineBand vacía de la barrera en la posición b (en nodos gruesos)
+
+    Los nodos finos i = 0..2·scale + substeps están en b + side·i/scale. En
+    coordenadas s = side·nodo (crecientes hacia el lado vivo) el nodo grueso
+    s está en la posición fina (s - side·b)·scale, así que mientras b no
+    cambie la geometría entre ambas mallas es constante:
+
+    - seed: los nodos finos exteriores (i > 2·scale) son seed @ los nodos
+      gruesos stencil, stencil + 1, ... (Lagrange cúbico de 4 nodos).
+    - inject: los nodos gruesos s1 + j (j < count) a menos de 2h de la
+      barrera caen entre los nodos finos fine + j·scale y el siguiente, con
+      el mismo peso weight para todos.
+    """
+    core = 2 * scale
+    width = core + substeps
+    sb = side * b
+    # Nodos finos exteriores en coordenadas s y su nodo grueso base
+    x = sb + np.arange(core + 1, width + 1) / scale
+    base = np.floor(x).astype(np.int64)
+    t = (x - base)[:, None]
+    stencil = int(base[0]) - 1
+    seed = np.zeros((len(x), int(base[-1]) + 3 - stencil))
+    rows = np.arange(len(x))[:, None]
+    columns = base[:, None] - 1 - stencil + np.arange(4)
+    seed[rows, columns] = np.hstack([-t * (t - 1) * (t - 2) / 6, (t + 1) * (t - 1) * (t - 2) / 2,
+                                     -(t + 1) * t * (t - 2) / 2, (t + 1) * t * (t - 1) / 6])
+
+    s1 = int(np.floor(sb)) + 1
+    count = int(np.floor(sb + 2)) - s1 + 1
+    offset = (s1 - sb) * scale
+    first = int(np.floor(offset))
+    inject = (s1, count, first, offset - first)
+    values = np.full((substeps + 1, width + 1, n_cols), np.nan)
+    return FineBand(b, side, values, stencil, seed, inject)
+
+
+def _side_rows(array, start, count, side):
+    """Vista de count filas de array desde la fila start en la dirección side"""
+    if side > 0:
+        return array[start:start + count]
+    return array[start - count + 1:start + 1][::-1]
+
+
+def _band_step(band, V_next, lo_next, lower, upper, other, probabilities, k, t_next,
+               boundary_at):
+    """Un paso grueso de la banda: llena band.values[0] en t_next e induce hasta t_next - k
+
+    La fila 0 (t_next) toma los primeros 2·scale + 1 nodos de la última fila
+    del paso anterior y el resto de los nodos gruesos vivos de V_next (primer
+    nodo en lo_next) con los pesos de band.seed. Si la banda recién empieza,
+    la barrera opuesta está al alcance del stencil o éste sale del cono, la
+    fila 0 sale de un spline de los nodos gruesos vivos y de los valores de
+    borde sobre las barreras lower y upper (posiciones en t_next). La fila m
+    es el subpaso m y pierde un nodo exterior; la última (2·scale + 1 nodos)
+    es la banda en t_next - k. other es la barrera del lado opuesto durante
+    el paso, cuyos nodos finos tocados también valen el borde. Devuelve
+    False si la barrera está fuera del cono de nodos gruesos.
+    """
+    b, side, strip = band.position, band.side, band.values
+    substeps = strip.shape[0] - 1
+    width = strip.shape[1] - 1
+    core = width - substeps
+    scale = core // 2
+    n_barred = strip.shape[2]
+    positions = b + side * np.arange(width + 1) / scale
+    edge = boundary_at(t_next)
+    row = strip[0]
+
+    # Stencil grueso dentro de V_next y sin otra barrera entre b y su extremo
+    span = band.seed.shape[1]
+    start = side * band.stencil - lo_next
+    end = start + side * (span - 1)
+    barriers = side * np.array([lower, upper, other])
+    seeded = (np.isfinite(strip[-1, 0, 0]) and min(start, end) >= 0
+              and max(start, end) < len(V_next)
+              and not np.any((barriers > side * b + 1e-9) & (barriers < band.stencil + span)))
+    if not seeded:
+        # Spline de los nodos gruesos vivos cercanos y de los bordes sobre las barreras
+        nodes = lo_next + np.arange(len(V_next))
+        near = (side * (nodes - b) > 0) & (side * (nodes - b) <= width / scale + 3)
+        alive = near & (nodes > lower) & (nodes < upper)
+        if alive.sum() < 2:
+            # La barrera está fuera del cono de nodos alcanzables: no hay banda
+            return False
+        x = [nodes[alive]]
+        y = [V_next[alive, :n_barred]]
+        for barrier in (lower, upper):
+            if positions.min() - 1 <= barrier <= positions.max() + 1:
+                x.append([barrier])
+                y.append(edge[None, :])
+        x = np.concatenate(x)
+        order = np.argsort(x)
+        spline = CubicSpline(x[order], np.concatenate(y)[order], axis=0)
+        if np.isfinite(strip[-1, 0, 0]):
+            row[core + 1:] = spline(positions[core + 1:])
+            row[:core + 1] = strip[-1, :core + 1]
+        else:
+            row[:] = spline(positions)
+    else:
+        row[:core + 1] = strip[-1, :core + 1]
+        np.matmul(band.seed, _side_rows(V_next, start, span, side)[:, :n_barred],
+                  out=row[core + 1:])
+    row[(positions <= lower) | (positions >= upper)] = edge
+    dead = side * (positions - other) >= 0 if np.isfinite(other) else None
+
+    pu, pm, pd = probabilities
+    dt = k / substeps
+    tmp = np.empty((width, n_barred))
+    for m in range(1, substeps + 1):
+        previous, values = strip[m - 1, :width + 2 - m], strip[m, :width + 1 - m]
+        values[0] = boundary_at(t_next - m * dt)
+        interior, scratch = values[1:], tmp[:width - m]
+        np.multiply(previous[2:], pu, out=interior)
+        interior += np.multiply(previous[1:-1], pm, out=scratch)
+        interior += np.multiply(previous[:-2], pd, out=scratch)
+        if dead is not None:
+            values[dead[:len(values)]] = values[0]
+    return True
+
+
+def _inject(band, cur, lo, hi, n_barred):
+    """Reemplaza los nodos gruesos vivos a menos de 2h de la barrera por la banda
+
+    cur tiene los nodos lo..hi de la capa en t_next - k. Los nodos cubiertos
+    son equiespaciados en la banda, así que la interpolación lineal es una
+    combinación de dos cortes con paso scale (un solo corte si caen sobre
+    nodos finos).
+    """
+    s1, count, first, weight = band.inject
+    side = band.side
+    scale = (band.values.shape[1] - 1 - (band.values.shape[0] - 1)) // 2
+    s_lo, s_hi = sorted((side * lo, side * hi))
+    j0, j1 = max(0, s_lo - s1), min(count, s_hi - s1 + 1)
+    if j1 <= j0:
+        return
+    rows = _side_rows(cur, side * (s1 + j0) - lo, j1 - j0, side)[:, :n_barred]
+    fine = band.values[-1]
+    stop = first + (j1 - 1) * scale + 1
+    if weight == 0:
+        rows[:] = fine[first + j0 * scale:stop:scale]
+    else:
+        np.multiply(fine[first + j0 * scale:stop:scale], 1 - weight, out=rows)
+        rows += weight * fine[first + 1 + j0 * scale:stop + 1:scale]
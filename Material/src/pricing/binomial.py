@@ -0,0 +1,384 @@
+"""Modelo binomial (Cox-Ross-Rubinstein) vectorizado por lotes de contratos"""
+import numpy as np
+from scipy.special import ndtr
+
+from pricing import kernels
+from pricing.cache import byte_lru_cache
+from pricing.contracts import (Greeks, barrier_flags, bgk_barrier, monitoring_grid,
+                               three_point_greeks)
+
+
+def binomial_batch(S0, K, T, r, sigma, N, option_type='put', H=None,
+                   barrier_type=None, rebate=0.0, monitoring_dt=None, greeks=False,
+                   smooth=False, monitoring_dates=None):
+    """Valora un lote de opciones europeas con árboles CRR en una sola llamada
+
+    Los argumentos se difunden (broadcast) entre sí y el resultado tiene la
+    forma común. Con H y barrier_type se valoran opciones barrera monitoreadas
+    en cada paso: las knock-out pagan el rebate al tocar la barrera y las
+    knock-in se obtienen por paridad (vanilla - knock-out + rebate por la
+    probabilidad descontada de no tocarla), agregando esas filas al mismo lote.
+    Con monitoring_dt la barrera se desplaza según Broadie-Glasserman-Kou
+    para valorar monitoreo cada monitoring_dt en lugar de en cada paso.
+
+    El árbol CRR no pone la barrera sobre nodos: la barrera efectiva es la
+    fila de nodos más cercana del lado tocado, que se mueve con N, así que el
+    error de la barrera es O(1/√N) y no decrece en forma monótona (tampoco
+    con monitoring_dates). trinomial_tree elige el paso para que H caiga
+    sobre un nivel de nodos y es el motor indicado para barreras.
+
+    Con monitoring_dates (fechas en (0, T], comunes a todo el lote) la
+    barrera sólo se aplica en los pasos de esas fechas: el N de cada fila pasa
+    al N' de monitoring_grid, que pone las fechas sobre pasos del árbol, y los
+    pasos que ninguna fila monitorea no calculan nodos tocados.
+
+    Con greeks=True cada árbol arranca dos pasos antes (t = -2Δt) y la
+    inducción se detiene en la capa de t = 0, cuyos nodos S0·u^-2, S0 y S0·u^2
+    dan en la misma pasada Greeks(price, delta, gamma), cada uno con la forma
+    común. El precio es idéntico al del árbol de N pasos.
+
+    Con smooth=True (suavizado Black-Scholes) los valores del paso N - 1 son
+    los exactos de un paso lognormal hasta el vencimiento, con la barrera
+    monitoreada en T, en lugar de la esperanza binomial del payoff: se elimina
+    el error de discretización del strike y, con él, la oscilación par-impar.
+    """
+    stop = 2 if greeks else 0
+    if H is None:
+        S0, K, T, r, sigma, N, is_call = np.broadcast_arrays(
+            np.asarray(S0, dtype=float), np.asarray(K, dtype=float),
+            np.asarray(T, dtype=float), np.asarray(r, dtype=float),
+            np.asarray(sigma, dtype=float), np.asarray(N, dtype=np.int64),
+            np.asarray(option_type) == 'call')
+        shape = S0.shape
+        no_barrier = np.full(S0.size, np.nan)
+        zeros = np.zeros(S0.size)
+        values = _binomial_lattice(S0.ravel(), K.ravel(), (T * (N + stop) / N).ravel(),
+                                   r.ravel(), sigma.ravel(), (N + stop).ravel(), is_call.ravel(),
+                                   no_barrier, zeros.astype(bool), zeros, zeros.astype(bool),
+                                   stop, smooth)
+        return _spot_layer(values, S0, T, sigma, N, greeks)
+
+    is_down, is_out = barrier_flags(barrier_type)
+    S0, K, T, r, sigma, N, is_call, H, is_down, is_out, rebate = np.broadcast_arrays(
+        np.asarray(S0, dtype=float), np.asarray(K, dtype=float),
+        np.asarray(T, dtype=float), np.asarray(r, dtype=float),
+        np.asarray(sigma, dtype=float), np.asarray(N, dtype=np.int64),
+        np.asarray(option_type) == 'call', np.asarray(H, dtype=float),
+        np.asarray(is_down), np.asarray(is_out), np.asarray(rebate, dtype=float))
+    shape = S0.shape
+    if monitoring_dt is not None:
+        if monitoring_dates is not None:
+            raise ValueError("monitoring_dt y monitoring_dates son excluyentes")
+        knocked = np.where(is_down, S0 <= H, S0 >= H)
+        H = np.where(knocked, H, bgk_barrier(H, sigma, monitoring_dt, is_down))
+    monitored = None
+    if monitoring_dates is not None:
+        N, monitored = _monitoring_steps(monitoring_dates, T.ravel(), N.ravel(), stop)
+        N = N.reshape(shape)
+    # Con greeks, stop pasos más con el mismo Δt antes de t = 0
+    args = [a.ravel() for a in (S0, K, T * (N + stop) / N, r, sigma, N + stop, is_call, H,
+                                is_down)]
+    is_out, rebate = is_out.ravel(), rebate.ravel()
+    n = len(is_out)
+    ki = np.flatnonzero(~is_out)
+
+    # Filas: todas como knock-out (rebate 0 en las knock-in), y para las
+    # knock-in además la vanilla y el valor de cobrar 1 si no se toca la barrera
+    stacked = [np.concatenate([a, a[ki], a[ki]]) for a in args]
+    stacked[7][n:n + len(ki)] = np.nan
+    unit = np.zeros(n + 2 * len(ki), dtype=bool)
+    unit[n + len(ki):] = True
+    lattice_rebate = np.concatenate([np.where(is_out, rebate, 0.0), np.zeros(2 * len(ki))])
+    if monitored is not None:
+        monitored = np.concatenate([monitored, monitored[ki], monitored[ki]])
+    values = _binomial_lattice(*stacked, lattice_rebate, unit, stop, smooth, monitored)
+
+    prices = values[:n]
+    prices[ki] = (values[n:n + len(ki)] - prices[ki]
+                  + rebate[ki, None] * values[n + len(ki):])
+    return _spot_layer(prices, S0, T, sigma, N, greeks)
+
+
+def _monitoring_steps(dates, T, N, stop=0):
+    """(N', monitoreados) de cada fila para un calendario común de fechas
+
+    N' sale de monitoring_grid para cada par (T, N) distinto; monitoreados es
+    una matriz bool (filas x max(N') + stop + 1) con True en las capas del
+    árbol (desplazadas stop pasos por las griegas) que caen en fechas.
+    """
+    pairs, group = np.unique(np.column_stack([T, N]), axis=0, return_inverse=True)
+    grids = [monitoring_grid(dates, T_pair, N_pair) for T_pair, N_pair in pairs]
+    aligned = np.array([n for n, _ in grids], dtype=np.int64)
+    monitored = np.zeros((len(pairs), int(aligned.max()) + stop + 1), dtype=bool)
+    for row, (_, steps) in enumerate(grids):
+        monitored[row, steps + stop] = True
+    group = group.ravel()
+    return aligned[group], monitored[group]
+
+
+def _spot_layer(values, S0, T, sigma, N, greeks):
+    """Precio (o Greeks) con la forma de S0 a partir de la capa de t = 0 de cada fila"""
+    shape = S0.shape
+    if not greeks:
+        return values[:, 0].reshape(shape)
+    step = (sigma * np.sqrt(T / N)).reshape(-1, 1)
+    S = S0.reshape(-1, 1) * np.exp(step * np.array([-2.0, 0.0, 2.0]))
+    delta, gamma = three_point_greeks(S.T, values.T)
+    return Greeks(values[:, 1].reshape(shape), delta.reshape(shape), gamma.reshape(shape))
+
+
+def _binomial_lattice(S0, K, T, r, sigma, N, is_call, H, is_down, rebate, unit, stop=0,
+                      smooth=False, monitored=None):
+    """Inducción hacia atrás in-place de un lote de árboles (arrays 1-D por fila)
+
+    Devuelve los valores (contratos x stop + 1) de los nodos de la capa `stop`;
+    con smooth la inducción arranca en la capa N - 1 con valores cerrados.
+    Filas con H = nan no tienen barrera; con unit=True el payoff es 1. Los
+    contratos se ordenan por N descendente, de modo que en cada paso los que
+    siguen activos forman un prefijo de filas del buffer 2-D preasignado
+    (contratos x nodos) y no hay asignaciones de memoria dentro del bucle.
+    monitored (contratos x capas, bool) limita la barrera a las capas marcadas
+    de cada fila; sin él se monitorea en todas.
+    """
+    if S0.size == 0:
+        return np.empty((0, stop + 1))
+    if np.any(N < stop + 1 + smooth):
+        raise ValueError("N debe ser al menos 1 (2 con suavizado)")
+
+    order = np.argsort(-N, kind='stable')
+    S0, K, T, r, sigma, N, is_call, H, is_down, rebate, unit = (
+        a[order] for a in (S0, K, T, r, sigma, N, is_call, H, is_down, rebate, unit))
+    dt, sq, pu, pd, prices = lattice_geometry(S0, T, r, sigma, N, smooth)
+    if monitored is not None:
+        monitored = monitored[order]
+    if smooth:
+        # La capa inicial de la inducción es la N - 1
+        N = N - 1
+    n_max = int(N[0])
+    V = prices.copy()
+    if smooth:
+        # El paso cerrado hasta T sólo aplica la barrera si T es fecha de monitoreo
+        at_T = H if monitored is None else np.where(monitored[np.arange(len(N)), N + 1], H,
+                                                      np.nan)
+        V = _one_step_values(V, K, dt, r, sigma, is_call, at_T, is_down, rebate, unit)
+    else:
+        V -= K[:, None]
+        V *= np.where(is_call, 1.0, -1.0)[:, None]
+        np.maximum(V, 0, out=V)
+        V[unit] = 1.0
+
+    # Barrera: en el paso i el nodo j está tocado si 2j - i <= a (down) o >= a (up),
+    # con a = ln(H/S0) / (σ√dt); sin barrera los umbrales quedan fuera del árbol
+    barrier = ~np.isnan(H)
+    has_barrier = bool(np.any(barrier))
+    if has_barrier:
+        a = np.log(np.where(barrier, H, S0) / S0) / sq
+        down = barrier & is_down
+        up = barrier & ~is_down
+        columns = np.arange(n_max + 1, dtype=float)
+        knocked = np.empty(V.shape, dtype=bool)
+        above = np.empty(V.shape, dtype=bool)
+        rebate = rebate[:, None]
+        if monitored is None:
+            _knock(V, knocked, above, columns, rebate, a, down, up, N, len(N))
+        else:
+            watch = monitored[np.arange(len(N)), N]
+            _knock(V, knocked, above, columns, rebate, a, down & watch, up & watch, N, len(N))
+
+    if kernels.compiled():
+        # Cada fila completa su inducción en un solo recorrido in-place
+        if not has_barrier:
+            a = np.zeros(len(N))
+            down = up = np.zeros(len(N), dtype=bool)
+        kernels.binomial_induction(V, pu, pd, N.astype(np.int64), stop, a, down, up,
+                                   np.ravel(rebate), monitored)
+    else:
+        tmp = np.empty_like(V)
+        # Cantidad de contratos con N > i para cada paso i
+        n_active = np.searchsorted(-N, -np.arange(n_max), side='left')
+
+        for i in range(n_max - 1, stop - 1, -1):
+            rows = n_active[i]
+            cur = V[:rows, :i + 1]
+            t = tmp[:rows, :i + 1]
+            np.multiply(V[:rows, 1:i + 2], pu[:rows], out=t)
+            cur *= pd[:rows]
+            cur += t
+            if not has_barrier:
+                continue
+            if monitored is None:
+                _knock(V, knocked, above, columns, rebate, a, down, up, i, rows)
+            elif monitored[:rows, i].any():
+                # Sólo capas de fechas de monitoreo, y sólo en las filas que la monitorean
+                watch = monitored[:rows, i]
+                _knock(V, knocked, above, columns, rebate, a, down[:rows] & watch,
+                       up[:rows] & watch, i, rows)
+
+    values = np.empty((len(order), stop + 1))
+    values[order] = V[:, :stop + 1]
+    return values
+
+
+@byte_lru_cache(64 * 2**20)
+def lattice_geometry(S0, T, r, sigma, N, smooth=False):
+    """Δt, σ√Δt, probabilidades descontadas y precios iniciales de un lote de árboles
+
+    Arrays 1-D por fila (ya ordenadas por N descendente). Los precios son los
+    de la capa N (N - 1 con smooth), S0·u^j·d^(N-j), con las columnas j > N
+    repetidas. El resultado queda en caché y es de sólo lectura.
+    """
+    dt = T / N
+    sq = sigma * np.sqrt(dt)
+    u = np.exp(sq)
+    d = 1 / u
+    disc = np.exp(-r * dt)
+    p = (np.exp(r * dt) - d) / (u - d)
+    layer = N - 1 if smooth else N
+    j = np.minimum(np.arange(int(np.max(layer)) + 1)[None, :], layer[:, None])
+    prices = S0[:, None] * np.exp(sq[:, None] * (2 * j - layer[:, None]))
+    return dt, sq, (disc * p)[:, None], (disc * (1 - p))[:, None], prices
+
+
+def _one_step_values(S, K, dt, r, sigma, is_call, H, is_down, rebate, unit):
+    """Valor cerrado a un paso dt del vencimiento en los nodos S (filas = contratos)
+
+    El payoff sólo se cobra si S_T queda del lado vivo de H (intervalo
+    (lo, hi)) y, si no, se cobra el rebate; con unit el payoff es 1. Se arma
+    con activos y efectivo que pagan si S_T > x, evaluados en los extremos.
+    """
+    K, dt, r, sigma, is_call, H, is_down, rebate, unit = (
+        a[:, None] for a in (K, dt, r, sigma, is_call, H, is_down, rebate, unit))
+    vol = sigma * np.sqrt(dt)
+    disc = np.exp(-r * dt)
+
+    def above(x):
+        with np.errstate(divide='ignore'):
+            d2 = (np.log(S / x) + (r - 0.5 * sigma**2) * dt) / vol
+        return S * ndtr(d2 + vol), disc * ndtr(d2)
+
+    barrier = ~np.isnan(H)
+    lo = np.where(barrier & is_down, H, 0.0)
+    hi = np.where(barrier & ~is_down, H, np.inf)
+    # Tramo de S_T en el que el payoff es positivo y la opción sigue viva
+    start = np.where(is_call, np.maximum(K, lo), lo)
+    end = np.where(is_call, np.maximum(hi, start), np.maximum(np.minimum(K, hi), lo))
+    asset_start, cash_start = above(start)
+    asset_end, cash_end = above(end)
+    value = np.where(is_call, 1.0, -1.0) * (asset_start - asset_end - K * (cash_start - cash_end))
+    alive = above(lo)[1] - above(hi)[1]
+    return np.where(unit, alive, value + rebate * (disc - alive))
+
+
+def _knock(V, knocked, above, columns, rebate, a, down, up, step, rows):
+    """Reemplaza por el rebate los nodos tocados de las primeras `rows` filas
+
+    `step` es el paso de la capa guardada en V (escalar, o un array por fila
+    para la capa terminal de contratos con distinto N).
+    """
+    level = (a[:rows] + step) / 2
+    lower = np.where(down[:rows], np.floor(level), -1.0)
+    upper = np.where(up[:rows], np.ceil(level), np.inf)
+    width = int(np.max(step)) + 1
+    k = knocked[:rows, :width]
+    np.less_equal(columns[:width], lower[:, None], out=k)
+    np.greater_equal(columns[:width], upper[:, None], out=above[:rows, :width])
+    k |= above[:rows, :width]
+    np.copyto(V[:rows, :width], rebate[:rows], where=k)
+
+
+def binomial_tree(S0, K, T, r, sigma, N, option_type='put', H=None,
+                  barrier_type=None, rebate=0.0, monitoring_dt=None, greeks=False,
+                  smooth=False, monitoring_dates=None):
+    """Valora una opción europea (vanilla o barrera) con un árbol binomial de N pasos"""
+    result = binomial_batch(S0, K, T, r, sigma, N, option_type, H, barrier_type, rebate,
+                            monitoring_dt, greeks, smooth, monitoring_dates)
+    if greeks:
+        return Greeks(*(float(value) for value in result))
+    return float(result)
+
+
+def richardson_steps(N, levels=2, S0=None, H=None, T=None, sigma=None, monitoring_dt=None,
+                     is_down=True, offset=0.5):
+    """Cantidades de pasos (levels x contratos) para la extrapolación de Richardson
+
+    Sin barrera son N, 2N, 4N, ... redondeados a par. Con barrera el error
+    depende de dónde cae H entre dos niveles de nodos y de la paridad del
+    nivel, así que para cada N·2^k se elige el m_k más cercano con la paridad
+    de m_0 y el N_k real en el que ln(H/S0) mide exactamente m_k + offset pasos
+    σ√dt. Como N_k no es entero (ni par), se devuelve (N_k, N par inferior,
+    peso del árbol con 2 pasos más) para interpolar linealmente en la posición
+    de la barrera entre los dos árboles pares que lo rodean.
+    """
+    N = np.asarray(N, dtype=np.int64)
+    targets = N[None] * 2**np.arange(levels).reshape((-1,) + (1,) * N.ndim)
+    if H is None:
+        return targets + targets % 2
+    if monitoring_dt is not None:
+        H = bgk_barrier(H, sigma, monitoring_dt, is_down)
+    distance = np.abs(np.log(H / S0)) / (sigma * np.sqrt(T))
+    m = np.maximum(np.round(distance * np.sqrt(targets) - offset), 1)
+    for k in range(1, levels):
+        # Misma paridad que m_0 y estrictamente creciente
+        m[k] += (m[k] - m[0]) % 2
+        m[k] = np.maximum(m[k], m[k - 1] + 2)
+    exact = ((m + offset) / distance)**2
+    lower = np.maximum(2 * np.floor(exact / 2).astype(np.int64), 2)
+    position = distance * np.sqrt(lower)
+    blend = (m + offset - position) / (distance * np.sqrt(lower + 2) - position)
+    return exact, lower, blend
+
+
+def binomial_richardson(S0, K, T, r, sigma, N, option_type='put', H=None,
+                        barrier_type=None, rebate=0.0, monitoring_dt=None, levels=2,
+                        smooth=True, greeks=False):
+    """Precio extrapolado (Richardson) de árboles con `levels` cantidades de pasos
+
+    Usa los N_k de richardson_steps (misma paridad y misma alineación de la
+    barrera, de modo que el error decae sin oscilaciones), valora todos los
+    árboles en un único lote de binomial_batch y combina los precios con los
+    pesos de richardson_weights. Sin barrera el error es c_1/N + c_2/N² + ...;
+    con barrera el árbol la monitorea en forma discreta y el error es
+    c_1/√N + c_2/N + ..., así que se anulan potencias de 1/√N. Con smooth (por
+    defecto) el último paso usa el suavizado Black-Scholes. Con greeks se
+    extrapolan también delta y gamma.
+    """
+    if H is None:
+        S0, K, T, r, sigma, N = np.broadcast_arrays(*(np.asarray(a, dtype=float)
+                                                      for a in (S0, K, T, r, sigma, N)))
+        steps = richardson_steps(N.astype(np.int64), levels)
+        values = binomial_batch(S0, K, T, r, sigma, steps, option_type, greeks=greeks,
+                                smooth=smooth)
+        weights = richardson_weights(steps, 1.0)
+
+        def combine(value):
+            return (weights * value).sum(axis=0)[()]
+    else:
+        is_down, _ = barrier_flags(barrier_type)
+        S0, K, T, r, sigma, N, H, is_down = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in (S0, K, T, r, sigma, N, H)),
+            np.asarray(is_down))
+        exact, lower, blend = richardson_steps(N.astype(np.int64), levels, S0, H, T, sigma,
+                                               monitoring_dt, is_down)
+        # Eje 0: árbol par inferior y árbol con 2 pasos más
+        values = binomial_batch(S0, K, T, r, sigma, np.stack([lower, lower + 2]), option_type,
+                                H, barrier_type, rebate, monitoring_dt, greeks, smooth)
+        weights = richardson_weights(exact, 0.5)
+
+        def combine(value):
+            aligned = (1 - blend) * value[0] + blend * value[1]
+            return (weights * aligned).sum(axis=0)[()]
+
+    if greeks:
+        return Greeks(*(combine(value) for value in values))
+    return combine(values)
+
+
+def richardson_weights(steps, power=1.0):
+    """Pesos (levels x contratos) que anulan los términos 1/N^(j·power), j < levels"""
+    levels = len(steps)
+    inverse = np.moveaxis(1.0 / np.asarray(steps, dtype=float), 0, -1)
+    # Sistema por contrato: fila j = (1/N_k)^(j·power); lado derecho = e_0
+    system = inverse[..., None, :] ** (power * np.arange(levels)[:, None])
+    rhs = np.zeros(system.shape[:-1] + (1,))
+    rhs[..., 0, 0] = 1.0
+    return np.moveaxis(np.linalg.solve(system, rhs)[..., 0], -1, 0)
@@ -0,0 +1,136 @@
+"""Caché LRU acotada en bytes para geometrías de malla y coeficientes de transición
+
+Como functools.lru_cache, pero la clave usa los argumentos cuantizados (los
+floats, sueltos o en arrays, se redondean a MANTISSA_BITS bits de mantisa,
+de modo que σ = 0.2 y 0.2 + 1e-17 comparten entrada) y el desalojo es por el
+tamaño en bytes de los resultados guardados y no por cantidad de entradas.
+Los arrays guardados quedan de sólo lectura: quien necesite modificarlos
+debe copiarlos.
+"""
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+import numpy as np
+
+# Bits de mantisa que se conservan al cuantizar (error relativo ~1e-12)
+MANTISSA_BITS = 40
+DEFAULT_MAX_BYTES = 64 * 2**20
+# Bytes que se cuentan por entrada además de los arrays del resultado
+ENTRY_OVERHEAD = 256
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'entries', 'nbytes', 'max_bytes'])
+
+# Cachés creadas con byte_lru_cache, por nombre de la función
+CACHES = {}
+
+_DROPPED_BITS = 52 - MANTISSA_BITS
+_ROUND_MASK = np.int64(~((1 << _DROPPED_BITS) - 1))
+_HALF = np.int64(1 << (_DROPPED_BITS - 1))
+
+
+def quantize(value):
+    """Representación hashable de un argumento con los floats redondeados"""
+    if isinstance(value, (float, np.floating)):
+        return float(round_mantissa(np.float64(value)))
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f':
+            value = round_mantissa(value.astype(np.float64))
+        return value.dtype.str, value.shape, np.ascontiguousarray(value).tobytes()
+    if isinstance(value, (tuple, list)):
+        return tuple(quantize(v) for v in value)
+    return value
+
+
+def round_mantissa(x):
+    """Redondea la mantisa de floats de 64 bits a MANTISSA_BITS bits"""
+    bits = np.asarray(x).view(np.int64)
+    return ((bits + _HALF) & _ROUND_MASK).view(np.float64)
+
+
+def result_nbytes(value):
+    """Bytes que ocupa un resultado: sus arrays (recorriendo tuplas) más un fijo"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(result_nbytes(v) for v in value)
+    return 0
+
+
+def _freeze(value):
+    """Marca como de sólo lectura los arrays de un resultado antes de guardarlo"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class ByteLRUCache:
+    """Diccionario LRU con presupuesto en bytes y contadores de aciertos y fallos"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Valor guardado en key, o compute() guardado si entra en el presupuesto"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        value = _freeze(compute())
+        size = result_nbytes(value) + ENTRY_OVERHEAD
+        if size <= self.max_bytes:
+            self.entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, len(self.entries), self.nbytes, self.max_bytes)
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+def byte_lru_cache(max_bytes=DEFAULT_MAX_BYTES):
+    """Decorador: memoiza la función en una ByteLRUCache de max_bytes
+
+    La función decorada expone cache_info() y cache_clear() como las de
+    functools.lru_cache, y queda registrada en CACHES.
+    """
+    def decorate(function):
+        cache = ByteLRUCache(max_bytes)
+
+        @wraps(function)
+        def cached(*args, **kwargs):
+            key = (quantize(args), quantize(tuple(sorted(kwargs.items()))))
+            return cache.get(key, lambda: function(*args, **kwargs))
+
+        cached.cache_info = cache.info
+        cached.cache_clear = cache.clear
+        CACHES[function.__qualname__] = cache
+        return cached
+    return decorate
+
+
+def cache_info():
+    """CacheInfo de cada caché registrada, por nombre de función"""
+    return {name: cache.info() for name, cache in CACHES.items()}
+
+
+def cache_clear():
+    """Vacía todas las cachés registradas y reinicia sus contadores"""
+    for cache in CACHES.values():
+        cache.clear()
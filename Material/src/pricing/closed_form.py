@@ -0,0 +1,272 @@
+"""Fórmulas cerradas: Black-Scholes, Reiner-Rubinstein y Kunitomo-Ikeda para barreras
+
+Notación de Reiner y Rubinstein (sección 3, método 1): φ = 1 para calls y -1
+para puts, η = 1 si el precio inicia por encima de la barrera y -1 si inicia
+por debajo. Todas las funciones aceptan arrays y difunden sus argumentos.
+"""
+import numpy as np
+from scipy.special import ndtr
+
+from pricing.contracts import barrier_flags, bgk_barrier, knock_flags
+
+# Términos n = -DOUBLE_TERMS..DOUBLE_TERMS de la serie de Kunitomo-Ikeda
+DOUBLE_TERMS = 5
+
+# Filas procesadas por bloque: los temporales de un bloque quedan en caché
+BLOCK_SIZE = 1 << 15
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+# Coeficientes de los términos [1]-[4] según (is_out, η == φ, lado del strike)
+# donde el lado del strike es K > H para calls y K < H para puts
+TERM_WEIGHTS = np.array([
+    # Knock-in
+    [[[0, 1, -1, 1], [1, 0, 0, 0]],     # up-and-in call / down-and-in put
+     [[1, -1, 0, 1], [0, 0, 1, 0]]],    # down-and-in call / up-and-in put
+    # Knock-out
+    [[[1, -1, 1, -1], [0, 0, 0, 0]],    # up-and-out call / down-and-out put
+     [[0, 1, 0, -1], [1, 0, -1, 0]]],   # down-and-out call / up-and-out put
+], dtype=float)
+
+
+def black_scholes(S, K, T, r, sigma, option_type='put'):
+    """Precio Black-Scholes de un call o put europeo"""
+    phi = np.where(np.asarray(option_type) == 'call', 1.0, -1.0)
+    sqrt_T = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / sqrt_T
+    d2 = d1 - sqrt_T
+    return phi * (S * ndtr(phi * d1) - K * np.exp(-r * T) * ndtr(phi * d2))
+
+
+def black_scholes_vega(S, K, T, r, sigma):
+    """Vega Black-Scholes (igual para call y put)"""
+    sqrt_T = np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+    return S * _pdf(d1) * sqrt_T
+
+
+def _pdf(x):
+    """Densidad normal estándar"""
+    return np.exp(-0.5 * x**2) / SQRT_2PI
+
+
+def reiner_rubinstein(S, K, T, r, sigma, H, barrier_type, option_type='put',
+                      rebate=0.0, rebate_at_hit=True, monitoring_dt=None, derivative=None,
+                      monitoring_dates=None):
+    """Precio de Reiner-Rubinstein con barrera continua y rebate
+
+    Todos los argumentos (incluidos barrier_type y option_type) pueden ser
+    arrays, de modo que un lote con los ocho tipos se valora en una pasada.
+    Las knock-in pagan el rebate al vencimiento si la barrera no se tocó
+    (término [5]); las knock-out lo pagan al tocarla (término [6]) o, con
+    rebate_at_hit=False, al vencimiento. Con monitoring_dt se aproxima una
+    barrera monitoreada cada monitoring_dt desplazando H (Broadie-Glasserman-Kou).
+    Con monitoring_dates (fechas Δt, 2Δt, ..., mΔt) se usa la misma
+    corrección con ese Δt; la de BGK supone fechas equiespaciadas desde t=0,
+    así que cualquier otro calendario es un ValueError.
+
+    Con derivative='sigma' (vega) o 'H' devuelve (precio, derivada analítica);
+    con monitoring_dt la derivada incluye el desplazamiento de H, que depende
+    de σ.
+    """
+    if derivative not in (None, 'sigma', 'H'):
+        raise ValueError(f"Derivada desconocida: {derivative}")
+    if monitoring_dates is not None:
+        if monitoring_dt is not None:
+            raise ValueError("monitoring_dt y monitoring_dates son excluyentes")
+        gaps = np.diff(np.unique(np.asarray(monitoring_dates, dtype=float)), prepend=0.0)
+        if gaps.size == 0 or gaps[0] <= 0 or not np.allclose(gaps, gaps[0], rtol=1e-9, atol=0):
+            raise ValueError("La corrección BGK requiere fechas de monitoreo equiespaciadas "
+                             "desde t=0")
+        monitoring_dt = gaps[0]
+    is_down, is_out = barrier_flags(barrier_type)
+    arrays = list(np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (S, K, T, r, sigma, H, rebate)),
+        np.asarray(option_type) == 'call', np.asarray(is_down), np.asarray(is_out),
+        np.asarray(rebate_at_hit)))
+    shape = arrays[0].shape
+    # Dirección (dσ, dH) de la derivada, sobre la barrera efectiva
+    if derivative:
+        d_sigma = np.full(shape, float(derivative == 'sigma'))
+        d_H = np.full(shape, float(derivative == 'H'))
+    if monitoring_dt is not None:
+        S, H, sigma, is_down = arrays[0], arrays[5], arrays[4], arrays[8]
+        knocked = np.where(is_down, S <= H, S >= H)
+        shifted = bgk_barrier(H, sigma, monitoring_dt, is_down)
+        arrays[5] = np.where(knocked, H, shifted)
+        if derivative:
+            # H_ef = H·exp(∓βσ√Δt): dH_ef/dH = H_ef/H y dH_ef/dσ = ∓β√Δt·H_ef
+            d_H = np.where(knocked, d_H,
+                           shifted * (d_H / H + d_sigma * np.log(shifted / H) / sigma))
+    flat = [a.ravel() for a in arrays]
+    tangent = [d_sigma.ravel(), d_H.ravel()] if derivative else []
+
+    price = np.empty(flat[0].size)
+    slope = np.empty(flat[0].size) if derivative else None
+    for start in range(0, price.size, BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        if derivative:
+            price[block], slope[block] = _rr_block(*(a[block] for a in flat + tangent))
+        else:
+            price[block] = _rr_block(*(a[block] for a in flat))
+    if derivative:
+        return price.reshape(shape)[()], slope.reshape(shape)[()]
+    return price.reshape(shape)[()]
+
+
+def _rr_block(S, K, T, r, sigma, H, R, is_call, is_down, is_out, at_hit, d_sigma=None,
+              d_H=None):
+    """Reiner-Rubinstein sobre arrays 1-D; cada intermedio se calcula una vez por fila
+
+    Con d_sigma y d_H devuelve además la derivada del precio en la dirección
+    (dσ, dH), propagada junto a cada intermedio (modo directo).
+    """
+    tangent = d_sigma is not None
+    phi = np.where(is_call, 1.0, -1.0)
+    eta = np.where(is_down, 1.0, -1.0)
+
+    sigma_sqrt_T = sigma * np.sqrt(T)
+    variance = sigma**2
+    mu = r - 0.5 * variance
+    lam = 1 + mu / variance
+    disc = np.exp(-r * T)
+    log_hs = np.log(H / S)
+    shift = lam * sigma_sqrt_T
+
+    # Potencias (H/S)^(2λ) y (H/S)^(2λ-2) desde un único logaritmo
+    hs_2lam_2 = np.exp((2 * lam - 2) * log_hs)
+    hs_2lam = hs_2lam_2 * (H / S)**2
+
+    x = np.log(S / K) / sigma_sqrt_T + shift
+    x1 = shift - log_hs / sigma_sqrt_T
+    y1 = log_hs / sigma_sqrt_T + shift
+    y = y1 + np.log(H / K) / sigma_sqrt_T
+
+    phi_S = phi * S
+    phi_K_disc = phi * K * disc
+    phi_vol = phi * sigma_sqrt_T
+    eta_vol = eta * sigma_sqrt_T
+    t1 = phi_S * ndtr(phi * x) - phi_K_disc * ndtr(phi * x - phi_vol)
+    t2 = phi_S * ndtr(phi * x1) - phi_K_disc * ndtr(phi * x1 - phi_vol)
+    t3 = phi_S * hs_2lam * ndtr(eta * y) - phi_K_disc * hs_2lam_2 * ndtr(eta * y - eta_vol)
+    n_y1 = ndtr(eta * y1 - eta_vol)
+    t4 = phi_S * hs_2lam * ndtr(eta * y1) - phi_K_disc * hs_2lam_2 * n_y1
+
+    strike_side = np.where(is_call, K > H, K < H)
+    weights = TERM_WEIGHTS[is_out.astype(int), (is_down == is_call).astype(int),
+                           strike_side.astype(int)]
+    price = weights[:, 0] * t1 + weights[:, 1] * t2 + weights[:, 2] * t3 + weights[:, 3] * t4
+
+    if tangent:
+        # Derivadas de los intermedios en la dirección (dσ, dH)
+        d_vol = d_sigma * np.sqrt(T)
+        d_lam = -2 * r / sigma**3 * d_sigma
+        d_log_hs = d_H / H
+        d_inv_vol = -d_vol / sigma_sqrt_T**2
+        d_shift = d_lam * sigma_sqrt_T + lam * d_vol
+        d_hs_2lam_2 = hs_2lam_2 * (2 * d_lam * log_hs + (2 * lam - 2) * d_log_hs)
+        d_hs_2lam = hs_2lam * (2 * d_lam * log_hs + 2 * lam * d_log_hs)
+        d_x = np.log(S / K) * d_inv_vol + d_shift
+        d_x1 = d_shift - d_log_hs / sigma_sqrt_T - log_hs * d_inv_vol
+        d_y1 = d_log_hs / sigma_sqrt_T + log_hs * d_inv_vol + d_shift
+        d_y = d_y1 + d_log_hs / sigma_sqrt_T + np.log(H / K) * d_inv_vol
+
+        def d_term(sign, u, d_u, power, d_power, power_2, d_power_2):
+            # Derivada de φS·P·N(s·u) - φK·e^{-rT}·Q·N(s·(u - σ√T))
+            v = u - sigma_sqrt_T
+            return (phi_S * (d_power * ndtr(sign * u) + power * sign * _pdf(u) * d_u)
+                    - phi_K_disc * (d_power_2 * ndtr(sign * v)
+                                    + power_2 * sign * _pdf(v) * (d_u - d_vol)))
+
+        zero, one = np.zeros_like(S), np.ones_like(S)
+        d_t1 = d_term(phi, x, d_x, one, zero, one, zero)
+        d_t2 = d_term(phi, x1, d_x1, one, zero, one, zero)
+        d_t3 = d_term(eta, y, d_y, hs_2lam, d_hs_2lam, hs_2lam_2, d_hs_2lam_2)
+        d_t4 = d_term(eta, y1, d_y1, hs_2lam, d_hs_2lam, hs_2lam_2, d_hs_2lam_2)
+        slope = (weights[:, 0] * d_t1 + weights[:, 1] * d_t2 + weights[:, 2] * d_t3
+                 + weights[:, 3] * d_t4)
+
+    # [5]: valor presente de R pagado al vencimiento si la barrera no se tocó
+    if np.any(R != 0):
+        survival = disc * (ndtr(eta * x1 - eta_vol) - hs_2lam_2 * n_y1)
+        in_rebate = R * survival
+        # [6]: valor presente de R pagado en el primer instante en que se toca
+        a = mu / variance
+        root = np.sqrt(mu**2 + 2 * r * variance)
+        b = root / variance
+        z = log_hs / sigma_sqrt_T + b * sigma_sqrt_T
+        w = z - 2 * b * sigma_sqrt_T
+        hit_plus = np.exp((a + b) * log_hs)
+        hit_minus = np.exp((a - b) * log_hs)
+        hit_rebate = R * (hit_plus * ndtr(eta * z) + hit_minus * ndtr(eta * w))
+        out_rebate = np.where(at_hit, hit_rebate, R * disc - in_rebate)
+        price += np.where(is_out, out_rebate, in_rebate)
+
+        if tangent:
+            x1_v, y1_v = x1 - sigma_sqrt_T, y1 - sigma_sqrt_T
+            d_in_rebate = R * disc * (eta * _pdf(x1_v) * (d_x1 - d_vol)
+                                      - d_hs_2lam_2 * n_y1
+                                      - hs_2lam_2 * eta * _pdf(y1_v) * (d_y1 - d_vol))
+            d_root = sigma * (2 * r - mu) / root * d_sigma
+            d_b = d_root / variance - 2 * root / sigma**3 * d_sigma
+            d_z = d_log_hs / sigma_sqrt_T + log_hs * d_inv_vol + d_b * sigma_sqrt_T + b * d_vol
+            d_w = d_z - 2 * (d_b * sigma_sqrt_T + b * d_vol)
+            d_hit_rebate = R * (
+                hit_plus * ((d_lam + d_b) * log_hs + (a + b) * d_log_hs) * ndtr(eta * z)
+                + hit_plus * eta * _pdf(z) * d_z
+                + hit_minus * ((d_lam - d_b) * log_hs + (a - b) * d_log_hs) * ndtr(eta * w)
+                + hit_minus * eta * _pdf(w) * d_w)
+            d_out_rebate = np.where(at_hit, d_hit_rebate, -d_in_rebate)
+            slope += np.where(is_out, d_out_rebate, d_in_rebate)
+
+    # Barrera ya tocada en t = 0: la knock-out paga el rebate y la knock-in es vanilla
+    knocked = np.where(is_down, S <= H, S >= H)
+    if np.any(knocked):
+        vanilla = black_scholes(S, K, T, r, sigma, np.where(is_call, 'call', 'put'))
+        knocked_out = np.where(at_hit, R, R * disc)
+        price = np.where(knocked, np.where(is_out, knocked_out, vanilla), price)
+        if tangent:
+            vega = black_scholes_vega(S, K, T, r, sigma) * d_sigma
+            slope = np.where(knocked, np.where(is_out, 0.0, vega), slope)
+    if tangent:
+        return price, slope
+    return price
+
+
+def kunitomo_ikeda(S, K, T, r, sigma, L, U, barrier_type='knock-out', option_type='put',
+                   terms=DOUBLE_TERMS):
+    """Precio de Kunitomo-Ikeda de una opción con barreras constantes L < S < U, sin rebate
+
+    La knock-out es la serie de imágenes n = -terms..terms (la convergencia es
+    muy rápida salvo con σ²T grande frente a ln(U/L)²) y la knock-in sale por
+    paridad con Black-Scholes. Un call paga en (max(K, L), U) y un put en
+    (L, min(K, U)): la serie se evalúa entre esos extremos.
+    """
+    is_out = knock_flags(barrier_type)
+    S, K, T, r, sigma, L, U, is_out, is_call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (S, K, T, r, sigma, L, U)), np.asarray(is_out),
+        np.asarray(option_type) == 'call')
+    phi = np.where(is_call, 1.0, -1.0)
+    start = np.where(is_call, np.maximum(K, L), L)
+    end = np.where(is_call, U, np.minimum(K, U))
+    n = np.arange(-terms, terms + 1).reshape((-1,) + (1,) * S.ndim)
+    vol = sigma * np.sqrt(T)
+    mu = 2 * r / sigma**2 + 1
+    drift = (r + 0.5 * sigma**2) * T
+    up = (U / L)**n
+    image = L**(n + 1) / (U**n * S)
+
+    def between(a, b):
+        # Activo y efectivo que pagan si a < S_T < b sin tocar las barreras, término a término
+        d_a, d_b = ((np.log(S * up**2 / x) + drift) / vol for x in (a, b))
+        e_a, e_b = ((np.log(image**2 * S / x) + drift) / vol for x in (a, b))
+        asset = up**mu * (ndtr(d_a) - ndtr(d_b)) - image**mu * (ndtr(e_a) - ndtr(e_b))
+        cash = (up**(mu - 2) * (ndtr(d_a - vol) - ndtr(d_b - vol))
+                - image**(mu - 2) * (ndtr(e_a - vol) - ndtr(e_b - vol)))
+        return S * asset.sum(axis=0), np.exp(-r * T) * cash.sum(axis=0)
+
+    asset, cash = between(start, end)
+    knockout = np.where(start < end, phi * (asset - K * cash), 0.0)
+    knockout = np.where((S <= L) | (S >= U), 0.0, knockout)
+    price = np.where(is_out, knockout, black_scholes(S, K, T, r, sigma, option_type) - knockout)
+    return price[()]
@@ -0,0 +1,159 @@
+"""Convenciones comunes de contratos: tipos de barrera, payoffs vanilla y griegas"""
+import math
+from collections import namedtuple
+from fractions import Fraction
+
+import numpy as np
+
+BARRIER_TYPES = ('down-and-out', 'down-and-in', 'up-and-out', 'up-and-in')
+
+# Precio, delta y gamma en S0 leídos de una sola inducción (greeks=True)
+Greeks = namedtuple('Greeks', ['price', 'delta', 'gamma'])
+
+
+def barrier_flags(barrier_type):
+    """Devuelve (is_down, is_out) para un tipo de barrera (escalar o array)"""
+    barrier_type = np.asarray(barrier_type)
+    unknown = ~np.isin(barrier_type, BARRIER_TYPES)
+    if np.any(unknown):
+        raise ValueError(f"Tipo de barrera desconocido: {barrier_type[unknown].ravel()[0]}")
+    is_down = np.char.startswith(barrier_type.astype(str), 'down')
+    is_out = np.char.endswith(barrier_type.astype(str), 'out')
+    if is_down.ndim == 0:
+        return bool(is_down), bool(is_out)
+    return is_down, is_out
+
+
+def vanilla_payoff(S, K, option_type='put'):
+    """Payoff al vencimiento de un call o put europeo (K y option_type pueden ser arrays)"""
+    phi = np.where(np.asarray(option_type) == 'call', 1.0, -1.0)
+    return np.maximum(phi * (S - K), 0)
+
+
+def three_point_greeks(S, V):
+    """Delta y gamma en el nodo central de tres nodos S[0] < S[1] < S[2] (primer eje)
+
+    Diferencias de segundo orden para espaciado no uniforme, como el de los
+    nodos S0·e^{-h}, S0, S0·e^{h} de un árbol en log-precio.
+    """
+    down, up = S[1] - S[0], S[2] - S[1]
+    slope_down = (V[1] - V[0]) / down
+    slope_up = (V[2] - V[1]) / up
+    delta = (slope_down * up + slope_up * down) / (down + up)
+    gamma = 2 * (slope_up - slope_down) / (down + up)
+    return delta, gamma
+
+
+# β = -ζ(1/2) / √(2π) de Broadie, Glasserman y Kou (1997)
+BGK_BETA = 0.5825971579390106
+
+
+def bgk_barrier(H, sigma, monitoring_dt, is_down):
+    """Barrera continua equivalente a monitorear H cada monitoring_dt (BGK)
+
+    El precio con monitoreo discreto se aproxima por el de barrera continua
+    en H·exp(∓βσ√Δt), alejando la barrera del precio inicial.
+    """
+    shift = BGK_BETA * sigma * np.sqrt(monitoring_dt)
+    return H * np.exp(np.where(is_down, -shift, shift))
+
+
+def monitoring_times(dates, T):
+    """Fechas de monitoreo de la barrera ordenadas y sin repetir, en (0, T]"""
+    dates = np.unique(np.asarray(dates, dtype=float))
+    if dates.size == 0 or dates[0] <= 0 or dates[-1] > T * (1 + 1e-12):
+        raise ValueError("Las fechas de monitoreo deben estar en (0, T]")
+    return np.minimum(dates, T)
+
+
+def monitoring_grid(dates, T, N):
+    """(N', pasos) de una grilla uniforme con las fechas de monitoreo sobre pasos
+
+    N' es el menor N' ≥ N en el que cada fecha t cae exactamente sobre un paso
+    (t/T = a/b con b | N'), siempre que no pase de 2N; si no existe, N' = N y
+    cada fecha se redondea al paso más cercano. `pasos` son los índices
+    1..N' monitoreados, sin repetir.
+    """
+    N = int(N)
+    dates = monitoring_times(dates, T)
+    period = 1
+    for fraction in dates / T:
+        ratio = Fraction(float(fraction)).limit_denominator(2 * N)
+        if abs(float(ratio) - fraction) > 1e-9:
+            period = None
+            break
+        period = math.lcm(period, ratio.denominator)
+        if period > 2 * N:
+            period = None
+            break
+    if period is not None:
+        N = period * -(-N // period)
+    steps = np.unique(np.clip(np.round(dates / T * N).astype(np.int64), 1, N))
+    return N, steps
+
+
+# Barreras inferior y superior por tramos [times[j], times[j + 1]] (nan = sin barrera)
+BarrierSchedule = namedtuple('BarrierSchedule', ['times', 'lower', 'upper'])
+
+KNOCK_TYPES = ('knock-out', 'knock-in')
+
+
+def barrier_schedule(T, lower=None, upper=None):
+    """BarrierSchedule común a partir de barreras constantes o escalonadas
+
+    lower y upper son None, un nivel constante o un par (fechas, niveles) de
+    una barrera escalonada: niveles[0] rige hasta fechas[0], niveles[i] entre
+    fechas[i - 1] y fechas[i] y el último hasta T, con nan donde no hay
+    barrera. Los cortes de ambas se unen en times = (0, cortes..., T).
+    """
+    cuts = []
+    sides = []
+    for side in (lower, upper):
+        if side is None:
+            side = ((), (np.nan,))
+        elif not isinstance(side, (tuple, list)):
+            side = ((), (float(side),))
+        dates, levels = (np.asarray(a, dtype=float).ravel() for a in side)
+        if len(levels) != len(dates) + 1:
+            raise ValueError("Una barrera escalonada necesita un nivel más que fechas de cambio")
+        if np.any(np.diff(dates) <= 0) or np.any((dates <= 0) | (dates >= T)):
+            raise ValueError("Las fechas de cambio de barrera deben ser crecientes "
+                             "y estar en (0, T)")
+        cuts.append(dates)
+        sides.append((dates, levels))
+    times = np.union1d(np.concatenate(cuts), [0.0, T])
+    middle = 0.5 * (times[:-1] + times[1:])
+    lower, upper = (levels[np.searchsorted(dates, middle)] for dates, levels in sides)
+    if np.any(lower >= upper):
+        raise ValueError("La barrera inferior debe estar debajo de la superior en cada tramo")
+    return BarrierSchedule(times, lower, upper)
+
+
+def knock_flags(barrier_type):
+    """Devuelve is_out para 'knock-out' o 'knock-in' (escalar o array)"""
+    barrier_type = np.asarray(barrier_type)
+    unknown = ~np.isin(barrier_type, KNOCK_TYPES)
+    if np.any(unknown):
+        raise ValueError(f"Tipo de barrera desconocido: {barrier_type[unknown].ravel()[0]}")
+    is_out = barrier_type == 'knock-out'
+    return bool(is_out) if is_out.ndim == 0 else is_out
+
+
+def schedule_steps(schedule, N):
+    """Barreras (inferior, superior) vigentes en cada paso 0..N de una grilla uniforme
+
+    Los cortes de schedule.times deben caer sobre pasos (ver monitoring_grid).
+    En un corte rigen las barreras de los dos tramos que se tocan: la
+    inferior más alta y la superior más baja.
+    """
+    T = schedule.times[-1]
+    cuts = np.round(schedule.times / T * N).astype(np.int64)
+    lower = np.full(N + 1, -np.inf)
+    upper = np.full(N + 1, np.inf)
+    for j in range(len(cuts) - 1):
+        span = slice(cuts[j], cuts[j + 1] + 1)
+        if not np.isnan(schedule.lower[j]):
+            lower[span] = np.maximum(lower[span], schedule.lower[j])
+        if not np.isnan(schedule.upper[j]):
+            upper[span] = np.minimum(upper[span], schedule.upper[j])
+    return lower, upper
@@ -0,0 +1,316 @@
+"""Diferencias finitas θ (explícito, implícito, Crank-Nicolson) con la malla alineada a H y K
+
+Se resuelve la ecuación de Black-Scholes en x = ln(S/S0) y en tiempo al
+vencimiento τ,
+
+    V_τ = ½σ² V_xx + (r - σ²/2) V_x - r V,
+
+sobre una malla no uniforme cuyos nodos incluyen exactamente H, S0 y los
+strikes, y que se densifica alrededor de ellos (aligned_grid). Cada paso θ
+resuelve un sistema tridiagonal con las mismas matrices en todos los pasos:
+se factoriza una vez (LAPACK gttrf, o Thomas en pricing.kernels con el
+backend compilado) y cada paso sólo sustituye, con todos los contratos como
+columnas del lado derecho.
+
+Con Crank-Nicolson los primeros pasos son semipasos implícitos (Rannacher),
+que amortiguan las oscilaciones que dejan el quiebre del payoff en K y el
+salto en H.
+"""
+import numpy as np
+from scipy.linalg.lapack import dgttrf, dgttrs
+
+from pricing import kernels
+from pricing.contracts import Greeks, barrier_flags, bgk_barrier, three_point_greeks
+
+SCHEMES = {'explicit': 0.0, 'implicit': 1.0, 'crank-nicolson': 0.5}
+
+# Semiancho del dominio en desvíos estándar σ√T de ln S
+DOMAIN_STDS = 5.0
+# Densidad relativa de nodos en H, S0 y los strikes respecto de lejos de ellos
+CONCENTRATION = 8.0
+# Ancho (en desvíos σ√T) de la zona densificada alrededor de cada punto
+FOCUS_WIDTH = 0.2
+# Pasos mínimos en el espacio: al menos dos nodos interiores
+MIN_SPACE_STEPS = 4
+
+
+def aligned_grid(points, low, high, M, width):
+    """Malla de unos M + 1 nodos en [low, high] con points (en ese orden de prioridad) sobre nodos
+
+    La densidad de nodos es 1 + CONCENTRATION·Σ 1/√(1 + ((x - p)/width)²),
+    al estilo de las mallas sinh de Tavella-Randall. Entre dos puntos
+    consecutivos los nodos se reparten uniformemente en la densidad
+    acumulada, así que cada punto queda exactamente en un nodo. Un punto a
+    menos de media celda de otro de mayor prioridad se descarta.
+    """
+    def cumulative(x):
+        # Integral de la densidad desde low
+        x = np.asarray(x, dtype=float)
+        mass = x - low
+        for p in points:
+            mass = mass + CONCENTRATION * width * (np.arcsinh((x - p) / width)
+                                                   - np.arcsinh((low - p) / width))
+        return mass
+
+    # Tabla para invertir la densidad acumulada
+    fine = np.linspace(low, high, 8 * M + 1)
+    mass = cumulative(fine)
+    gap = 0.5 * mass[-1] / M
+    pins = [low, high]
+    for p in points:
+        if low < p < high and np.min(np.abs(cumulative(np.array(pins)) - cumulative(p))) > gap:
+            pins.append(p)
+    pins = np.sort(pins)
+    nodes = [pins[:1]]
+    for a, b in zip(pins[:-1], pins[1:]):
+        count = max(1, int(round(M * (cumulative(b) - cumulative(a)) / mass[-1])))
+        nodes.append(np.interp(np.linspace(cumulative(a), cumulative(b), count + 1)[1:], mass,
+                               fine))
+        nodes[-1][-1] = b
+    return np.concatenate(nodes)
+
+
+def stable_space_steps(points, low, high, width, limit, M):
+    """Mayor M' <= M (y >= MIN_SPACE_STEPS) cuya malla aligned_grid tiene celdas de al menos √limit
+
+    Con limit = (1 - 2θ)Δτ·σ² es la condición de estabilidad de un paso θ
+    con θ < 1/2. Devuelve None si ninguna malla la cumple (por ejemplo, con
+    dos puntos a menos de √limit).
+    """
+    while M >= MIN_SPACE_STEPS:
+        smallest = np.diff(aligned_grid(points, low, high, M, width)).min()
+        if smallest**2 >= limit:
+            return M
+        # La menor celda escala como 1/M; a lo sumo se divide M por dos
+        M = min(M - 1, max(int(M * smallest / np.sqrt(limit)), M // 2, MIN_SPACE_STEPS))
+    return None
+
+
+def pde_operator(x, r, sigma):
+    """Coeficientes (sub, diag, super) de ½σ²∂xx + (r - σ²/2)∂x - r en los nodos interiores
+
+    Diferencias centradas de segundo orden para espaciado no uniforme; arrays
+    del largo de x con ceros en los extremos.
+    """
+    down, up = np.diff(x)[:-1], np.diff(x)[1:]
+    variance, drift = 0.5 * sigma**2, r - 0.5 * sigma**2
+    lower, diag, upper = (np.zeros_like(x) for _ in range(3))
+    lower[1:-1] = (2 * variance - drift * up) / (down * (down + up))
+    upper[1:-1] = (2 * variance + drift * down) / (up * (down + up))
+    diag[1:-1] = -(2 * variance - drift * (up - down)) / (down * up) - r
+    return lower, diag, upper
+
+
+def finite_difference_price(S0, K, T, r, sigma, N, option_type='put', H=None,
+                            barrier_type=None, rebate=0.0, rebate_at_hit=True,
+                            monitoring_dt=None, greeks=False, scheme='crank-nicolson',
+                            space_steps=None, rannacher=2):
+    """Valora opciones vanilla o barrera con un esquema θ de N pasos en el tiempo
+
+    scheme es 'explicit', 'implicit', 'crank-nicolson' o un θ en [0, 1]. La
+    malla tiene unos space_steps + 1 nodos (al menos MIN_SPACE_STEPS; por
+    defecto 2N + 1, como la última capa de trinomial_tree) en ±DOMAIN_STDS
+    desvíos de ln S0, extendida hasta H si hace falta. Con θ < 1/2 el
+    esquema sólo es estable si (1 - 2θ)Δτ·σ² no supera el cuadrado de la
+    menor celda: por defecto se toma la malla más fina que lo cumple (del
+    orden de 2√N pasos, ver stable_space_steps) y un space_steps inestable
+    es un ValueError. Con θ < 1 los primeros `rannacher` pasos se
+    reemplazan por dos semipasos implícitos cada uno.
+
+    Las convenciones de rebate y de knock-in son las de trinomial_tree:
+    las knock-out valen el rebate en H (ahí se impone como condición de
+    borde) y las knock-in se obtienen por paridad, vanilla - knock-out sin
+    rebate + rebate por el valor de cobrar 1 al vencimiento sin tocar H.
+    monitoring_dt desplaza H según Broadie-Glasserman-Kou. K, option_type,
+    rebate y barrier_type pueden ser arrays (barreras todas del mismo lado):
+    cada contrato es una columna del mismo sistema; como todos los strikes
+    quedan sobre nodos, el precio de un contrato depende (dentro del error de
+    discretización) de los demás strikes del lote. Con greeks=True devuelve
+    Greeks(price, delta, gamma), leídas de los nodos vecinos de S0.
+    """
+    K, option_type, rebate = np.broadcast_arrays(np.asarray(K, dtype=float),
+                                                 np.asarray(option_type),
+                                                 np.asarray(rebate, dtype=float))
+    if barrier_type is not None:
+        K, option_type, rebate, barrier_type = np.broadcast_arrays(K, option_type, rebate,
+                                                                   np.asarray(barrier_type))
+    shape = K.shape
+    K, option_type, rebate = K.ravel(), option_type.ravel(), rebate.ravel()
+    theta = SCHEMES[scheme] if isinstance(scheme, str) else float(scheme)
+    if not 0 <= theta <= 1:
+        raise ValueError("θ debe estar en [0, 1]")
+    if space_steps is not None and space_steps < MIN_SPACE_STEPS:
+        raise ValueError(f"space_steps debe ser al menos {MIN_SPACE_STEPS}")
+    phi = np.where(option_type == 'call', 1.0, -1.0)
+
+    points = [0.0]
+    if H is not None:
+        is_down, is_out = barrier_flags(barrier_type.ravel())
+        if len(set(is_down)) > 1:
+            raise ValueError("Todas las barreras de una misma malla deben ser del mismo lado")
+        is_down = bool(is_down[0])
+        if (S0 <= H) if is_down else (S0 >= H):
+            # Barrera ya tocada en t=0: las knock-out valen el rebate, las knock-in la vanilla
+            vanilla = finite_difference_price(S0, K, T, r, sigma, N, option_type, greeks=greeks,
+                                              scheme=scheme, space_steps=space_steps,
+                                              rannacher=rannacher)
+            if not greeks:
+                return np.where(is_out, rebate, vanilla).reshape(shape)[()]
+            return Greeks(*(np.where(is_out, knocked, value).reshape(shape)[()]
+                            for knocked, value in zip((rebate, 0.0, 0.0), vanilla)))
+        if monitoring_dt is not None:
+            H = bgk_barrier(H, sigma, monitoring_dt, is_down)
+        points.insert(0, np.log(H / S0))
+    points += list(np.log(K / S0))
+
+    spread = sigma * np.sqrt(T)
+    low, high = -DOMAIN_STDS * spread, DOMAIN_STDS * spread
+    if H is not None:
+        low, high = min(low, points[0]), max(high, points[0])
+    width = FOCUS_WIDTH * spread
+    M = max(2 * N, MIN_SPACE_STEPS) if space_steps is None else space_steps
+    if theta < 0.5:
+        stable = stable_space_steps(points, low, high, width, (1 - 2 * theta) * T / N * sigma**2,
+                                    M)
+        if stable is None:
+            raise ValueError(f"El esquema θ={theta:g} es inestable en toda malla con N={N}: "
+                             "aumentar N o usar θ >= 1/2")
+        if space_steps is not None and stable < space_steps:
+            raise ValueError(f"El esquema θ={theta:g} es inestable con space_steps={space_steps} "
+                             f"y N={N}: usar space_steps <= {stable}")
+        M = stable
+    x = aligned_grid(points, low, high, M, width)
+    S = S0 * np.exp(x)
+    center = int(np.argmin(np.abs(x)))
+
+    # Columnas: sobre toda la malla, las vanillas de las knock-in; sobre
+    # [barrera, extremo], las knock-out, las knock-in sin rebate y la que paga
+    # 1 al vencimiento si no se tocó H
+    if H is None:
+        ki = np.arange(len(K))
+        groups = [(0, len(x) - 1, K, phi, None, np.zeros(len(K), bool))]
+    else:
+        ki = np.flatnonzero(~is_out)
+        b = int(np.argmin(np.abs(x - points[0])))
+        first, last = (b, len(x) - 1) if is_down else (0, b)
+        unit = np.zeros(len(K) + 1, dtype=bool)
+        unit[-1] = True
+        groups = [(0, len(x) - 1, K[ki], phi[ki], None, np.zeros(len(ki), bool)),
+                  (first, last, np.append(K, 0.0), np.append(phi, 1.0),
+                   np.append(np.where(is_out, rebate, 0.0), 0.0), unit)]
+    lower, diag, upper = pde_operator(x, r, sigma)
+
+    # Etapas (θ, Δτ): los semipasos implícitos de Rannacher y el esquema elegido
+    dtau = T / N
+    smoothing = min(rannacher, N) if theta < 1 else 0
+    stages = [(1.0, dtau / 2), (theta, dtau)]
+    plan = np.repeat([0, 1], [2 * smoothing, N - smoothing])
+    tau = np.concatenate([[0.0], np.cumsum([stages[stage][1] for stage in plan])])
+    columns = []
+    for first, last, strike, sign, hit, unit in groups:
+        if len(strike) == 0:
+            columns.append(np.empty((len(x), 0)))
+            continue
+        # hit: rebate de cada columna en el extremo de la barrera (None sin barrera)
+        edge = None if hit is None else (0 if is_down else 1)
+        V = np.where(unit, 1.0, np.maximum(sign * (S[:, None] - strike), 0))
+        low_edge, high_edge = _edges(S, strike, sign, hit, edge, unit, r, tau, rebate_at_hit,
+                                     first, last)
+        V[first], V[last] = low_edge[0], high_edge[0]
+        _march(V, first, last, [_stage(lower, diag, upper, first, last, weight * step,
+                                       (1 - weight) * step) for weight, step in stages],
+               plan, low_edge[1:], high_edge[1:])
+        if first > 0:
+            V[:first] = V[first]
+        if last < len(x) - 1:
+            V[last + 1:] = V[last]
+        columns.append(V)
+
+    if H is None:
+        values = columns[0]
+    else:
+        vanilla, knockout = columns
+        values = knockout[:, :len(K)].copy()
+        values[:, ki] = vanilla - knockout[:, ki] + rebate[ki] * knockout[:, -1:]
+    values = values[center - 1:center + 2]
+    if greeks:
+        delta, gamma = three_point_greeks(S[center - 1:center + 2, None], values)
+        values = (values[1], delta, gamma)
+        if shape:
+            return Greeks(*(v.reshape(shape) for v in values))
+        return Greeks(*(float(v[0]) for v in values))
+    return values[1].reshape(shape) if shape else float(values[1, 0])
+
+
+def _edges(S, strike, sign, hit, edge, unit, r, tau, rebate_at_hit, first, last):
+    """Valores de borde (extremo inferior, superior) de cada columna en cada τ (τ x columnas)
+
+    En el extremo `edge` (0, 1 o None), el de la barrera, vale el rebate hit
+    (descontado desde el vencimiento si no se paga al tocar; 0 en la columna
+    unitaria); en los extremos lejanos, el intrínseco con el strike
+    descontado (e^{-rτ} en la columna unitaria).
+    """
+    disc = np.exp(-r * tau)[:, None]
+    far = [np.where(unit, disc, np.maximum(sign * (S[i] - strike * disc), 0))
+           for i in (first, last)]
+    if edge is not None:
+        far[edge] = np.broadcast_to(hit if rebate_at_hit else hit * disc, far[edge].shape)
+    return [np.ascontiguousarray(values) for values in far]
+
+
+def _stage(lower, diag, upper, first, last, implicit, explicit):
+    """Operadores de un paso θ en los nodos interiores first + 1 .. last - 1
+
+    Devuelve (E, A, factorización de A): las filas de E = I + explicit·L y de
+    A = I - implicit·L son (sub, diag, super), con implicit = θΔτ y explicit
+    = (1 - θ)Δτ. La factorización es la de kernels.thomas_factor con el
+    backend compilado, la de LAPACK gttrf si no, y None si A = I. gttrf
+    (scipy) no admite sistemas de menos de tres nodos: para ellos se
+    devuelve la inversa de A, que con un solo nodo es 1/A.
+    """
+    inner = slice(first + 1, last)
+    E = np.array([explicit * lower[inner], 1 + explicit * diag[inner], explicit * upper[inner]])
+    A = np.array([-implicit * lower[inner], 1 - implicit * diag[inner], -implicit * upper[inner]])
+    if kernels.compiled():
+        return E, A, kernels.thomas_factor(A)
+    if implicit == 0:
+        return E, A, None
+    if A.shape[1] < 3:
+        dense = np.diag(A[1]) + np.diag(A[0, 1:], -1) + np.diag(A[2, :-1], 1)
+        return E, A, np.linalg.inv(dense)
+    *factor, info = dgttrf(A[0, 1:], A[1], A[2, :-1])
+    if info != 0:
+        raise np.linalg.LinAlgError("Sistema tridiagonal singular")
+    return E, A, factor
+
+
+def _march(V, first, last, stages, plan, low_edge, high_edge):
+    """Pasos θ in-place de las columnas de V en los nodos first..last
+
+    plan[n] es la etapa (índice en stages) del paso n y low_edge[n],
+    high_edge[n] los valores de borde al terminarlo.
+    """
+    if kernels.compiled():
+        E, A, factor = (np.array(part) for part in zip(*stages))
+        kernels.theta_march(V, first, last, E, A, factor, plan, low_edge, high_edge)
+        return
+    inner = slice(first + 1, last)
+    rhs, tmp = np.empty_like(V[inner]), np.empty_like(V[inner])
+    stages = [(E[:, :, None], A, factor) for E, A, factor in stages]
+    for step, stage in enumerate(plan):
+        E, A, factor = stages[stage]
+        np.multiply(V[first:last - 1], E[0], out=rhs)
+        rhs += np.multiply(V[inner], E[1], out=tmp)
+        rhs += np.multiply(V[first + 2:last + 1], E[2], out=tmp)
+        V[first], V[last] = low_edge[step], high_edge[step]
+        if factor is None:
+            V[inner] = rhs
+            continue
+        # Bordes del paso nuevo, del lado derecho
+        rhs[0] -= A[0, 0] * V[first]
+        rhs[-1] -= A[2, -1] * V[last]
+        if isinstance(factor, np.ndarray):
+            # Menos de tres nodos interiores: la inversa de _stage
+            V[inner] = factor @ rhs
+        else:
+            V[inner] = dgttrs(*factor, rhs)[0]
@@ -0,0 +1,170 @@
+"""Volatilidad y barrera implícitas por lotes sobre las fórmulas cerradas
+
+Cada fila se resuelve con Newton usando la derivada analítica (vega o dV/dH)
+dentro de un intervalo que encierra la raíz: si el paso de Newton sale del
+intervalo se bisecta, como en los híbridos Newton-Brent (rtsafe). Las filas
+llevan su propia máscara de convergencia y salen del conjunto activo en
+cuanto convergen, de modo que cada iteración sólo vuelve a valorar las que
+faltan.
+"""
+import numpy as np
+
+from pricing.closed_form import black_scholes, black_scholes_vega, reiner_rubinstein
+from pricing.contracts import barrier_flags
+
+# Intervalo de búsqueda de σ y grilla donde se busca el primer cambio de signo:
+# BRACKET_POINTS puntos y hasta BRACKET_ZOOMS acercamientos a picos o valles
+SIGMA_BOUNDS = (0.01, 4.0)
+BRACKET_POINTS = 16
+BRACKET_ZOOMS = 3
+# Ancho de la barrera implícita: hasta BARRIER_WIDTH desviaciones σ√T de S
+BARRIER_WIDTH = 6.0
+
+
+def implied_volatility(price, S, K, T, r, option_type='put', H=None, barrier_type=None,
+                       rebate=0.0, rebate_at_hit=True, monitoring_dt=None,
+                       bounds=SIGMA_BOUNDS, tol=1e-10, max_iter=50):
+    """σ implícita de precios vanilla (Black-Scholes) o barrera (Reiner-Rubinstein)
+
+    Todos los argumentos se difunden entre sí y el resultado tiene la forma
+    común. Una barrera no es monótona en σ (una knock-out puede perder valor
+    al subir σ porque aumenta la probabilidad de tocarla), así que el intervalo
+    inicial es el primer cambio de signo en una grilla geométrica de
+    BRACKET_POINTS volatilidades en bounds (ver _bracket): se devuelve la menor
+    σ encontrada que reproduce el precio, y nan si no hay ninguna.
+    """
+    if H is None:
+        arrays = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, S, K, T, r)),
+                                     np.asarray(option_type))
+        shape = arrays[0].shape
+        price, S, K, T, r, option_type = (a.ravel() for a in arrays)
+
+        def value(sigma, rows, slope=True):
+            args = _rows((S, K, T, r), rows, sigma.ndim)
+            call = black_scholes(*args, sigma, _rows((option_type,), rows, sigma.ndim)[0])
+            if not slope:
+                return call
+            return call, black_scholes_vega(*args, sigma)
+        points, zooms = 2, 0  # Black-Scholes es creciente en σ
+    else:
+        arrays = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in (price, S, K, T, r, H, rebate)),
+            np.asarray(barrier_type), np.asarray(option_type), np.asarray(rebate_at_hit))
+        shape = arrays[0].shape
+        price, *contract = (a.ravel() for a in arrays)
+
+        def value(sigma, rows, slope=True):
+            S, K, T, r, H, rebate, barrier_type, option_type, at_hit = _rows(contract, rows,
+                                                                             sigma.ndim)
+            return reiner_rubinstein(S, K, T, r, sigma, H, barrier_type, option_type, rebate,
+                                     at_hit, monitoring_dt, 'sigma' if slope else None)
+        points, zooms = BRACKET_POINTS, BRACKET_ZOOMS
+
+    n = price.size
+    lo, hi = np.full(n, float(bounds[0])), np.full(n, float(bounds[1]))
+    return _solve(value, price, lo, hi, points, zooms, tol, max_iter).reshape(shape)[()]
+
+
+def implied_barrier(price, S, K, T, r, sigma, barrier_type, option_type='put', rebate=0.0,
+                    rebate_at_hit=True, monitoring_dt=None, tol=1e-10, max_iter=50):
+    """Barrera H implícita de precios Reiner-Rubinstein, con la forma común
+
+    H se busca del lado correcto de S (debajo para down, encima para up) hasta
+    BARRIER_WIDTH desviaciones σ√T; con rebate el precio puede no ser
+    monótono en H y se devuelve la barrera encontrada más cercana a S. Filas
+    sin solución devuelven nan.
+    """
+    arrays = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (price, S, K, T, r, sigma, rebate)),
+        np.asarray(barrier_type), np.asarray(option_type), np.asarray(rebate_at_hit))
+    shape = arrays[0].shape
+    price, *contract = (a.ravel() for a in arrays)
+    S, T, sigma, barrier_type = contract[0], contract[2], contract[4], contract[6]
+    is_down, _ = barrier_flags(barrier_type)
+    is_down = np.asarray(is_down)
+
+    def value(H, rows, slope=True):
+        S, K, T, r, sigma, rebate, barrier_type, option_type, at_hit = _rows(contract, rows,
+                                                                             H.ndim)
+        return reiner_rubinstein(S, K, T, r, sigma, H, barrier_type, option_type, rebate,
+                                 at_hit, monitoring_dt, 'H' if slope else None)
+
+    # Intervalos (cercano a S, lejano): la grilla recorre H alejándose de S
+    width = np.exp(BARRIER_WIDTH * sigma * np.sqrt(T))
+    near = np.where(is_down, S * (1 - 1e-9), S * (1 + 1e-9))
+    far = np.where(is_down, S / width, S * width)
+    return _solve(value, price, near, far, BRACKET_POINTS, BRACKET_ZOOMS, tol,
+                  max_iter).reshape(shape)[()]
+
+
+def _rows(arrays, rows, ndim):
+    """Filas `rows` de cada array, con ejes extra para difundir contra una grilla"""
+    return [a[rows].reshape((-1,) + (1,) * (ndim - 1)) for a in arrays]
+
+
+def _bracket(value, target, start, end, points, zooms):
+    """(filas, a, b, value(a) - target) del primer cambio de signo de cada fila
+
+    Se recorre una grilla geométrica de `points` puntos de start a end. Las
+    filas sin cambio de signo (un pico o valle que la grilla no resolvió)
+    repiten hasta `zooms` veces con una grilla nueva entre los vecinos del
+    punto más cercano al objetivo; las que nunca cambian de signo no aparecen.
+    """
+    rows = np.arange(target.size)
+    found = [], [], [], []
+    for zoom in range(zooms + 1):
+        grid = start[:, None] * (end / start)[:, None] ** np.linspace(0.0, 1.0, points)
+        gap = value(grid, rows, slope=False) - target[rows, None]
+        sign = np.sign(gap)
+        change = sign[:, :-1] * sign[:, 1:] <= 0
+        bracketed = change.any(axis=1)
+        hit = np.flatnonzero(bracketed)
+        first = change.argmax(axis=1)[hit]
+        for out, values in zip(found, (rows[hit], grid[hit, first], grid[hit, first + 1],
+                                       gap[hit, first])):
+            out.append(values)
+
+        missing = np.flatnonzero(~bracketed)
+        if zoom == zooms or not missing.size:
+            break
+        distance = np.abs(gap[missing])
+        nearest = np.where(np.isnan(distance), np.inf, distance).argmin(axis=1)
+        start = grid[missing, np.maximum(nearest - 1, 0)]
+        end = grid[missing, np.minimum(nearest + 1, points - 1)]
+        rows = rows[missing]
+    return tuple(np.concatenate(values) for values in found)
+
+
+def _solve(value, target, start, end, points, zooms, tol, max_iter):
+    """Raíces de value(x) = target por fila con Newton protegido por bisección
+
+    value(x, rows, slope) valora las filas `rows` en x (y devuelve la derivada
+    si slope). El intervalo inicial sale de _bracket y las filas sin cambio de
+    signo quedan en nan. Una fila converge cuando el error en precio es menor
+    que tol o el intervalo ya no se puede achicar. Los desbordes de las
+    fórmulas en σ muy chicas dan nan, que nunca cuenta como cambio de signo.
+    """
+    result = np.full(target.size, np.nan)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        rows, a, b, gap_a = _bracket(value, target, start, end, points, zooms)
+        x = 0.5 * (a + b)
+        for _ in range(max_iter):
+            fx, slope = value(x, rows)
+            g = fx - target[rows]
+            done = (np.abs(g) <= tol) | (np.abs(b - a) <= 4 * np.finfo(float).eps * np.abs(x))
+            result[rows[done]] = x[done]
+            active = ~done
+            if not active.any():
+                return result
+            rows, x, a, b, gap_a, g, slope = (v[active] for v in (rows, x, a, b, gap_a, g, slope))
+
+            # El extremo con el mismo signo que g pasa a ser x
+            same = np.sign(g) == np.sign(gap_a)
+            a, gap_a, b = np.where(same, x, a), np.where(same, g, gap_a), np.where(same, b, x)
+            newton = x - g / slope
+            low, high = np.minimum(a, b), np.maximum(a, b)
+            inside = (newton > low) & (newton < high)
+            x = np.where(inside, newton, 0.5 * (a + b))
+    # Sin converger en max_iter: el último iterado, dentro del intervalo final
+    result[rows] = x
+    return result
@@ -0,0 +1,259 @@
+"""Núcleos compilados (Numba) de la inducción hacia atrás, con NumPy como referencia
+
+Los bucles de binomial_batch, trinomial_tree y amm_price hacen por paso
+varias pasadas vectorizadas sobre la capa (esperanza descontada, máscara de
+la barrera, máximo del ejercicio anticipado, bandas finas del AMM), cada una
+con su temporal. Los núcleos de este módulo las funden en un solo recorrido
+in-place por capa, de modo que cada nodo se lee y escribe una vez por paso.
+thomas_factor y theta_march hacen lo mismo con los pasos θ de
+finite_difference (lado derecho, bordes y sustitución de Thomas), que con
+NumPy usan LAPACK gttrf/gttrs.
+
+El backend se elige en tiempo de ejecución con set_backend o use_backend. Al
+importar el módulo vale el de la variable de entorno PRICING_BACKEND y, si no
+está definida, 'numba' siempre que Numba esté instalado: con sólo instalarlo
+cambia el backend por defecto de todos los motores (y la primera llamada
+compila los núcleos). 'numpy' usa los bucles vectorizados de cada motor y
+queda como referencia; PRICING_BACKEND=numpy lo fija. Los núcleos hacen las
+mismas operaciones en el mismo orden que NumPy, así que ambos backends dan los
+mismos precios salvo redondeo (ver tests/test_kernels.py y
+benchmarks/bench_kernels.py).
+"""
+import math
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Numba es opcional
+    numba = None
+
+BACKENDS = ('numpy', 'numba')
+_backend = 'numpy'
+
+
+def set_backend(name):
+    """Elige el backend de la inducción: 'numpy' o 'numba'"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {name}")
+    if name == 'numba' and numba is None:
+        raise ImportError("El backend 'numba' requiere el paquete numba")
+    _backend = name
+
+
+def get_backend():
+    return _backend
+
+
+@contextmanager
+def use_backend(name):
+    """Usa el backend name dentro de un bloque with (para comparar ambos)"""
+    previous = _backend
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+set_backend(os.environ.get('PRICING_BACKEND', 'numba' if numba is not None else 'numpy'))
+
+
+def compiled():
+    """True si la inducción debe usar los núcleos compilados"""
+    return _backend == 'numba'
+
+
+def _jit(parallel=False):
+    if numba is None:
+        return lambda function: function
+    return numba.njit(cache=True, parallel=parallel)
+
+
+def _range():
+    return numba.prange if numba is not None else range
+
+
+prange = _range()
+
+
+@_jit(parallel=True)
+def binomial_induction(V, pu, pd, N, stop, a, down, up, rebate, monitored):
+    """Inducción in-place de un lote de árboles CRR desde la capa N[fila] hasta `stop`
+
+    V (filas x nodos) trae la capa terminal ya tocada por la barrera. Cada
+    fila es independiente: en el paso i el nodo j pasa a pd·V[j] + pu·V[j+1]
+    y, si la fila monitorea esa capa, vale rebate cuando j <= floor((a + i)/2)
+    (down) o j >= ceil((a + i)/2) (up). monitored (filas x capas) o None para
+    monitorear todas las capas.
+    """
+    for row in prange(V.shape[0]):
+        p_up, p_down, value = pu[row, 0], pd[row, 0], V[row]
+        barrier = down[row] or up[row]
+        for i in range(N[row] - 1, stop - 1, -1):
+            # Ascendente: V[j + 1] todavía es el de la capa siguiente
+            for j in range(i + 1):
+                value[j] = value[j] * p_down + value[j + 1] * p_up
+            if not barrier:
+                continue
+            if monitored is not None:
+                if not monitored[row, i]:
+                    continue
+            level = (a[row] + i) / 2
+            lower = math.floor(level) if down[row] else -1.0
+            upper = math.ceil(level) if up[row] else np.inf
+            for j in range(i + 1):
+                if j <= lower or j >= upper:
+                    value[j] = rebate[row]
+
+
+@_jit()
+def trinomial_induction(V, start, extra, pu, pm, pd, intrinsic, N, watch, jb, is_down, out,
+                        ki, vanilla, rebate, decay, T, dt):
+    """Inducción in-place de trinomial_tree desde la capa start + 1 hasta t = 0
+
+    V (nodos x columnas) trae la capa start + 1 ya ejercida y tocada. Para
+    cada capa se calcula, nodo por nodo y columna por columna, la esperanza
+    descontada pu·V[j+2] + pm·V[j+1] + pd·V[j], el máximo con intrinsic (fila
+    N - step + j de la capa terminal; sin filas si es europea) y, si
+    watch[step], la barrera en los nodos en o más allá del nivel jb: las
+    columnas out valen el rebate y las ki heredan su columna vanilla.
+    """
+    american = intrinsic.shape[0] > 0
+    for step in range(start, -1, -1):
+        layer = step + extra
+        width = 2 * layer + 1
+        for j in range(width):
+            for c in range(V.shape[1]):
+                V[j, c] = V[j + 2, c] * pu + V[j + 1, c] * pm + V[j, c] * pd
+                if american:
+                    V[j, c] = max(V[j, c], intrinsic[N - step + j, c])
+        if not watch[step]:
+            continue
+        if is_down:
+            first, last = 0, min(max(jb + layer + 1, 0), width)
+        else:
+            first, last = max(min(jb + layer, width), 0), width
+        discount = math.exp(-decay * (T - step * dt))
+        for j in range(first, last):
+            for m in range(len(ki)):
+                V[j, ki[m]] = V[j, vanilla[m]]
+            for c in out:
+                V[j, c] = rebate[c] * discount
+
+
+@_jit()
+def thomas_factor(A):
+    """Factorización de Thomas (sin pivoteo) de la tridiagonal de filas A = (sub, diag, super)
+
+    Devuelve (c', 1/m): los superdiagonales normalizados y las inversas de los
+    pivotes de la eliminación hacia adelante. Basta con que A sea
+    diagonalmente dominante, como I - θΔτ·L en theta_march.
+    """
+    n = A.shape[1]
+    factor = np.empty((2, n))
+    previous = 0.0
+    for i in range(n):
+        pivot = A[1, i] - (A[0, i] * previous if i > 0 else 0.0)
+        factor[1, i] = 1 / pivot
+        previous = A[2, i] / pivot
+        factor[0, i] = previous
+    return factor
+
+
+@_jit()
+def theta_march(V, first, last, E, A, factor, plan, low_edge, high_edge):
+    """Pasos θ in-place de las columnas de V en los nodos first..last (finite_difference)
+
+    En el paso n, con la etapa s = plan[n]: lado derecho E[s]·V (E tridiagonal
+    por filas), bordes nuevos low_edge[n], high_edge[n] y sustitución de
+    Thomas con A[s] y factor[s] de thomas_factor, todo en un recorrido por
+    nodo para todas las columnas.
+    """
+    n, columns = last - first - 1, V.shape[1]
+    rhs = np.empty((n, columns))
+    for step in range(len(plan)):
+        stage = plan[step]
+        lower, diag, upper = E[stage, 0], E[stage, 1], E[stage, 2]
+        c_prime, inverse = factor[stage, 0], factor[stage, 1]
+        for i in range(n):
+            node = first + 1 + i
+            for c in range(columns):
+                rhs[i, c] = (V[node - 1, c] * lower[i] + V[node, c] * diag[i]
+                             + V[node + 1, c] * upper[i])
+        for c in range(columns):
+            V[first, c] = low_edge[step, c]
+            V[last, c] = high_edge[step, c]
+            rhs[0, c] -= A[stage, 0, 0] * V[first, c]
+            rhs[n - 1, c] -= A[stage, 2, n - 1] * V[last, c]
+        # Eliminación hacia adelante y sustitución hacia atrás
+        for c in range(columns):
+            rhs[0, c] *= inverse[0]
+        for i in range(1, n):
+            for c in range(columns):
+                rhs[i, c] = (rhs[i, c] - A[stage, 0, i] * rhs[i - 1, c]) * inverse[i]
+        V[last - 1] = rhs[n - 1]
+        for i in range(n - 2, -1, -1):
+            for c in range(columns):
+                rhs[i, c] -= c_prime[i] * rhs[i + 1, c]
+            V[first + 1 + i] = rhs[i]
+
+
+@_jit()
+def amm_induction(V, lo, length, start, stop, pu, pm, pd, watch, jb, direction, boundary,
+                  band, operator, use_band):
+    """Inducción in-place de la malla gruesa y las bandas finas del AMM de la capa start a stop
+
+    Las primeras `length` filas de V (nodos x columnas) traen la capa
+    start + 1, cuyo primer nodo es el nivel lo. Cada paso es el de
+    trinomial_induction con la barrera (niveles en o más allá de jb hacia
+    -direction) en las capas watch y, con use_band, el producto por operator
+    (band_operator) del estado de las bandas band, los tres nodos gruesos
+    vivos junto a la barrera y el borde boundary, que reemplaza al nodo
+    grueso a distancia 1. Devuelve (lo, length, use_band) en la capa stop.
+    """
+    columns, n_band = V.shape[1], band.shape[0]
+    state = np.empty((n_band + 4, columns))
+    for n in range(start, stop - 1, -1):
+        if use_band:
+            # Nodos gruesos a distancia 1, 2 y 3 de la barrera en la capa n + 1
+            for d in range(3):
+                j = direction * (d + 1) - lo
+                if j < 0 or j >= length:
+                    use_band = False
+                    break
+                for c in range(columns):
+                    state[n_band + d, c] = V[j, c]
+        length -= 2
+        lo += 1
+        for j in range(length):
+            for c in range(columns):
+                V[j, c] = V[j + 2, c] * pu + V[j + 1, c] * pm + V[j, c] * pd
+        if watch[n]:
+            if direction > 0:
+                first, last = 0, min(max(jb + 1 - lo, 0), length)
+            else:
+                first, last = min(max(jb - lo, 0), length), length
+            for j in range(first, last):
+                for c in range(columns):
+                    V[j, c] = boundary[n, c]
+        if not use_band:
+            continue
+        for c in range(columns):
+            for i in range(n_band):
+                state[i, c] = band[i, c]
+            state[n_band + 3, c] = boundary[n + 1, c]
+        node = direction - lo
+        for c in range(columns):
+            for i in range(n_band + 1):
+                total = 0.0
+                for m in range(n_band + 4):
+                    total += operator[i, m] * state[m, c]
+                if i < n_band:
+                    band[i, c] = total
+                elif 0 <= node < length:
+                    V[node, c] = total
+    return lo, length, use_band
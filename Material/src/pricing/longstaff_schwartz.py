@@ -0,0 +1,160 @@
+"""Longstaff-Schwartz para opciones barrera americanas con memoria O(M)
+
+Las normales del paso i salen siempre de la i-ésima hija SeedSequence.spawn
+de la semilla, así que pueden regenerarse a pedido. El paso hacia adelante
+sólo guarda el log-precio actual y el paso del primer toque de la barrera
+(int16); el paso hacia atrás reconstruye x_i = x_{i+1} - incremento_{i+1}
+regenerando las normales de ese paso. Nunca existe una matriz M x N de
+trayectorias ni de flujos de caja: cada trayectoria tiene un índice de parada
+int16 y el flujo que cobra en él.
+"""
+import numpy as np
+
+from pricing.contracts import barrier_flags, monitoring_times
+from pricing.monte_carlo import MonteCarloResult
+
+# Paso de primer toque para trayectorias que nunca tocan la barrera
+NEVER = np.iinfo(np.int16).max
+
+
+def laguerre_basis(s, out):
+    """Constante y exp(-s/2) L_n(s), n = 0, ..., d-2 (base de Longstaff y Schwartz)"""
+    out[:, 0] = 1.0
+    if out.shape[1] > 1:
+        out[:, 1] = np.exp(-0.5 * s)
+    if out.shape[1] > 2:
+        out[:, 2] = out[:, 1] * (1.0 - s)
+    for n in range(1, out.shape[1] - 2):
+        out[:, n + 2] = ((2 * n + 1 - s) * out[:, n + 1] - n * out[:, n]) / (n + 1)
+    return out
+
+
+def monomial_basis(s, out):
+    """Potencias 1, s, ..., s^(d-1) en las columnas de out"""
+    out[:, 0] = 1.0
+    for n in range(1, out.shape[1]):
+        np.multiply(out[:, n - 1], s, out=out[:, n])
+    return out
+
+
+BASES = {'laguerre': laguerre_basis, 'monomial': monomial_basis}
+
+
+def longstaff_schwartz_price(S0, K, T, r, sigma, N, option_type='put', H=None,
+                             barrier_type=None, rebate=0.0, rebate_at_hit=True,
+                             n_paths=100_000, degree=3, basis='laguerre', seed=None,
+                             monitoring_dates=None):
+    """Valora una opción americana vanilla o barrera con N fechas de ejercicio
+
+    En cada fecha se regresa el flujo futuro descontado sobre la base
+    (laguerre o monomial, de grado `degree` en S/K) usando sólo trayectorias
+    en el dinero y ejercibles: vivas para las knock-out, ya activadas para las
+    knock-in. La barrera se monitorea en las N fechas; las knock-out pagan el
+    rebate al tocarla (o al vencimiento con rebate_at_hit=False) y las
+    knock-in que nunca se activan lo pagan al vencimiento.
+    Devuelve MonteCarloResult(price, std_error, n_paths).
+
+    Con monitoring_dates (fechas en (0, T]) la barrera se monitorea sólo en
+    esas fechas: la grilla simulada es la unión de las N fechas de ejercicio
+    y las de monitoreo, se ejerce sólo en las primeras y la barrera se mira
+    sólo en las segundas.
+    """
+    if basis not in BASES:
+        raise ValueError(f"Base desconocida: {basis}")
+    phi = 1.0 if option_type == 'call' else -1.0
+
+    # Tiempos t_1..t_n de la grilla; en cuáles se ejerce y en cuáles se monitorea
+    times = T * np.arange(1, N + 1) / N
+    exercise_at = watched = np.ones(N, dtype=bool)
+    if H is not None and monitoring_dates is not None:
+        dates = monitoring_times(monitoring_dates, T)
+        exercise_dates = times
+        times = np.union1d(times, dates)
+        # Fechas de monitoreo que coinciden con una de ejercicio no agregan paso
+        times = times[np.diff(times, prepend=0.0) > 1e-12 * T]
+        exercise_at = np.isclose(times[:, None], exercise_dates, rtol=0, atol=1e-12 * T).any(1)
+        watched = np.isclose(times[:, None], dates, rtol=0, atol=1e-12 * T).any(1)
+    N = len(times)
+    if N > NEVER - 1:
+        raise ValueError(f"N debe ser menor que {NEVER} para índices de parada int16")
+
+    if H is not None:
+        is_down, is_out = barrier_flags(barrier_type)
+        if monitoring_dates is None and ((S0 <= H) if is_down else (S0 >= H)):
+            # Barrera ya tocada en t=0
+            if is_out:
+                return MonteCarloResult(float(rebate), 0.0, 0)
+            return longstaff_schwartz_price(S0, K, T, r, sigma, N, option_type,
+                                            n_paths=n_paths, degree=degree,
+                                            basis=basis, seed=seed)
+        log_H = np.log(H / S0)
+
+    dt = np.diff(times, prepend=0.0)
+    drift = (r - 0.5 * sigma**2) * dt
+    vol = sigma * np.sqrt(dt)
+    # Tiempo de cada índice de parada 0..N, para descontar
+    times = np.concatenate([[0.0], times])
+    streams = np.random.SeedSequence(seed).spawn(N)
+
+    def increment(i, out):
+        # Incremento de log-precio entre t_{i-1} y t_i (siempre los mismos números)
+        np.random.default_rng(streams[i - 1]).standard_normal(out=out)
+        out *= vol[i - 1]
+        out += drift[i - 1]
+        return out
+
+    # Hacia adelante: sólo x_N y el primer paso en que se toca la barrera
+    M = n_paths
+    x = np.zeros(M)
+    z = np.empty(M)
+    first_hit = np.full(M, NEVER, dtype=np.int16)
+    for i in range(1, N + 1):
+        x += increment(i, z)
+        if H is not None and watched[i - 1]:
+            crossed = (x <= log_H) if is_down else (x >= log_H)
+            first_hit[crossed & (first_hit == NEVER)] = i
+
+    def payoff(x_i):
+        return np.maximum(phi * (S0 * np.exp(x_i) - K), 0)
+
+    def exercisable(i):
+        if H is None:
+            return np.ones(M, dtype=bool)
+        return first_hit > i if is_out else first_hit <= i
+
+    # Flujo de caja al vencimiento (o al tocar la barrera) y su índice de parada
+    cash = payoff(x)
+    stop = np.full(M, N, dtype=np.int16)
+    if H is not None:
+        cash[~exercisable(N)] = rebate
+        if is_out and rebate_at_hit:
+            stop = np.where(first_hit == NEVER, N, first_hit).astype(np.int16)
+
+    # Hacia atrás: regresión en cada fecha de ejercicio sobre un diseño preasignado
+    fill_basis = BASES[basis]
+    design = np.empty((M, degree + 1))
+    for i in range(N - 1, 0, -1):
+        x -= increment(i + 1, z)
+        if not exercise_at[i - 1]:
+            continue
+        candidates = np.flatnonzero(exercisable(i))
+        exercise = payoff(x[candidates])
+        itm = exercise > 0
+        candidates, exercise = candidates[itm], exercise[itm]
+        if len(candidates) <= degree + 1:
+            continue
+        A = fill_basis(S0 * np.exp(x[candidates]) / K, design[:len(candidates)])
+        future = cash[candidates] * np.exp(-r * (times[stop[candidates]] - times[i]))
+        coef = np.linalg.lstsq(A, future, rcond=None)[0]
+        now = exercise > A @ coef
+        cash[candidates[now]] = exercise[now]
+        stop[candidates[now]] = i
+
+    values = cash * np.exp(-r * times[stop])
+    price = values.mean()
+    std_error = values.std(ddof=1) / np.sqrt(M)
+    # Ejercicio inmediato en t=0 si es ejercible y vale más que continuar
+    immediate = max(phi * (S0 - K), 0.0)
+    if (H is None or is_out) and immediate > price:
+        return MonteCarloResult(immediate, 0.0, M)
+    return MonteCarloResult(float(price), float(std_error), M)
@@ -0,0 +1,509 @@
+"""Monte Carlo de opciones barrera con trayectorias GBM generadas por bloques
+
+Las trayectorias S_{t+Δt} = S_t exp[(r - σ²/2)Δt + σ√Δt Z] se simulan en
+bloques de tamaño fijo sobre buffers preasignados (bloque x pasos), y cada
+bloque sólo actualiza estadísticos acumulados (cantidad, vector de medias y
+matriz de co-momentos centrados del payoff y de las variables de control).
+Nunca se guarda la matriz completa M x N, de modo que la memoria no depende
+del número de trayectorias. En modo cuasi Monte Carlo (qmc=True) las normales
+de cada bloque vienen de secuencias Sobol aleatorizadas (SobolNormals).
+"""
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+from scipy.special import ndtri
+
+from pricing.closed_form import black_scholes, reiner_rubinstein
+from pricing.contracts import barrier_flags, monitoring_times
+
+# Cuantil de la normal para intervalos de confianza al 95%
+Z_95 = 1.959963984540054
+
+# Elementos (trayectorias x pasos) por bloque cuando no se fija chunk_size
+CHUNK_ELEMENTS = 1 << 20
+
+# delta, gamma y sus errores estándar sólo se llenan con greeks=True
+MonteCarloResult = namedtuple('MonteCarloResult',
+                              ['price', 'std_error', 'n_paths', 'delta', 'gamma',
+                               'delta_error', 'gamma_error'],
+                              defaults=(None, None, None, None))
+
+
+CONTROLS = ('vanilla', 'barrier')
+
+
+def merge_stats(a, b):
+    """Combina dos estadísticos (n, medias, co-momentos) de muestras disjuntas (Chan et al.)"""
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n_a == 0:
+        return b
+    if n_b == 0:
+        return a
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + np.outer(delta, delta) * n_a * n_b / n
+
+
+def estimate(stats, columns=None):
+    """(precio, error estándar) a partir de (n, medias, co-momentos)
+
+    La columna 0 es el payoff y las demás son variables de control con media
+    conocida ya restada. Con controles el estimador es el de regresión: se
+    resta b·(media de los controles) con b = Cov(X)^-1 Cov(X, Y), y el error
+    estándar sale de la varianza residual. Con columns se usa sólo ese
+    subconjunto de columnas, la primera como la estimada.
+    """
+    n, mean, m2 = stats
+    if columns is not None:
+        mean, m2 = mean[columns], m2[np.ix_(columns, columns)]
+    if n < 2 + len(mean):
+        return float(mean[0]) if n else np.nan, np.inf
+    if len(mean) == 1:
+        return float(mean[0]), float(np.sqrt(m2[0, 0] / (n - 1) / n))
+    b = np.linalg.solve(m2[1:, 1:], m2[1:, 0])
+    residual = (m2[0, 0] - m2[1:, 0] @ b) / (n - len(mean))
+    return float(mean[0] - mean[1:] @ b), float(np.sqrt(max(residual, 0.0) / n))
+
+
+def monte_carlo_price(S0, K, T, r, sigma, N, option_type='put', H=None,
+                      barrier_type=None, rebate=0.0, rebate_at_hit=True, bridge=False,
+                      antithetic=False, controls=(), drift_shift=0.0,
+                      greeks=False, n_paths=1_000_000, chunk_size=None, tol=None,
+                      seed=None, workers=1, monitoring_dates=None, qmc=False, replicates=16):
+    """Valora una opción europea vanilla o barrera monitoreada en los N pasos
+
+    Simula hasta n_paths trayectorias en bloques de chunk_size; con tol se
+    detiene en cuanto la semiamplitud del intervalo de confianza al 95% es
+    menor que tol. Devuelve MonteCarloResult(price, std_error, n_paths).
+    Las convenciones de rebate son las de trinomial_tree.
+
+    Con bridge=True la barrera se trata como continua: en lugar de mirar sólo
+    los N puntos, cada trayectoria pondera su payoff por la probabilidad de
+    que el puente browniano entre puntos consecutivos no cruce la barrera.
+
+    Con monitoring_dates (fechas en (0, T]) N se ignora: las trayectorias se
+    simulan exactamente sólo en las fechas y en T, con pasos de Δt variable,
+    y la barrera se mira sólo en las fechas (T incluido sólo si es una de
+    ellas). Es incompatible con bridge=True.
+
+    Reducción de varianza (combinable):
+    - antithetic: cada muestra es el promedio de las trayectorias con Z y -Z.
+    - controls: subconjunto de CONTROLS. 'vanilla' usa el payoff vanilla
+      descontado (media Black-Scholes) y 'barrier' el payoff de la misma
+      barrera con monitoreo continuo estimado con el puente browniano, sin
+      rebate (media Reiner-Rubinstein); este último requiere bridge=False.
+    - drift_shift: muestreo de importancia sumando drift_shift a la deriva
+      anual del log-precio, ponderando con la razón de verosimilitud. Para
+      knock-in lejanas, ln(H/S0)/T - (r - σ²/2) centra las trayectorias en H.
+
+    Con greeks=True las mismas trayectorias estiman también delta y gamma
+    (sin controles, que sólo ajustan el precio). Para la vanilla, delta es
+    pathwise, φ·1{en el dinero}·S_T/S0, y gamma aplica la razón de
+    verosimilitud de ln S_T a ese estimador. Para las barreras el payoff no es
+    continuo en S0 y se usa la razón de verosimilitud del primer paso, el
+    único cuya densidad depende de S0: delta = payoff·Z_1/(S0σ√Δt). Con la
+    barrera continua (bridge=True) la supervivencia del primer intervalo
+    depende de S0 directamente, por lo que las griegas requieren bridge=False.
+
+    Con workers > 1 los bloques se reparten en un pool de procesos. Cada
+    bloque usa su propio flujo SeedSequence.spawn de la semilla, y el
+    resultado para una semilla dada es el mismo para cualquier workers.
+
+    Con qmc=True (cuasi Monte Carlo) las normales salen de `replicates`
+    secuencias Sobol con scrambling independiente (SobolNormals), con las
+    dimensiones ordenadas por construcción de puente browniano: la primera
+    fija S_T y las siguientes los puntos medios, de modo que las de mayor
+    varianza usan las primeras coordenadas, las mejor distribuidas. Cada
+    réplica simula n_paths/replicates trayectorias en bloques de chunk_size
+    (redondeado a una potencia de 2) y se combina como en el modo
+    pseudoaleatorio. El precio es la media de las réplicas y std_error su
+    error estándar: como las réplicas son independientes e insesgadas el
+    intervalo es válido, y tol usa el cuantil t de Student con replicates - 1
+    grados de libertad. Se combina con las demás opciones salvo workers > 1.
+    """
+    unknown = set(controls) - set(CONTROLS)
+    if unknown:
+        raise ValueError(f"Variable de control desconocida: {unknown.pop()}")
+    if H is None and 'barrier' in controls:
+        raise ValueError("El control de barrera requiere una opción barrera")
+    if bridge and 'barrier' in controls:
+        raise ValueError("El control de barrera continua requiere bridge=False")
+    if H is not None and bridge and greeks:
+        raise ValueError("Las griegas de opciones barrera requieren bridge=False")
+    if qmc and (workers != 1 or replicates < 2):
+        raise ValueError("qmc=True requiere workers=1 y al menos 2 réplicas")
+    monitoring = None
+    if H is not None and monitoring_dates is not None:
+        if bridge:
+            raise ValueError("bridge=True monitorea en forma continua: no admite monitoring_dates")
+        dates = monitoring_times(monitoring_dates, T)
+        grid = np.union1d(dates, [T])
+        monitoring = grid, np.isin(grid, dates)
+        N = len(grid)
+    if H is not None and monitoring is None:
+        is_down, is_out = barrier_flags(barrier_type)
+        if (S0 <= H) if is_down else (S0 >= H):
+            # Barrera ya tocada en t=0
+            if is_out:
+                if greeks:
+                    return MonteCarloResult(float(rebate), 0.0, 0, 0.0, 0.0, 0.0, 0.0)
+                return MonteCarloResult(float(rebate), 0.0, 0)
+            return monte_carlo_price(S0, K, T, r, sigma, N, option_type,
+                                     antithetic=antithetic,
+                                     controls=tuple(c for c in controls if c != 'barrier'),
+                                     drift_shift=drift_shift, greeks=greeks, n_paths=n_paths,
+                                     chunk_size=chunk_size, tol=tol, seed=seed,
+                                     workers=workers, qmc=qmc, replicates=replicates)
+
+    # Con antitéticas cada muestra usa dos trayectorias
+    per_sample = 2 if antithetic else 1
+    if chunk_size is None:
+        chunk_size = max(CHUNK_ELEMENTS // N, per_sample)
+    n_samples = -(-n_paths // per_sample)
+    chunk_samples = min(max(chunk_size // per_sample, 1), n_samples)
+    if qmc:
+        # Bloques de 2^k puntos: cada bloque es una red Sobol completa
+        n_samples = -(-n_samples // replicates)
+        chunk_samples = 1 << (min(chunk_samples, n_samples).bit_length() - 1)
+    # Medias conocidas de los controles, en el orden de CONTROLS
+    control_means = []
+    if 'vanilla' in controls:
+        control_means.append(black_scholes(S0, K, T, r, sigma, option_type))
+    if 'barrier' in controls:
+        control_means.append(reiner_rubinstein(S0, K, T, r, sigma, H, barrier_type,
+                                               option_type))
+    contract = (S0, K, T, r, sigma, N, option_type, H, barrier_type, rebate,
+                rebate_at_hit, bridge, antithetic, tuple(control_means),
+                tuple(c for c in CONTROLS if c in controls), drift_shift, greeks, chunk_samples,
+                monitoring)
+    # Columnas del precio (payoff y controles); las griegas van al final
+    price_columns = list(range(1 + len(controls)))
+    chunks = _chunk_streams(np.random.SeedSequence(seed), n_samples, chunk_samples)
+
+    if qmc:
+        times = T / N * np.arange(1, N + 1) if monitoring is None else monitoring[0]
+        return _qmc_price(_chunk_simulator(*contract), times, replicates, n_samples,
+                          chunk_samples, tol, seed, price_columns, greeks, per_sample)
+    if workers == 1:
+        simulate = _chunk_simulator(*contract)
+        stats = _reduce((_chunk_stats(simulate(np.random.default_rng(stream), m))
+                         for stream, m in chunks), tol, price_columns)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=contract) as pool:
+            stats = _reduce(_pool_stats(pool, chunks, 2 * workers), tol, price_columns)
+            # Bloques ya encolados que no hacen falta tras la parada temprana
+            pool.shutdown(cancel_futures=True)
+
+    price, std_error = estimate(stats, price_columns)
+    if not greeks:
+        return MonteCarloResult(price, std_error, stats[0] * per_sample)
+    delta, delta_error = estimate(stats, [len(price_columns)])
+    gamma, gamma_error = estimate(stats, [len(price_columns) + 1])
+    return MonteCarloResult(price, std_error, stats[0] * per_sample, delta, gamma,
+                            delta_error, gamma_error)
+
+
+def _qmc_price(simulate, times, replicates, n_samples, chunk_samples, tol, seed,
+               price_columns, greeks, per_sample):
+    """MonteCarloResult de monte_carlo_price con qmc=True
+
+    Las réplicas avanzan juntas, un bloque de cada una por vuelta, para que
+    la parada temprana por tol compare réplicas del mismo tamaño.
+    """
+    sources = [SobolNormals(times, stream)
+               for stream in np.random.SeedSequence(seed).spawn(replicates)]
+    blocks = [(0, 0.0, 0.0)] * replicates
+    quantile = stats.t.ppf(0.975, replicates - 1)
+    for start in range(0, n_samples, chunk_samples):
+        m = min(chunk_samples, n_samples - start)
+        blocks = [merge_stats(block, _chunk_stats(simulate(source, m)))
+                  for block, source in zip(blocks, sources)]
+        if tol is not None and quantile * replicate_estimate(blocks, price_columns)[1] < tol:
+            break
+    price, std_error = replicate_estimate(blocks, price_columns)
+    n_paths = sum(block[0] for block in blocks) * per_sample
+    if not greeks:
+        return MonteCarloResult(price, std_error, n_paths)
+    delta, delta_error = replicate_estimate(blocks, [len(price_columns)])
+    gamma, gamma_error = replicate_estimate(blocks, [len(price_columns) + 1])
+    return MonteCarloResult(price, std_error, n_paths, delta, gamma, delta_error, gamma_error)
+
+
+def replicate_estimate(blocks, columns):
+    """(media, error estándar) de las estimaciones de réplicas independientes"""
+    values = np.array([estimate(block, columns)[0] for block in blocks])
+    return float(values.mean()), float(values.std(ddof=1) / np.sqrt(len(values)))
+
+
+def bridge_plan(times):
+    """Orden de construcción del puente browniano en los tiempos times (crecientes, > 0)
+
+    Una fila (índice, izquierdo, derecho, peso izquierdo, peso derecho,
+    desvío) por dimensión: la dimensión 0 fija W(T) y cada una de las
+    siguientes, en anchura, el punto medio de un intervalo ya fijado,
+    W = a·W(izquierdo) + b·W(derecho) + desvío·Z. izquierdo = -1 es W(0) = 0.
+    """
+    N = len(times)
+    plan = [(N - 1, -1, N - 1, 0.0, 0.0, np.sqrt(times[-1]))]
+    intervals = deque([(-1, N - 1)])
+    while intervals:
+        left, right = intervals.popleft()
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        t_left = 0.0 if left < 0 else times[left]
+        span = times[right] - t_left
+        plan.append((mid, left, right, (times[right] - times[mid]) / span,
+                     (times[mid] - t_left) / span,
+                     np.sqrt((times[mid] - t_left) * (times[right] - times[mid]) / span)))
+        intervals.extend([(left, mid), (mid, right)])
+    return plan
+
+
+class SobolNormals:
+    """Normales cuasi aleatorias con la interfaz standard_normal(out=...) de un Generator
+
+    Cada fila de out son los incrementos brownianos estandarizados en los
+    tiempos times de una trayectoria, construidos con bridge_plan a partir de
+    un punto de una secuencia Sobol con scrambling (semilla seed). Los puntos
+    se piden en orden, así que bloques sucesivos continúan la secuencia.
+    """
+
+    def __init__(self, times, seed):
+        self.plan = bridge_plan(times)
+        self.scale = np.sqrt(np.diff(times, prepend=0.0))
+        self.sampler = stats.qmc.Sobol(len(times), scramble=True,
+                                       rng=np.random.default_rng(seed))
+
+    def standard_normal(self, out):
+        # Dimensiones x trayectorias: cada paso del puente opera sobre filas contiguas
+        z = np.ascontiguousarray(self.sampler.random(len(out)).T)
+        ndtri(z, out=z)
+        W = np.empty_like(z)
+        for k, (i, left, right, a, b, deviation) in enumerate(self.plan):
+            np.multiply(z[k], deviation, out=W[i])
+            if k > 0:
+                W[i] += b * W[right]
+            if left >= 0:
+                W[i] += a * W[left]
+        # Trayectoria W -> incrementos estandarizados
+        np.subtract(W[1:], W[:-1], out=z[1:])
+        z[0] = W[0]
+        z /= self.scale[:, None]
+        out[:] = z.T
+        return out
+
+
+def _chunk_streams(root, n_paths, chunk_size):
+    """Pares (SeedSequence hija, tamaño) de cada bloque, en orden
+
+    El bloque i usa siempre la i-ésima hija de la semilla raíz, de modo que
+    sus números no dependen de qué proceso lo simula.
+    """
+    for start in range(0, n_paths, chunk_size):
+        yield root.spawn(1)[0], min(chunk_size, n_paths - start)
+
+
+def _chunk_stats(samples):
+    """(n, medias, co-momentos) de las muestras (filas) de un bloque"""
+    mean = samples.mean(axis=0)
+    centered = samples - mean
+    return len(samples), mean, centered.T @ centered
+
+
+def _reduce(chunk_stats, tol, columns=None):
+    """Combina los estadísticos de los bloques en orden, con parada temprana
+
+    Como el orden de combinación y el bloque en que se detiene son los mismos
+    en serie y en paralelo, el resultado es idéntico bit a bit.
+    """
+    stats = (0, 0.0, 0.0)
+    for block in chunk_stats:
+        stats = merge_stats(stats, block)
+        if tol is not None and Z_95 * estimate(stats, columns)[1] < tol:
+            break
+    return stats
+
+
+_worker_simulator = None
+
+
+def _init_worker(*contract):
+    """Arma el simulador (y sus buffers) una sola vez por proceso"""
+    global _worker_simulator
+    _worker_simulator = _chunk_simulator(*contract)
+
+
+def _worker_chunk(stream, m):
+    """Estadísticos de un bloque; sólo viajan los momentos, no trayectorias"""
+    return _chunk_stats(_worker_simulator(np.random.default_rng(stream), m))
+
+
+def _pool_stats(pool, chunks, window):
+    """Estadísticos de los bloques en orden, con hasta `window` bloques en curso"""
+    pending = deque()
+    for stream, m in chunks:
+        pending.append(pool.submit(_worker_chunk, stream, m))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunk_simulator(S0, K, T, r, sigma, N, option_type, H, barrier_type, rebate,
+                     rebate_at_hit, bridge, antithetic, control_means, controls,
+                     drift_shift, greeks, chunk_samples, monitoring=None):
+    """Función (rng, m) -> muestras (m x columnas) de m <= chunk_samples muestras
+
+    Columna 0: payoff descontado; siguientes: controles menos su media y, con
+    greeks, los estimadores de delta y gamma. Los
+    buffers de log-precios, nodos tocados y supervivencias se reservan una
+    sola vez y se reutilizan en todos los bloques. monitoring = (tiempos,
+    monitoreados) da una grilla de N tiempos no uniforme en la que la barrera
+    sólo se mira en los marcados; Δt, la deriva y la volatilidad de cada paso
+    pasan a ser vectores.
+    """
+    if monitoring is None:
+        dt = T / N
+    else:
+        times, watched = monitoring
+        dt = np.diff(times, prepend=0.0)
+    drift = (r - 0.5 * sigma**2) * dt
+    vol = sigma * np.sqrt(dt)
+    disc = np.exp(-r * T)
+    phi = 1.0 if option_type == 'call' else -1.0
+    # Corrimiento de la media de cada normal para el muestreo de importancia
+    theta = drift_shift * dt / vol
+    # Deriva y volatilidad del primer paso, el que usan las griegas de barrera
+    drift_1, vol_1 = np.ravel(drift)[0], np.ravel(vol)[0]
+
+    per_sample = 2 if antithetic else 1
+    rows = chunk_samples * per_sample
+    paths = np.empty((rows, N))
+    columns = np.empty((rows, 1 + len(controls) + (2 if greeks else 0)))
+    if H is not None:
+        is_down, is_out = barrier_flags(barrier_type)
+        log_H = np.log(H / S0)
+        # Descuento del rebate pagado en el paso de monitoreo i = 1, ..., N
+        if monitoring is None:
+            hit_discount = np.exp(-r * dt * np.arange(1, N + 1))
+            unwatched = None
+        else:
+            hit_discount = np.exp(-r * times)
+            unwatched = ~watched if not watched.all() else None
+        if bridge or 'barrier' in controls:
+            log_survival = np.empty((rows, N))
+        if not bridge:
+            crossed = np.empty((rows, N), dtype=bool)
+
+    def simulate(rng, m):
+        n_rows = m * per_sample
+        x = paths[:n_rows]
+        out = columns[:n_rows]
+        if antithetic:
+            rng.standard_normal(out=x[:m])
+            np.negative(x[:m], out=x[m:])
+        else:
+            rng.standard_normal(out=x)
+        if drift_shift:
+            x += theta
+            # Razón de verosimilitud dP/dQ = exp(-θ ΣZ + Nθ²/2)
+            if monitoring is None:
+                weight = np.exp(N * theta**2 / 2 - theta * x.sum(axis=1))
+            else:
+                weight = np.exp(theta @ theta / 2 - x @ theta)
+        x *= vol
+        x += drift
+        np.cumsum(x, axis=1, out=x)
+
+        payoff = np.maximum(phi * (S0 * np.exp(x[:, -1]) - K), 0)
+        payoff *= disc
+        column = 1
+        if 'vanilla' in controls:
+            np.subtract(payoff, control_means[0], out=out[:, column])
+            column += 1
+
+        if greeks and H is None:
+            # Pathwise: d(payoff)/dS0 = φ·1{en el dinero}·S_T/S0
+            np.multiply(payoff > 0, phi * disc * np.exp(x[:, -1]), out=out[:, -2])
+            score = (x[:, -1] - N * drift) / (S0 * sigma**2 * T)
+            np.multiply(out[:, -2], score - 1 / S0, out=out[:, -1])
+        elif greeks:
+            # Normal del primer paso (con su corrimiento, si hay muestreo de importancia)
+            z_1 = (x[:, 0] - drift_1) / vol_1
+
+        if H is None:
+            out[:, 0] = payoff
+        elif bridge:
+            out[:, 0] = _bridge_payoff(x, log_survival[:n_rows], payoff, rebate)
+        else:
+            out[:, 0] = _discrete_payoff(x, crossed[:n_rows], payoff)
+            if 'barrier' in controls:
+                np.subtract(_bridge_payoff(x, log_survival[:n_rows], payoff, 0.0),
+                            control_means[-1], out=out[:, column])
+            if greeks:
+                # Razón de verosimilitud de S_1: p'/p y p''/p respecto de S0
+                score = z_1 / (S0 * vol_1)
+                np.multiply(out[:, 0], score, out=out[:, -2])
+                np.multiply(out[:, 0], ((z_1**2 - 1) / vol_1 - z_1) / (S0**2 * vol_1),
+                            out=out[:, -1])
+
+        if drift_shift:
+            out *= weight[:, None]
+        if antithetic:
+            out[:m] += out[m:]
+            out[:m] *= 0.5
+            return out[:m]
+        return out
+
+    def _discrete_payoff(x, knocked, payoff):
+        if is_down:
+            np.less_equal(x, log_H, out=knocked)
+        else:
+            np.greater_equal(x, log_H, out=knocked)
+        if unwatched is not None:
+            knocked[:, unwatched] = False
+        hit = knocked.any(axis=1)
+        if is_out:
+            if rebate_at_hit:
+                paid = rebate * hit_discount[knocked.argmax(axis=1)]
+            else:
+                paid = rebate * disc
+            return np.where(hit, paid, payoff)
+        return np.where(hit, payoff, rebate * disc)
+
+    def _bridge_payoff(x, log_q, payoff, rebate):
+        # Distancia a la barrera del lado vivo (0 si ya se cruzó), in-place en x
+        x -= log_H
+        if not is_down:
+            np.negative(x, out=x)
+        np.maximum(x, 0, out=x)
+
+        # P(el puente entre t_{i-1} y t_i toca H) = exp(-2 d_{i-1} d_i / (σ²Δt))
+        np.multiply(x[:, 1:], x[:, :-1], out=log_q[:, 1:])
+        np.multiply(x[:, 0], abs(log_H), out=log_q[:, 0])
+        log_q *= -2 / (sigma**2 * dt)
+        np.exp(log_q, out=log_q)
+        np.negative(log_q, out=log_q)
+        with np.errstate(divide='ignore'):
+            np.log1p(log_q, out=log_q)
+
+        if is_out and rebate_at_hit and rebate != 0:
+            # Supervivencia acumulada S_i; el rebate se cobra al final del
+            # intervalo del primer cruce, con probabilidad S_{i-1} - S_i
+            np.cumsum(log_q, axis=1, out=log_q)
+            np.exp(log_q, out=log_q)
+            survival = log_q[:, -1].copy()
+            paid = rebate * (hit_discount[0] + log_q[:, :-1] @ hit_discount[1:]
+                             - log_q @ hit_discount)
+            return payoff * survival + paid
+        survival = np.exp(log_q.sum(axis=1))
+        if is_out:
+            return payoff * survival + rebate * disc * (1 - survival)
+        return payoff * (1 - survival) + rebate * disc * survival
+
+    return simulate
@@ -0,0 +1,93 @@
+"""Replicación estática de Derman, Ergener y Kani (DEK) con opciones vanilla
+
+Una knock-out se replica con su payoff al vencimiento más opciones con strike
+en la barrera que vencen en una grilla t_1 < ... < t_n = T y expiran sin
+valor del lado vivo (puts para barreras down, calls para up). Los pesos
+hacen que el portafolio valga el rebate sobre la barrera en cada t_{i-1}; la
+matriz de valores de esas opciones sobre la barrera es triangular superior y
+sólo depende de (H, T, σ, r, n), así que se guarda en caché y sirve para
+todos los strikes, que se resuelven juntos como columnas del lado derecho.
+"""
+import numpy as np
+from scipy.linalg import solve_triangular
+from scipy.special import ndtr
+
+from pricing.cache import byte_lru_cache
+from pricing.closed_form import black_scholes
+from pricing.contracts import barrier_flags
+
+
+def digital(S, K, T, r, sigma, option_type='call'):
+    """Digital cash-or-nothing que paga 1 si S_T > K (call) o S_T < K (put)"""
+    phi = np.where(np.asarray(option_type) == 'call', 1.0, -1.0)
+    d2 = (np.log(S / K) + (r - 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    return np.exp(-r * T) * ndtr(phi * d2)
+
+
+@byte_lru_cache(64 * 2**20)
+def barrier_matrix(H, T, r, sigma, n_dates, is_down):
+    """Grilla de vencimientos y matriz A[i, j] = valor en (H, t_i) de la opción j
+
+    La opción j tiene strike H y vence en t_{j+1}; A es triangular superior
+    porque en t_i sólo siguen vivas las opciones con j >= i.
+    """
+    dates = T * np.arange(n_dates + 1) / n_dates
+    tau = dates[None, 1:] - dates[:-1, None]
+    alive = tau > 0
+    A = np.zeros((n_dates, n_dates))
+    A[alive] = black_scholes(H, H, tau[alive], r, sigma, 'put' if is_down else 'call')
+    A.flags.writeable = False
+    return dates, A
+
+
+def dek_weights(K, T, r, sigma, H, barrier_type, option_type='put', rebate=0.0, n_dates=50):
+    """Vencimientos t_1..t_n y pesos (n_dates x strikes) de las opciones con strike H
+
+    Replican la knock-out del mismo strike; para una knock-in son los de la
+    knock-out con signo opuesto (más el portafolio de supervivencia si hay rebate).
+    """
+    is_down, is_out = barrier_flags(barrier_type)
+    K, option_type = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(option_type))
+    dates, A = barrier_matrix(float(H), float(T), float(r), float(sigma), int(n_dates), is_down)
+    t = dates[:-1, None]
+    # Valor del payoff terminal sobre la barrera en cada t_i (columnas = strikes)
+    terminal = black_scholes(H, K.ravel()[None, :], T - t, r, sigma, option_type.ravel()[None, :])
+    return dates[1:], solve_triangular(A, (rebate if is_out else 0.0) - terminal)
+
+
+def dek_price(S0, K, T, r, sigma, H, barrier_type, option_type='put', rebate=0.0,
+              n_dates=50):
+    """Precio por replicación estática DEK de una opción barrera continua
+
+    K y option_type pueden ser arrays (mismo H, T, σ, r): los pesos de todos
+    los strikes salen de una única sustitución hacia atrás con la matriz en
+    caché y el precio es una suma de precios Black-Scholes vectorizada. Las
+    knock-out pagan el rebate al tocar la barrera y las knock-in al vencimiento
+    si no se tocó (V_KI = V_vanilla - V_KO + R · supervivencia).
+    """
+    is_down, is_out = barrier_flags(barrier_type)
+    K, option_type = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(option_type))
+    vanilla = black_scholes(S0, K, T, r, sigma, option_type)
+    if (S0 <= H) if is_down else (S0 >= H):
+        # Barrera ya tocada en t=0
+        return (np.full(K.shape, float(rebate)) if is_out else vanilla)[()]
+
+    maturities, weights = dek_weights(K, T, r, sigma, H, barrier_type, option_type,
+                                      rebate, n_dates)
+    hedge_type = 'put' if is_down else 'call'
+    hedges = black_scholes(S0, H, maturities, r, sigma, hedge_type)
+    knockout = vanilla + (hedges @ weights).reshape(K.shape)
+    if is_out:
+        return knockout[()]
+
+    price = vanilla - knockout
+    if rebate != 0:
+        # Supervivencia: digital del lado vivo, con valor 0 sobre la barrera
+        dates, A = barrier_matrix(float(H), float(T), float(r), float(sigma), int(n_dates),
+                                  is_down)
+        live_side = 'call' if is_down else 'put'
+        survival_weights = solve_triangular(A,
+                                            -digital(H, H, T - dates[:-1], r, sigma, live_side))
+        price = price + rebate * (digital(S0, H, T, r, sigma, live_side)
+                                  + hedges @ survival_weights)
+    return price[()]
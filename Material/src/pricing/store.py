@@ -0,0 +1,227 @@
+"""Almacén en disco de resultados de valoración, direccionado por contenido
+
+Cada fila es un contrato valorado por un motor de price_sweep y su clave es un
+hash de 128 bits (no criptográfico) de (motor, versión del motor, parámetros
+del contrato, opciones numéricas), con los floats cuantizados como en
+pricing.cache. La versión de un motor es el hash del código de sus módulos,
+así que cambiar el motor invalida sus resultados sin borrar nada. Con
+'finite_difference' el precio de un contrato depende (dentro del error de
+discretización) de los demás strikes del lote en que se valoró por primera
+vez, y es ese el que queda guardado.
+
+El almacén es un directorio con un archivo binario por columna (COLUMNS) al
+que sólo se agregan filas, y que se lee con np.memmap: buscar un lote de
+claves lee las dos columnas de clave y luego sólo las filas encontradas de
+las columnas de valores. Las columnas de clave se escriben al final de cada
+agregado, de modo que un agregado interrumpido deja filas que no cuentan.
+Admite un solo escritor a la vez.
+"""
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from pricing.cache import quantize, round_mantissa
+from pricing.contracts import BARRIER_TYPES, Greeks
+from pricing.sweep import price_sweep
+
+# Sólo se agregan motores al final: engine guarda el índice en ENGINES
+ENGINES = ('trinomial', 'amm', 'binomial', 'finite_difference')
+# Módulos cuyo código define los resultados de cada motor
+ENGINE_MODULES = {
+    'trinomial': ('trinomial', 'kernels', 'cache', 'contracts', 'sweep'),
+    'amm': ('amm', 'trinomial', 'kernels', 'cache', 'contracts', 'sweep'),
+    'binomial': ('binomial', 'kernels', 'cache', 'contracts', 'sweep'),
+    'finite_difference': ('finite_difference', 'kernels', 'contracts', 'sweep'),
+}
+OPTION_TYPES = ('call', 'put')
+
+# Columnas y su tipo; option y barrier son índices en OPTION_TYPES y
+# BARRIER_TYPES (-1 sin barrera), engine en ENGINES. delta y gamma son nan si
+# la fila se valoró sin greeks.
+COLUMNS = {
+    'key_hi': '<u8', 'key_lo': '<u8',
+    'engine': '<i1', 'option': '<i1', 'barrier': '<i1', 'N': '<i8',
+    'S0': '<f8', 'K': '<f8', 'T': '<f8', 'r': '<f8', 'sigma': '<f8', 'H': '<f8', 'rebate': '<f8',
+    'price': '<f8', 'delta': '<f8', 'gamma': '<f8', 'seconds': '<f8',
+}
+# Se escriben al final: marcan las filas completas
+KEY_COLUMNS = ('key_lo', 'key_hi')
+_PARAMETERS = ('S0', 'K', 'T', 'r', 'sigma', 'H', 'rebate')
+_RECORD = np.dtype([('engine', '<i1'), ('option', '<i1'), ('barrier', '<i1'), ('N', '<i8')]
+                   + [(name, '<f8') for name in _PARAMETERS])
+
+_VERSIONS = {}
+
+
+def engine_version(engine):
+    """Hash del código de los módulos de un motor"""
+    if engine not in _VERSIONS:
+        digest = hashlib.sha256()
+        folder = os.path.dirname(os.path.abspath(__file__))
+        for module in ENGINE_MODULES[engine]:
+            with open(os.path.join(folder, f'{module}.py'), 'rb') as f:
+                digest.update(f.read())
+        _VERSIONS[engine] = digest.hexdigest()
+    return _VERSIONS[engine]
+
+
+def contract_keys(engine, records, options):
+    """(key_hi, key_lo) de cada fila de records (array _RECORD)
+
+    El prefijo (motor, versión, opciones) pasa por blake2b y da las semillas
+    de dos carriles de 64 bits que recorren las palabras de cada fila con el
+    mezclador de splitmix64, vectorizado sobre las filas.
+    """
+    prefix = hashlib.blake2b(repr((engine, engine_version(engine),
+                                   quantize(tuple(sorted(options.items()))))).encode(),
+                             digest_size=16).digest()
+    words = [records['engine'].astype(np.uint64)
+             | records['option'].astype(np.uint8).astype(np.uint64) << np.uint64(8)
+             | records['barrier'].astype(np.uint8).astype(np.uint64) << np.uint64(16),
+             records['N'].astype(np.uint64)]
+    words += [round_mantissa(records[name]).view(np.uint64) for name in _PARAMETERS]
+    keys = []
+    for seed in np.frombuffer(prefix, dtype='<u8'):
+        key = np.full(len(records), seed, dtype=np.uint64)
+        for word in words:
+            key = _mix(key ^ word)
+        keys.append(key)
+    return keys[0], keys[1]
+
+
+def _mix(z):
+    """Mezclador final de splitmix64 (aritmética módulo 2^64)"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class ResultStore:
+    """Resultados de valoración en el directorio path (se crea si no existe)"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def __len__(self):
+        return self.rows
+
+    def _file(self, name):
+        return os.path.join(self.path, f'{name}.bin')
+
+    def _load(self):
+        """Abre las columnas e indexa key_hi; cuentan las filas con ambas claves escritas"""
+        sizes = [os.path.getsize(self._file(name)) // np.dtype(COLUMNS[name]).itemsize
+                 if os.path.exists(self._file(name)) else 0 for name in COLUMNS]
+        self.rows = min(sizes)
+        self._columns = {}
+        hi = self.column('key_hi')
+        # Orden estable: entre claves repetidas la última posición es la fila más nueva
+        self._order = np.argsort(hi, kind='stable')
+        self._sorted = hi[self._order]
+
+    def column(self, name):
+        """Columna name como memmap de sólo lectura (sin leer el archivo entero)"""
+        if name not in self._columns:
+            if self.rows == 0:
+                self._columns[name] = np.empty(0, dtype=COLUMNS[name])
+            else:
+                self._columns[name] = np.memmap(self._file(name), dtype=COLUMNS[name],
+                                                mode='r', shape=(self.rows,))
+        return self._columns[name]
+
+    def find(self, key_hi, key_lo):
+        """Fila más nueva con cada clave, o -1 si no está"""
+        if self.rows == 0:
+            return np.full(len(key_hi), -1, dtype=np.int64)
+        # Consultas ordenadas: la búsqueda binaria recorre el índice en orden
+        order = np.argsort(key_hi)
+        position = np.empty(len(key_hi), dtype=np.int64)
+        position[order] = np.searchsorted(self._sorted, key_hi[order], side='right') - 1
+        row = self._order[np.maximum(position, 0)]
+        found = (position >= 0) & (self._sorted[np.maximum(position, 0)] == key_hi)
+        found &= self.column('key_lo')[row] == key_lo
+        return np.where(found, row, -1)
+
+    def append(self, **columns):
+        """Agrega filas (un array por columna de COLUMNS) al final del almacén"""
+        n = len(columns['key_hi'])
+        for name in [c for c in COLUMNS if c not in KEY_COLUMNS] + list(KEY_COLUMNS):
+            values = np.ascontiguousarray(np.broadcast_to(columns[name], n), dtype=COLUMNS[name])
+            with open(self._file(name), 'r+b' if os.path.exists(self._file(name)) else 'wb') as f:
+                # Descarta colas de un agregado interrumpido antes de escribir
+                f.truncate(self.rows * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+        self._load()
+
+    def price(self, S0, K, T, r, sigma, N, option_type='put', H=None, barrier_type=None,
+              rebate=0.0, engine='trinomial', greeks=False, **options):
+        """price_sweep con los resultados leídos del almacén y sólo las filas nuevas valoradas
+
+        Mismos argumentos y resultado que price_sweep. Las filas que faltan (o,
+        con greeks, que se guardaron sin delta y gamma) se valoran juntas con
+        price_sweep y se agregan; su costo se reparte por igual en seconds.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Motor desconocido: {engine}")
+        arrays = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in (S0, K, T, r, sigma, N, rebate,
+                                                   np.nan if H is None else H)),
+            np.asarray(option_type), np.asarray('' if barrier_type is None else barrier_type))
+        shape = arrays[0].shape
+        S0, K, T, r, sigma, N, rebate, H_all, option_type, barrier_type = (a.ravel()
+                                                                           for a in arrays)
+        records = np.empty(len(S0), dtype=_RECORD)
+        records['engine'] = ENGINES.index(engine)
+        records['option'] = _codes(option_type, OPTION_TYPES)
+        records['barrier'] = -1 if H is None else _codes(barrier_type, BARRIER_TYPES)
+        records['N'] = N
+        for name, values in zip(_PARAMETERS, (S0, K, T, r, sigma, H_all, rebate)):
+            records[name] = values
+        key_hi, key_lo = contract_keys(engine, records, options)
+
+        row = self.find(key_hi, key_lo)
+        missing = row < 0
+        if greeks and self.rows:
+            missing |= np.isnan(self.column('delta')[np.maximum(row, 0)])
+        results = np.empty((3, len(row)))
+        hit = np.flatnonzero(~missing)
+        for values, name in zip(results, ('price', 'delta', 'gamma')):
+            values[hit] = self.column(name)[row[hit]]
+
+        new = np.flatnonzero(missing)
+        if len(new):
+            # Claves repetidas dentro del lote se valoran una sola vez (basta key_hi:
+            # una colisión de 64 bits dentro de un lote es despreciable)
+            _, first, inverse = np.unique(key_hi[new], return_index=True, return_inverse=True)
+            unique = new[first]
+            start = time.perf_counter()
+            value = price_sweep(S0[unique], K[unique], T[unique], r[unique], sigma[unique],
+                                N[unique].astype(int), option_type[unique],
+                                None if H is None else H_all[unique],
+                                None if H is None else barrier_type[unique], rebate[unique],
+                                engine, greeks, **options)
+            elapsed = time.perf_counter() - start
+            computed = np.vstack(value) if greeks else np.vstack([value, np.full((2, len(unique)),
+                                                                                 np.nan)])
+            results[:, new] = computed[:, inverse.ravel()]
+            self.append(key_hi=key_hi[unique], key_lo=key_lo[unique],
+                        **{name: records[name][unique] for name in _RECORD.names},
+                        price=computed[0], delta=computed[1], gamma=computed[2],
+                        seconds=elapsed / len(unique))
+        if greeks:
+            return Greeks(*(values.reshape(shape)[()] for values in results))
+        return results[0].reshape(shape)[()]
+
+
+def _codes(labels, vocabulary):
+    """Índice de cada etiqueta en vocabulary"""
+    unique, inverse = np.unique(labels, return_inverse=True)
+    unknown = [label for label in unique if label not in vocabulary]
+    if unknown:
+        raise ValueError(f"Etiqueta desconocida: {unknown[0]}")
+    return np.array([vocabulary.index(label) for label in unique], dtype=np.int8)[inverse]
@@ -0,0 +1,86 @@
+"""Barridos de parámetros agrupados por geometría de la malla
+
+Los estudios de convergencia y los casos de prueba valoran muchos contratos
+que comparten (S0, T, r, σ, N, H, lado de la barrera) y sólo difieren en el
+payoff (K, call o put, rebate, in u out). price_sweep agrupa esos contratos y
+valora cada grupo con una sola inducción del árbol trinomial o del AMM (o un
+solo sistema de diferencias finitas), cuyo estado tiene una columna por
+payoff: los nodos, las probabilidades y las bandas finas se arman una vez por
+grupo y un barrido de K strikes cuesta aproximadamente una inducción
+matricial en lugar de K inducciones.
+"""
+import numpy as np
+
+from pricing.amm import amm_price
+from pricing.binomial import binomial_batch
+from pricing.contracts import Greeks, barrier_flags
+from pricing.finite_difference import finite_difference_price
+from pricing.trinomial import trinomial_tree
+
+# Motores con una columna por payoff sobre la misma malla
+ENGINES = {'trinomial': trinomial_tree, 'amm': amm_price,
+           'finite_difference': finite_difference_price}
+# Opciones numéricas que price_sweep pasa a cada motor
+ENGINE_OPTIONS = {
+    'trinomial': ('rebate_at_hit', 'monitoring_dt', 'monitoring_dates', 'american'),
+    'amm': ('rebate_at_hit', 'monitoring_dt', 'monitoring_dates', 'levels'),
+    'finite_difference': ('rebate_at_hit', 'monitoring_dt', 'scheme', 'space_steps',
+                          'rannacher'),
+    'binomial': ('monitoring_dt', 'monitoring_dates', 'smooth'),
+}
+
+
+def geometry_groups(S0, T, r, sigma, N, H=None, is_down=None):
+    """Grupo de cada contrato (arrays 1-D): mismo grupo = misma malla"""
+    key = [S0, T, r, sigma, N]
+    if H is not None:
+        key += [H, is_down]
+    _, group = np.unique(np.column_stack(key), axis=0, return_inverse=True)
+    return group.ravel()
+
+
+def price_sweep(S0, K, T, r, sigma, N, option_type='put', H=None, barrier_type=None,
+                rebate=0.0, engine='trinomial', greeks=False, **options):
+    """Valora un barrido de contratos agrupándolos por geometría de la malla
+
+    Los argumentos se difunden entre sí y el resultado (o Greeks de arrays)
+    tiene la forma común. engine es 'trinomial', 'amm', 'finite_difference'
+    o 'binomial'; options se pasan al motor, y una que el motor no admite
+    (ver ENGINE_OPTIONS) es un ValueError. binomial_batch ya valora un lote
+    completo con una inducción por filas, así que con 'binomial' el barrido
+    se le pasa sin agrupar.
+    """
+    if engine not in ENGINE_OPTIONS:
+        raise ValueError(f"Motor desconocido: {engine}")
+    unsupported = sorted(set(options) - set(ENGINE_OPTIONS[engine]))
+    if unsupported:
+        raise ValueError(f"El motor {engine} no admite la opción {unsupported[0]}")
+    if engine == 'binomial':
+        return binomial_batch(S0, K, T, r, sigma, N, option_type, H, barrier_type, rebate,
+                              greeks=greeks, **options)
+    price = ENGINES[engine]
+
+    arrays = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (S0, K, T, r, sigma, N, rebate,
+                                               np.nan if H is None else H)),
+        np.asarray(option_type), np.asarray(barrier_type))
+    shape = arrays[0].shape
+    S0, K, T, r, sigma, N, rebate, H_all, option_type, barrier_type = (a.ravel() for a in arrays)
+    if H is None:
+        group = geometry_groups(S0, T, r, sigma, N)
+    else:
+        is_down, _ = barrier_flags(barrier_type)
+        group = geometry_groups(S0, T, r, sigma, N, H_all, is_down)
+
+    results = np.empty((3 if greeks else 1, len(group)))
+    for rows in np.split(np.argsort(group, kind='stable'),
+                         np.flatnonzero(np.diff(np.sort(group))) + 1):
+        first = rows[0]
+        value = price(S0[first], K[rows], T[first], r[first], sigma[first], int(N[first]),
+                      option_type[rows], None if H is None else H_all[first],
+                      None if H is None else barrier_type[rows], rebate[rows], greeks=greeks,
+                      **options)
+        results[:, rows] = value
+    if greeks:
+        return Greeks(*(values.reshape(shape)[()] for values in results))
+    return results[0].reshape(shape)[()]
@@ -0,0 +1,441 @@
+"""Árbol trinomial en log-precio con la barrera ubicada sobre una capa de nodos
+
+Cada capa temporal n se guarda como un único array contiguo con los nodos de
+nivel j = -n, ..., n (índice j + n), de modo que los vecinos de un nodo y los
+nodos tocados por la barrera se obtienen aritméticamente, sin diccionarios.
+"""
+import numpy as np
+
+from pricing import kernels
+from pricing.cache import byte_lru_cache
+from pricing.contracts import (Greeks, barrier_flags, barrier_schedule, bgk_barrier,
+                               knock_flags, monitoring_grid, schedule_steps,
+                               three_point_greeks, vanilla_payoff)
+
+SQRT3 = np.sqrt(3.0)
+
+
+def lattice_levels(step, center=0):
+    """Niveles de precio de la capa `step` de un árbol trinomial recombinante"""
+    return center + np.arange(-step, step + 1)
+
+
+def node_prices(S0, h, levels):
+    """Precios de los nodos con niveles `levels` y paso h en log-precio"""
+    return S0 * np.exp(h * np.asarray(levels))
+
+
+@byte_lru_cache(2**20)
+def trinomial_probabilities(r, sigma, dt, h):
+    """Probabilidades (pu, pm, pd) que igualan media y varianza de ln(S) en un paso"""
+    nu = r - 0.5 * sigma**2
+    a = (sigma**2 * dt + (nu * dt)**2) / h**2
+    b = nu * dt / h
+    pu, pm, pd = 0.5 * (a + b), 1 - a, 0.5 * (a - b)
+    if np.any(np.asarray(pu) < 0) or np.any(np.asarray(pm) < 0) or np.any(np.asarray(pd) < 0):
+        raise ValueError("Probabilidades trinomiales negativas: aumentar N")
+    return pu, pm, pd
+
+
+@byte_lru_cache(16 * 2**20)
+def terminal_prices(S0, h, step):
+    """Precios de los nodos de la capa `step` (en caché, de sólo lectura)"""
+    return node_prices(S0, h, lattice_levels(step))
+
+
+def barrier_spacing(S0, H, sigma, dt):
+    """Paso h en log-precio con la barrera exactamente n niveles lejos de S0
+
+    Se elige el mayor n con h = |ln(H/S0)| / n >= σ√(3dt), es decir, un
+    factor de estiramiento λ = h / (σ√dt) en [√3, 2√3). Si S0 está a menos de
+    σ√dt de la barrera no existe un h válido y hay que aumentar N (o usar AMM).
+    """
+    eta = abs(np.log(H / S0)) / (sigma * np.sqrt(dt))
+    n = max(int(eta / SQRT3), 1)
+    lam = eta / n
+    if lam < 1:
+        raise ValueError("S0 demasiado cerca de la barrera para este N: aumentar N o usar AMM")
+    return lam * sigma * np.sqrt(dt), n
+
+
+def discrete_barrier_spacing(S0, H, sigma, dt):
+    """Paso h y posición (en niveles) de una barrera con monitoreo discreto
+
+    En las fechas de monitoreo la barrera se aplica a una distribución
+    discreta de nodos, y el error es menor con H a mitad de camino entre dos
+    capas: |ln(H/S0)| = (n + 1/2)·h con el factor λ = h / (σ√dt) >= 1 más
+    cercano a √3. S0 puede estar de cualquier lado de H; si S0 = H la barrera
+    cae sobre el nodo de S0.
+    """
+    distance = np.log(H / S0)
+    if distance == 0:
+        return sigma * np.sqrt(3 * dt), 0.0
+    eta = abs(distance) / (sigma * np.sqrt(dt))
+    n = min(max(round(eta / SQRT3 - 0.5), 0), max(int(eta - 0.5), 0))
+    lam = eta / (n + 0.5)
+    if lam < 1:
+        raise ValueError("S0 demasiado cerca de la barrera para este N: aumentar N")
+    h = lam * sigma * np.sqrt(dt)
+    return h, distance / h
+
+
+def knocked_slice(step, jb, is_down):
+    """Índices de la capa `step` en o más allá del nivel de barrera jb"""
+    if is_down:
+        return slice(0, max(jb + step + 1, 0))
+    return slice(min(jb + step, 2 * step + 1), 2 * step + 1)
+
+
+def trinomial_tree(S0, K, T, r, sigma, N, option_type='put', H=None,
+                   barrier_type=None, rebate=0.0, rebate_at_hit=True, monitoring_dt=None,
+                   greeks=False, american=False, boundary=None, monitoring_dates=None):
+    """Valora una opción vanilla o barrera con un árbol trinomial de N pasos
+
+    Para opciones barrera el paso en precio se ajusta para que H caiga sobre
+    una capa de nodos. Las knock-out pagan el rebate al tocar la barrera (o al
+    vencimiento si rebate_at_hit=False); las knock-in pagan el rebate al
+    vencimiento si la barrera nunca se tocó y se valoran junto con la vanilla,
+    cuyo valor heredan en los nodos de la barrera.
+
+    Con la barrera sobre una capa el árbol converge al precio con monitoreo
+    continuo; con monitoring_dt se valora en cambio una barrera monitoreada
+    cada monitoring_dt, desplazando H según Broadie-Glasserman-Kou. Con
+    monitoring_dates (fechas en (0, T]) el monitoreo discreto es exacto: N
+    pasa al N' de monitoring_grid, que pone las fechas sobre capas, y la
+    barrera sólo se aplica en esas capas (en t = 0 no se monitorea).
+
+    Con greeks=True el árbol se ensancha un nivel (la capa n tiene los niveles
+    -n-1, ..., n+1), de modo que en t = 0 quedan los nodos S0·e^{-h}, S0 y
+    S0·e^{h} y la misma inducción devuelve Greeks(price, delta, gamma).
+
+    K, option_type, rebate y barrier_type pueden ser arrays (barreras todas
+    del mismo lado): los contratos comparten nodos y probabilidades, cada
+    payoff es una columna de la misma inducción y el resultado es un array
+    con la forma común (o Greeks de arrays).
+
+    La inducción sólo guarda dos capas (buffers de 2N + 1 nodos que se
+    alternan), así que la memoria es O(N) por contrato. Con american=True se
+    permite el ejercicio anticipado; las knock-in sólo pueden ejercerse después
+    de tocar la barrera, como la vanilla americana que heredan. Si se pasa
+    boundary, un array de forma (N + 1,) + forma común, en boundary[n] se
+    escribe el precio crítico de ejercicio de la capa n (el mayor nodo
+    ejercido para un put, el menor para un call; nan si no se ejerce; para
+    las knock-in, el de la vanilla que heredan).
+    """
+    K, option_type, rebate = np.broadcast_arrays(np.asarray(K, dtype=float),
+                                                 np.asarray(option_type),
+                                                 np.asarray(rebate, dtype=float))
+    if barrier_type is not None:
+        K, option_type, rebate, barrier_type = np.broadcast_arrays(K, option_type, rebate,
+                                                                   np.asarray(barrier_type))
+    shape = K.shape
+    K, option_type, rebate = K.ravel(), option_type.ravel(), rebate.ravel()
+
+    def result(values):
+        # Valores (nodos en t = 0 x contratos) a float o a arrays con la forma común
+        if greeks:
+            delta, gamma = three_point_greeks(node_prices(S0, h, lattice_levels(1))[:, None],
+                                              values)
+            values = (values[1], delta, gamma)
+            if shape:
+                return Greeks(*(v.reshape(shape) for v in values))
+            return Greeks(*(float(v[0]) for v in values))
+        return values[0].reshape(shape) if shape else float(values[0, 0])
+
+    monitored = None
+    if H is not None and monitoring_dates is not None:
+        if monitoring_dt is not None:
+            raise ValueError("monitoring_dt y monitoring_dates son excluyentes")
+        N, steps = monitoring_grid(monitoring_dates, T, N)
+        monitored = np.zeros(N + 1, dtype=bool)
+        monitored[steps] = True
+
+    dt = T / N
+    if H is None:
+        h = sigma * np.sqrt(3 * dt)
+    else:
+        is_down, is_out = barrier_flags(barrier_type.ravel())
+        if len(set(is_down)) > 1:
+            raise ValueError("Todas las barreras de un mismo árbol deben ser del mismo lado")
+        is_down = bool(is_down[0])
+        if monitored is None and ((S0 <= H) if is_down else (S0 >= H)):
+            # Barrera ya tocada en t=0: las knock-out valen el rebate, las knock-in la vanilla
+            vanilla = trinomial_tree(S0, K, T, r, sigma, N, option_type, greeks=greeks,
+                                     american=american, boundary=boundary)
+            if boundary is not None:
+                boundary.reshape(N + 1, -1)[:, is_out] = np.nan
+            if not greeks:
+                return np.where(is_out, rebate, vanilla).reshape(shape)[()]
+            return Greeks(*(np.where(is_out, knocked, value).reshape(shape)[()]
+                            for knocked, value in zip((rebate, 0.0, 0.0), vanilla)))
+        if monitoring_dt is not None:
+            H = bgk_barrier(H, sigma, monitoring_dt, is_down)
+        if monitored is None:
+            h, n = barrier_spacing(S0, H, sigma, dt)
+            jb = -n if is_down else n
+        else:
+            # Último nivel tocado: el nodo más cercano a H del lado de la barrera
+            h, position = discrete_barrier_spacing(S0, H, sigma, dt)
+            jb = int(np.floor(position) if is_down else np.ceil(position))
+
+    disc = np.exp(-r * dt)
+    pu, pm, pd = (disc * p for p in trinomial_probabilities(r, sigma, dt, h))
+
+    # Niveles de más a cada lado de cada capa para leer las griegas en t = 0
+    extra = 1 if greeks else 0
+    prices = terminal_prices(S0, h, N + extra)
+    payoff = vanilla_payoff(prices[:, None], K, option_type)
+    if H is None:
+        V = payoff
+        intrinsic = payoff.copy() if american else None
+    else:
+        # Columnas: cada contrato y, al final, la vanilla de cada knock-in
+        out = np.flatnonzero(is_out)
+        ki = np.flatnonzero(~is_out)
+        vanilla = len(K) + np.arange(len(ki))
+        V = np.column_stack([np.where(is_out, payoff, rebate), payoff[:, ki]])
+        if american:
+            # Valor de ejercicio por columna; las knock-in no se ejercen antes de tocar H
+            intrinsic = np.column_stack([payoff, payoff[:, ki]])
+            intrinsic[:, ki] = -np.inf
+    if boundary is not None:
+        # Columna que define la frontera de cada contrato y lado de ejercicio
+        frontier = np.arange(len(K))
+        if H is not None:
+            frontier[ki] = vanilla
+        is_put = option_type != 'call'
+        exercised = np.empty((V.shape[0], len(K)), dtype=bool)
+        boundary = boundary.reshape(N + 1, -1)
+
+    # Con el backend compilado (salvo si se pide la frontera de ejercicio) la
+    # capa terminal se trata abajo y el resto de la inducción va a kernels
+    compiled = kernels.compiled() and boundary is None
+    if compiled:
+        empty = np.empty((0, V.shape[1]))
+        watches = np.zeros(N + 1, dtype=bool)
+        if H is None:
+            jb, is_down = 0, True
+            out = ki = vanilla = np.zeros(0, dtype=np.int64)
+        else:
+            watches[:] = True if monitored is None else monitored
+
+    # Capa actual en las primeras filas de V; la siguiente se escribe en W y se
+    # intercambian, sin asignar memoria dentro del bucle
+    W = np.empty_like(V)
+    scratch = np.empty_like(V)
+    for step in range(N, -1, -1):
+        width = 2 * (step + extra) + 1
+        cur = V[:width]
+        watch = H is not None and (monitored is None or monitored[step])
+        if watch:
+            knocked = knocked_slice(step + extra, jb, is_down)
+        if american:
+            # Los nodos de la capa son los centrales de la capa terminal
+            layer = slice(N - step, N - step + width)
+            if boundary is not None:
+                _exercise_boundary(cur, intrinsic[layer], prices[layer], frontier, is_put,
+                                   knocked if watch else None, exercised[:width],
+                                   boundary[step])
+            np.maximum(cur, intrinsic[layer], out=cur)
+        if watch:
+            hit = rebate if rebate_at_hit else rebate * np.exp(-r * (T - step * dt))
+            if len(ki):
+                cur[knocked, ki] = cur[knocked, vanilla]
+                cur[knocked, out] = hit[out]
+            else:
+                cur[knocked] = hit
+        if step > 0 and compiled:
+            # El resto de la inducción, fundida en un recorrido in-place por capa
+            kernels.trinomial_induction(
+                V, step - 1, extra, pu, pm, pd, intrinsic if american else empty, N,
+                watches, jb, is_down, out, ki, vanilla, rebate,
+                0.0 if rebate_at_hit else r, T, dt)
+            break
+        if step > 0:
+            new, tmp = W[:width - 2], scratch[:width - 2]
+            np.multiply(cur[2:], pu, out=new)
+            new += np.multiply(cur[1:-1], pm, out=tmp)
+            new += np.multiply(cur[:-2], pd, out=tmp)
+            V, W = W, V
+
+    return result(V[:2 * extra + 1, :len(K)])
+
+
+def _exercise_boundary(continuation, intrinsic, prices, frontier, is_put, knocked, exercised,
+                       out):
+    """Escribe en out el precio crítico de ejercicio de cada contrato en una capa
+
+    Un nodo se ejerce si el valor de ejercicio es positivo y no menor que el
+    de continuación; los nodos tocados por la barrera no cuentan.
+    """
+    columns = (slice(None), frontier)
+    np.greater_equal(intrinsic[columns], continuation[columns], out=exercised)
+    exercised &= intrinsic[columns] > 0
+    if knocked is not None:
+        exercised[knocked] = False
+    last = len(prices) - 1 - exercised[::-1].argmax(axis=0)
+    first = exercised.argmax(axis=0)
+    out[:] = np.where(exercised.any(axis=0), prices[np.where(is_put, last, first)], np.nan)
+
+
+def schedule_spacing(S0, levels, sigma, dt):
+    """(h, ref) de una grilla ref·e^{jh} con hasta dos niveles de barrera sobre nodos
+
+    Sin niveles la grilla es la de trinomial_tree; con uno, S0 y la barrera
+    quedan sobre nodos (barrier_spacing). Con dos o más se alinean los dos
+    más cercanos a S0 (uno de cada lado si los hay), con λ = h / (σ√dt) lo
+    más cercano a √3 que sea al menos 1, y S0 queda en general entre nodos.
+    Los demás niveles se redondean al nodo más cercano del lado tocado.
+    """
+    levels = np.unique(levels)
+    if len(levels) == 0:
+        return sigma * np.sqrt(3 * dt), S0
+    if len(levels) == 1:
+        return barrier_spacing(S0, levels[0], sigma, dt)[0], S0
+    below, above = levels[levels < S0], levels[levels > S0]
+    if len(below) and len(above):
+        a, b = below[-1], above[0]
+    else:
+        a, b = (below[-2:] if len(below) else above[:2])
+    eta = np.log(b / a) / (sigma * np.sqrt(dt))
+    n = max(int(round(eta / SQRT3)), 1)
+    if eta / n < 1:
+        n = int(eta)
+    if n == 0:
+        raise ValueError("Niveles de barrera demasiado cercanos para este N: aumentar N")
+    return np.log(b / a) / n, a
+
+
+def schedule_levels(levels, ref, h, is_lower):
+    """Índice del último nodo tocado por cada nivel (±inf sin barrera)
+
+    Nodos j <= índice para la barrera inferior y j >= índice para la
+    superior; un nivel a menos de 1e-9 nodos de una capa cae sobre ella.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        position = np.log(levels / ref) / h
+        snapped = np.where(np.abs(position - np.round(position)) < 1e-9, np.round(position),
+                           position)
+    finite = np.isfinite(position)
+    index = np.floor(snapped) if is_lower else np.ceil(snapped)
+    return np.where(finite, index, levels)
+
+
+def interpolate_at(values, start, u, low, high):
+    """Valor en la posición u (en nodos) por interpolación cuadrática de 3 nodos
+
+    values[i] está en el nodo start + i. El trío se centra en el nodo más
+    cercano a u sin salir de [low, high] (los nodos tocados más cercanos);
+    si u cae sobre un nodo se devuelve ese valor.
+    """
+    node = int(round(u))
+    if abs(u - node) < 1e-9:
+        return values[node - start]
+    if high - low < 2:
+        raise ValueError("Menos de tres nodos entre las barreras: aumentar N")
+    node = min(max(node, low + 1), high - 1)
+    x = u - node
+    weights = np.array([0.5 * x * (x - 1), (1 - x) * (1 + x), 0.5 * x * (x + 1)])
+    return weights @ values[node - 1 - start:node + 2 - start]
+
+
+def trinomial_schedule(S0, K, T, r, sigma, N, option_type='put', lower=None, upper=None,
+                       barrier_type='knock-out', rebate=0.0, rebate_at_hit=True):
+    """Valora barreras dobles o escalonadas (monitoreo continuo) con un árbol trinomial
+
+    lower y upper son como en barrier_schedule: None, un nivel o (fechas,
+    niveles) de una barrera escalonada. barrier_type es 'knock-out' o
+    'knock-in' respecto de tocar cualquiera de las dos. N pasa al N' de
+    monitoring_grid, que pone los cambios de nivel sobre capas, y la grilla
+    es la de schedule_spacing: hasta dos niveles quedan sobre capas y S0 se
+    interpola entre los tres nodos más cercanos en t = 0.
+
+    Los demás niveles de una barrera escalonada se redondean a su nodo tocado
+    (schedule_levels), lo que corre la barrera hasta h hacia afuera: ese error
+    es O(h) = O(1/√N) y cambia con la posición de cada nivel entre dos nodos,
+    así que la convergencia en N no es monótona (en bench_barrier_schedule,
+    85, 125 y 130 caen entre nodos y el precio oscila). amm_schedule_price con
+    level >= 1 pone esos niveles sobre la banda fina y no oscila así.
+
+    Una barrera que rige durante toda la vida acota la grilla (sus nodos
+    tocados nunca cambian), así que una doble knock-out cuesta O(N·M) con M
+    los nodos entre las barreras en lugar de O(N²). K, option_type, rebate y
+    barrier_type pueden ser arrays, valorados como columnas de una inducción.
+    """
+    schedule = barrier_schedule(T, lower, upper)
+    K, option_type, rebate, barrier_type = np.broadcast_arrays(
+        np.asarray(K, dtype=float), np.asarray(option_type), np.asarray(rebate, dtype=float),
+        np.asarray(barrier_type))
+    shape = K.shape
+    K, option_type, rebate = K.ravel(), option_type.ravel(), rebate.ravel()
+    is_out = np.atleast_1d(knock_flags(barrier_type.ravel()))
+
+    N, _ = monitoring_grid(schedule.times[1:], T, N)
+    dt = T / N
+    low, up = schedule_steps(schedule, N)
+    if S0 <= low[0] or S0 >= up[0]:
+        # Barrera ya tocada en t=0: las knock-out valen el rebate, las knock-in la vanilla
+        vanilla = trinomial_tree(S0, K, T, r, sigma, N, option_type)
+        return np.where(is_out, rebate, vanilla).reshape(shape)[()]
+
+    levels = np.concatenate([schedule.lower, schedule.upper])
+    h, ref = schedule_spacing(S0, levels[~np.isnan(levels)], sigma, dt)
+    disc = np.exp(-r * dt)
+    pu, pm, pd = (disc * p for p in trinomial_probabilities(r, sigma, dt, h))
+    jl = schedule_levels(low, ref, h, True)
+    ju = schedule_levels(up, ref, h, False)
+
+    # Cono de nodos alcanzables desde S0; una barrera vigente en todos los pasos
+    # lo acota en su nodo tocado más lejano (sin knock-in, que necesitan la vanilla)
+    u0 = np.log(S0 / ref) / h
+    lo = int(np.floor(u0)) - 1 - N
+    hi = int(np.ceil(u0)) + 1 + N
+    walled_lo = is_out.all() and np.isfinite(jl).all() and jl.min() > lo
+    walled_hi = is_out.all() and np.isfinite(ju).all() and ju.max() < hi
+    if walled_lo:
+        lo = int(jl.min())
+    if walled_hi:
+        hi = int(ju.max())
+    base = lo
+
+    # Columnas: cada contrato y, al final, la vanilla de cada knock-in
+    out = np.flatnonzero(is_out)
+    ki = np.flatnonzero(~is_out)
+    vanilla = len(K) + np.arange(len(ki))
+    payoff = vanilla_payoff(ref * np.exp(h * np.arange(lo, hi + 1))[:, None], K, option_type)
+    V = np.column_stack([np.where(is_out, payoff, rebate), payoff[:, ki]])
+    W = np.empty_like(V)
+    scratch = np.empty_like(V)
+
+    for step in range(N, -1, -1):
+        cur = V[lo - base:hi - base + 1]
+        hit = rebate if rebate_at_hit else rebate * np.exp(-r * (T - step * dt))
+        knocked = []
+        if jl[step] >= lo:
+            knocked.append(slice(0, int(min(jl[step], hi)) - lo + 1))
+        if ju[step] <= hi:
+            knocked.append(slice(int(max(ju[step], lo)) - lo, hi - lo + 1))
+        for dead in knocked:
+            if len(ki):
+                cur[dead, ki] = cur[dead, vanilla]
+                cur[dead, out] = hit[out]
+            else:
+                cur[dead] = hit
+        if step == 0:
+            break
+        # Capa siguiente: los extremos abiertos del cono pierden un nodo, los acotados no
+        new_lo = lo if walled_lo else lo + 1
+        new_hi = hi if walled_hi else hi - 1
+        rows = slice(lo + 1 - base, hi - base)
+        new, tmp = W[rows], scratch[rows]
+        np.multiply(V[lo + 2 - base:hi + 1 - base], pu, out=new)
+        new += np.multiply(V[rows], pm, out=tmp)
+        new += np.multiply(V[lo - base:hi - 1 - base], pd, out=tmp)
+        lo, hi = new_lo, new_hi
+        V, W = W, V
+
+    low_edge = int(jl[0]) if np.isfinite(jl[0]) else lo
+    high_edge = int(ju[0]) if np.isfinite(ju[0]) else hi
+    value = interpolate_at(V[lo - base:hi - base + 1, :len(K)], lo, u0,
+                           max(low_edge, lo), min(high_edge, hi))
+    return value.reshape(shape)[()]
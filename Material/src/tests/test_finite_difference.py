@@ -0,0 +1,47 @@
+"""Estabilidad del esquema θ explícito y mallas mínimas de finite_difference"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing.closed_form import black_scholes
+from pricing.finite_difference import finite_difference_price
+from pricing.sweep import price_sweep
+
+S0, T, r, sigma = 100.0, 1.0, 0.05, 0.2
+STRIKES = np.array([90.0, 100.0, 110.0])
+
+
+@pytest.mark.parametrize('option_type', ['call', 'put'])
+def test_explicit_converges_to_black_scholes(option_type):
+    reference = black_scholes(S0, STRIKES, T, r, sigma, option_type)
+    errors = [np.max(np.abs(finite_difference_price(S0, STRIKES, T, r, sigma, N, option_type,
+                                                    scheme='explicit') - reference))
+              for N in [50, 200, 1000, 5000]]
+    assert np.all(np.isfinite(errors))
+    assert np.all(np.diff(errors) < 0)
+    assert errors[-1] < 5e-3
+
+
+def test_explicit_sweep_is_stable():
+    prices = price_sweep(S0, STRIKES, T, r, sigma, 200, 'put', engine='finite_difference',
+                         scheme='explicit')
+    np.testing.assert_allclose(prices, black_scholes(S0, STRIKES, T, r, sigma, 'put'), atol=0.05)
+
+
+def test_unstable_space_steps_raise():
+    with pytest.raises(ValueError, match='space_steps <= '):
+        finite_difference_price(S0, 100.0, T, r, sigma, 200, 'put', scheme='explicit',
+                                space_steps=400)
+    # H a 1% de S0: ninguna malla con ambos sobre nodos es estable con N = 1
+    with pytest.raises(ValueError, match='aumentar N'):
+        finite_difference_price(S0, 100.0, T, r, sigma, 1, 'put', H=99.0,
+                                barrier_type='down-and-out', scheme='explicit')
+
+
+def test_minimum_space_steps():
+    with pytest.raises(ValueError, match='space_steps'):
+        finite_difference_price(S0, 100.0, T, r, sigma, 50, 'put', space_steps=2)
+    assert np.isfinite(finite_difference_price(S0, 100.0, T, r, sigma, 1, 'put'))
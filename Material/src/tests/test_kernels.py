@@ -0,0 +1,107 @@
+"""Los núcleos de pricing.kernels contra los bucles NumPy de referencia"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pricing import kernels
+from pricing.amm import amm_price
+from pricing.binomial import binomial_batch
+from pricing.finite_difference import finite_difference_price
+from pricing.trinomial import trinomial_tree
+
+pytest.importorskip('numba')
+
+S0, T, r, sigma = 100.0, 1.0, 0.05, 0.2
+STRIKES = np.linspace(85, 115, 7)
+DATES = np.linspace(0.1, 1.0, 10)
+
+
+def both_backends(price):
+    """Resultado de price() con el backend NumPy y con el compilado"""
+    values = []
+    for backend in ('numpy', 'numba'):
+        with kernels.use_backend(backend):
+            values.append(np.asarray(price()))
+    return values
+
+
+def assert_same(price):
+    reference, compiled = both_backends(price)
+    np.testing.assert_allclose(compiled, reference, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('options', [
+    dict(option_type='put'),
+    dict(option_type='call', greeks=True),
+    dict(option_type='call', H=90.0, barrier_type='down-and-out', rebate=1.5),
+    dict(option_type='put', H=90.0, barrier_type='down-and-in', rebate=1.5),
+    dict(option_type='put', H=115.0, barrier_type='up-and-out', rebate=2.0, greeks=True),
+    dict(option_type='call', H=115.0, barrier_type='up-and-in'),
+    dict(option_type='put', H=90.0, barrier_type='down-and-out', monitoring_dates=DATES),
+    dict(option_type='call', H=115.0, barrier_type='up-and-out', rebate=1.0,
+         monitoring_dates=DATES, greeks=True),
+])
+def test_binomial_batch(options):
+    N = np.repeat([50, 101, 200], len(STRIKES))
+    K = np.tile(STRIKES, 3)
+    assert_same(lambda: binomial_batch(S0, K, T, r, sigma, N, **options))
+
+
+@pytest.mark.parametrize('american', [False, True])
+@pytest.mark.parametrize('options', [
+    dict(option_type='put'),
+    dict(option_type='call', greeks=True),
+    dict(option_type='put', H=90.0, barrier_type=np.array(['down-and-out', 'down-and-in'] * 3
+                                                          + ['down-and-out']), rebate=1.5),
+    dict(option_type='call', H=120.0, barrier_type='up-and-out', rebate=2.0, greeks=True),
+    dict(option_type='call', H=120.0, barrier_type='up-and-in', rebate=1.0,
+         rebate_at_hit=False),
+    dict(option_type='put', H=90.0, barrier_type='down-and-out', monitoring_dates=DATES),
+    dict(option_type='put', H=120.0, barrier_type=np.array(['up-and-out', 'up-and-in'] * 3
+                                                           + ['up-and-in']),
+         monitoring_dates=DATES),
+])
+def test_trinomial_tree(options, american):
+    assert_same(lambda: trinomial_tree(S0, STRIKES, T, r, sigma, 300, american=american,
+                                       **options))
+
+
+@pytest.mark.parametrize('scheme', ['implicit', 'crank-nicolson'])
+@pytest.mark.parametrize('options', [
+    dict(option_type='put'),
+    dict(option_type='call', greeks=True),
+    dict(option_type='call', H=90.0, barrier_type=np.array(['down-and-out', 'down-and-in'] * 3
+                                                           + ['down-and-out']), rebate=1.5),
+    dict(option_type='put', H=115.0, barrier_type='up-and-out', rebate=2.0, greeks=True),
+    dict(option_type='put', H=115.0, barrier_type='up-and-in', rebate=1.0),
+    dict(option_type='call', H=90.0, barrier_type='down-and-out', monitoring_dt=0.1),
+])
+def test_finite_difference(options, scheme):
+    assert_same(lambda: finite_difference_price(S0, STRIKES, T, r, sigma, 100, scheme=scheme,
+                                                **options))
+
+
+@pytest.mark.parametrize('N', [1, 2])
+def test_finite_difference_coarse(N):
+    # Un solo nodo interior entre la barrera y el borde con N = 1
+    assert_same(lambda: finite_difference_price(S0, STRIKES, T, r, sigma, N, 'put'))
+    assert_same(lambda: finite_difference_price(S0, STRIKES, T, r, sigma, N, 'call', H=90.0,
+                                                barrier_type='down-and-out'))
+
+
+@pytest.mark.parametrize('levels', [(1, 0), (3, 0), (2, 2)])
+@pytest.mark.parametrize('options', [
+    dict(option_type='put'),
+    dict(option_type='call', greeks=True),
+    dict(option_type='call', H=99.0, barrier_type=np.array(['down-and-out', 'down-and-in'] * 3
+                                                           + ['down-and-out']), rebate=1.5),
+    dict(option_type='put', H=115.0, barrier_type='up-and-out', rebate=2.0, greeks=True),
+    dict(option_type='put', H=115.0, barrier_type='up-and-in', rebate=1.0,
+         rebate_at_hit=False),
+    dict(option_type='call', H=90.0, barrier_type='down-and-out', monitoring_dates=DATES),
+])
+def test_amm_price(options, levels):
+    assert_same(lambda: amm_price(S0, STRIKES, T, r, sigma, 200, levels=levels, **options))